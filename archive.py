@@ -0,0 +1,234 @@
+# archive.py
+
+import bisect
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+# Segment layout, little-endian: a header (magic, version), compressed
+# blocks of up to BLOCK_ROWS rows, a compressed JSON footer holding the
+# block index and the segment's name and status tables, and a fixed-size
+# trailer (footer offset, footer length, magic) that readers start from.
+MAGIC = b"TSAR"
+VERSION = 1
+HEADER = struct.Struct("<4sH")
+TRAILER = struct.Struct("<QI4s")
+BLOCK_ROWS = 4096
+SUFFIX = ".tsa"
+
+# Stored in place of a missing end time (the column holds end - start).
+NULL_LENGTH = -2 ** 63
+
+# Block columns in storage order. ids and start times are delta-encoded,
+# which keeps them small and lets zlib compress them well.
+COLUMNS = (("id", "q"), ("start", "q"), ("length", "q"), ("initial", "d"),
+           ("actual", "d"), ("status", "b"), ("name", "i"))
+
+
+def _to_bytes(column):
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_bytes(typecode, data):
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _deltas(values):
+    previous = 0
+    for value in values:
+        yield value - previous
+        previous = value
+
+
+def _encode_block(rows, names, statuses):
+    # rows: (id, task_name, start_time, end_time, initial_duration, actual_duration, status)
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+    ids = [row[0] for row in rows]
+    starts = [row[2] for row in rows]
+    columns["id"].extend(_deltas(ids))
+    columns["start"].extend(_deltas(starts))
+    for row in rows:
+        columns["length"].append(row[3] - row[2] if row[3] is not None else NULL_LENGTH)
+        columns["initial"].append(row[4] if row[4] is not None else math.nan)
+        columns["actual"].append(row[5] if row[5] is not None else math.nan)
+        columns["status"].append(statuses.setdefault(row[6], len(statuses)) if row[6] is not None else -1)
+        columns["name"].append(names.setdefault(row[1], len(names)) if row[1] is not None else -1)
+    return zlib.compress(b"".join(_to_bytes(columns[name]) for name, _ in COLUMNS))
+
+
+def write_segment(path, rows):
+    """
+    Writes rows, sorted by (start_time, id), to a new segment file.
+
+    The file is written under a temporary name, synced and then renamed,
+    so a segment either exists complete or not at all; a failed write
+    removes the temporary file. Returns a dict with the row count, the
+    first and last start times and the file size, or None if there were
+    no rows.
+    """
+    temporary = path + ".tmp"
+    try:
+        return _write_segment(temporary, path, rows)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _write_segment(temporary, path, rows):
+    names = {}
+    statuses = {}
+    blocks = []
+    count = 0
+    first_start = last_start = None
+    with open(temporary, "wb") as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION))
+        block = []
+
+        def flush():
+            data = _encode_block(block, names, statuses)
+            blocks.append([stream.tell(), len(data), len(block), block[0][2], block[-1][2]])
+            stream.write(data)
+            block.clear()
+
+        for row in rows:
+            if first_start is None:
+                first_start = row[2]
+            last_start = row[2]
+            block.append(row)
+            count += 1
+            if len(block) == BLOCK_ROWS:
+                flush()
+        if block:
+            flush()
+        if not count:
+            stream.close()
+            os.remove(temporary)
+            return None
+        footer = zlib.compress(json.dumps({
+            "version": VERSION,
+            "rows": count,
+            "names": sorted(names, key=names.get),
+            "statuses": sorted(statuses, key=statuses.get),
+            "blocks": blocks,
+        }).encode("utf-8"))
+        offset = stream.tell()
+        stream.write(footer)
+        stream.write(TRAILER.pack(offset, len(footer), MAGIC))
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temporary, path)
+    return {"rows": count, "first_start": first_start, "last_start": last_start, "size": os.path.getsize(path)}
+
+
+class Segment:
+    """
+    Read-only view of a segment file.
+
+    The file is memory-mapped and only the footer is parsed up front;
+    blocks are decompressed when a query needs them. The block index
+    holds each block's first and last start time, so a time range only
+    touches the blocks that overlap it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version = HEADER.unpack_from(self._map, 0)
+            offset, length, trailer_magic = TRAILER.unpack_from(self._map, len(self._map) - TRAILER.size)
+            if magic != MAGIC or trailer_magic != MAGIC or version != VERSION:
+                raise ValueError("not a TaskStrike archive segment")
+            footer = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        except (struct.error, zlib.error, ValueError) as e:
+            self._map.close()
+            raise ValueError(f"Corrupt archive segment '{path}': {e}")
+        self.rows = footer["rows"]
+        self.names = footer["names"]
+        self.statuses = footer["statuses"]
+        self.blocks = footer["blocks"]
+        self._first_starts = [block[3] for block in self.blocks]
+        self._last_starts = [block[4] for block in self.blocks]
+        self.first_start = self._first_starts[0]
+        self.last_start = self._last_starts[-1]
+
+    def _decode_block(self, block):
+        offset, length, count = block[0], block[1], block[2]
+        data = zlib.decompress(self._map[offset:offset + length])
+        columns = {}
+        position = 0
+        for name, typecode in COLUMNS:
+            size = array(typecode).itemsize * count
+            columns[name] = _from_bytes(typecode, data[position:position + size])
+            position += size
+        names, statuses = self.names, self.statuses
+        ids = accumulate(columns["id"])
+        starts = list(accumulate(columns["start"]))
+        return [
+            (
+                task_id,
+                names[name] if name >= 0 else None,
+                start,
+                start + length if length != NULL_LENGTH else None,
+                initial if initial == initial else None,  # NaN stands for NULL
+                actual if actual == actual else None,
+                statuses[status] if status >= 0 else None,
+            )
+            for task_id, name, start, length, initial, actual, status in zip(
+                ids, columns["name"], starts, columns["length"], columns["initial"],
+                columns["actual"], columns["status"],
+            )
+        ]
+
+    def iter_rows(self, since=None, until=None, status=None, task_name=None, newest_first=False):
+        """
+        Yields rows as (id, task_name, start_time, end_time, initial_duration,
+        actual_duration, status) tuples in (start_time, id) order, or the
+        reverse with newest_first. `since` and `until` are epoch seconds.
+        """
+        if task_name is not None and task_name not in self.names:
+            return
+        if status is not None and status not in self.statuses:
+            return
+        first = 0 if since is None else bisect.bisect_left(self._last_starts, since)
+        last = len(self.blocks) if until is None else bisect.bisect_left(self._first_starts, until)
+        indexes = range(first, last)
+        for index in reversed(indexes) if newest_first else indexes:
+            rows = self._decode_block(self.blocks[index])
+            if newest_first:
+                rows.reverse()
+            for row in rows:
+                if since is not None and row[2] < since:
+                    continue
+                if until is not None and row[2] >= until:
+                    continue
+                if status is not None and row[6] != status:
+                    continue
+                if task_name is not None and row[1] != task_name:
+                    continue
+                yield row
+
+    def close(self):
+        self._map.close()
+
+
+def merge_rows(sources, newest_first=False):
+    """
+    Merges row iterators that are each in (start_time, id) order.
+    """
+    return heapq.merge(*sources, key=lambda row: (row[2], row[0]), reverse=newest_first)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+# benchmarks/datagen.py
+
+"""
+Synthetic data generator for the benchmarks.
+
+Fills a database with reproducible task history and to-do rows. The schema
+is created through the regular migrations, so triggers such as the daily
+stats rollup are maintained exactly as they would be by the application.
+
+    python benchmarks/datagen.py bench.db --tasks 100000 --todo 1000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from migrations import migrate  # noqa: E402
+from queries import INSERT_TASK, INSERT_TASK_NAME, INSERT_TODO_TASK, SELECT_TASK_NAME_ID  # noqa: E402
+
+TASK_NAMES = [
+    "Write Report", "Review PR", "Fix Bug", "Standup", "Email", "Design Doc",
+    "Refactor", "Deploy", "Read Paper", "Plan Sprint", "Pair Session", "Triage",
+]
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+CHUNK_SIZE = 50_000
+HISTORY_SPAN = 20 * 365 * 86400  # Generated sessions start within the last 20 years
+
+
+def parse_size(text):
+    """
+    Parses a row count such as 10000, 10k or 1M.
+    """
+    if text in SIZES:
+        return SIZES[text]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:].lower(), 1)
+    try:
+        return int(text[:-1] if multiplier > 1 else text) * multiplier
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size: '{text}'. Use a number such as 10000, 10k or 1M.")
+
+
+def _task_rows(count, rng, end):
+    # Sessions go back in time from `end`, about an hour apart; large
+    # histories are packed closer so they stay within HISTORY_SPAN.
+    spacing = max(min(3600, HISTORY_SPAN // max(count, 1)), 1)
+    moment = end
+    for _ in range(count):
+        initial = rng.choice((15, 25, 25, 25, 30, 45, 50))
+        actual = max(initial * rng.uniform(0.3, 1.4), 0.1)
+        moment -= rng.randint(1, 2 * spacing)
+        yield (
+            rng.choice(TASK_NAMES),
+            moment,
+            moment + int(actual * 60),
+            initial,
+            actual,
+            "Finished" if rng.random() < 0.7 else "Not Finished",
+        )
+
+
+def _todo_rows(count, rng, end):
+    for index in range(count):
+        yield (f"{rng.choice(TASK_NAMES)} #{index}", rng.choice((15, 25, 30, 45)), end - index * 60)
+
+
+def _with_name_ids(conn, rows):
+    # Rows are generated with names; the tables store task_names ids.
+    name_ids = {}
+    for name, *values in rows:
+        name_id = name_ids.get(name)
+        if name_id is None:
+            conn.execute(INSERT_TASK_NAME, (name,))
+            name_id = name_ids[name] = conn.execute(SELECT_TASK_NAME_ID, (name,)).fetchone()[0]
+        yield (name_id, *values)
+
+
+def _insert(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK_SIZE:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def populate(conn, tasks, todo=0, seed=0):
+    """
+    Appends `tasks` history rows and `todo` to-do rows in one transaction.
+    The same seed always produces the same rows.
+    """
+    rng = random.Random(seed)
+    end = int(time.time())
+    migrate(conn)
+    with conn:
+        _insert(conn, INSERT_TASK, _with_name_ids(conn, _task_rows(tasks, rng, end)))
+        _insert(conn, INSERT_TODO_TASK, _with_name_ids(conn, _todo_rows(todo, rng, end)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a TaskStrike database with synthetic rows.")
+    parser.add_argument("database", help="Database file to create or extend.")
+    parser.add_argument("--tasks", type=parse_size, default=SIZES["10k"], help="History rows to add (e.g. 10k, 1M).")
+    parser.add_argument("--todo", type=parse_size, default=100, help="To-do rows to add.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(args.database)
+    conn.execute("PRAGMA journal_mode=WAL")
+    populate(conn, args.tasks, args.todo, args.seed)
+    conn.close()
+    print(f"Added {args.tasks} tasks and {args.todo} to-do rows to '{args.database}' "
+          f"in {time.perf_counter() - started:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
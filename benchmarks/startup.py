@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# benchmarks/startup.py
+
+"""
+Startup benchmark for the main.py command paths.
+
+Every command is run in a fresh interpreter several times and the median wall
+time is reported, together with the slowest imports measured by
+`python -X importtime`. Commands must also stay clear of the modules listed in
+FORBIDDEN_IMPORTS; the script exits with status 1 if any check fails.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --budget-ms 150 --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "show-todo": ["--show-todo"],
+    "show-history-plain": ["--show-history", "--plain", "--limit", "10"],
+    "stats": ["--stats", "month"],
+    "help": ["--help"],
+    "status": ["--status"],
+}
+
+# Modules that only the timer, notification and engine paths need.
+FORBIDDEN_IMPORTS = {
+    "show-todo": ["asyncio", "win10toast", "timer", "engine"],
+    "show-history-plain": ["asyncio", "win10toast", "timer", "engine", "tabulate"],
+    "stats": ["asyncio", "win10toast", "timer", "engine"],
+    "help": ["db", "store", "client", "asyncio", "win10toast", "timer", "engine", "tabulate"],
+    "status": ["sqlite3", "db", "logging", "argparse", "tabulate", "notifications", "timer", "engine"],
+}
+
+
+def run_once(args, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [os.path.join(ROOT, "main.py"), *args]
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    # --status exits with 1 when no timer is running, which is expected here.
+    allowed = (0, 1) if args[:1] == ["--status"] else (0,)
+    if result.returncode not in allowed:
+        raise RuntimeError(f"{' '.join(args)} exited with {result.returncode}: {result.stderr.strip()}")
+    return elapsed, result.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Returns {module: cumulative microseconds} from -X importtime output.
+    """
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def benchmark(name, args, runs):
+    # One warm-up run so the page cache and __pycache__ are populated.
+    run_once(args)
+    timings = [run_once(args)[0] for _ in range(runs)]
+    _, stderr = run_once(args, importtime=True)
+    imports = parse_importtime(stderr)
+    forbidden = [module for module in FORBIDDEN_IMPORTS.get(name, []) if module in imports]
+    slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "command": name,
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "slowest_imports_ms": {module: micros / 1000 for module, micros in slowest},
+        "forbidden_imports": forbidden,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main.py startup time.")
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per command.")
+    parser.add_argument("--budget-ms", type=float, help="Fail if a command's median exceeds this.")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to a JSON file.")
+    args = parser.parse_args()
+
+    failed = False
+    results = []
+    for name, command in COMMANDS.items():
+        result = benchmark(name, command, args.runs)
+        results.append(result)
+        print(f"{name:<20} median {result['median_ms']:7.1f} ms  "
+              f"(min {result['min_ms']:.1f}, max {result['max_ms']:.1f})")
+        for module, millis in result["slowest_imports_ms"].items():
+            print(f"    {module:<30} {millis:7.1f} ms")
+        if result["forbidden_imports"]:
+            failed = True
+            print(f"    FAIL: imports {', '.join(result['forbidden_imports'])}")
+        if args.budget_ms is not None and result["median_ms"] > args.budget_ms:
+            failed = True
+            print(f"    FAIL: median above the {args.budget_ms:.0f} ms budget")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as stream:
+            json.dump(results, stream, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
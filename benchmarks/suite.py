@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+
+# benchmarks/suite.py
+
+"""
+Benchmark suite for the rendering, storage and CLI startup hot paths.
+
+Everything runs offline against synthetic databases built by datagen.py in a
+scratch directory with its own config.toml, so the real database is never
+touched. Micro-benchmarks time single calls (frame rendering, one insert,
+one page of history); macro-benchmarks time whole operations at each table
+size (full history fetch and render, stats, `main.py` cold start).
+
+    python benchmarks/suite.py                                # 10k and 100k rows
+    python benchmarks/suite.py --sizes 10k,100k,1M --json results.json
+    python benchmarks/suite.py --json after.json --compare before.json
+
+Results are written as JSON (see --json) together with the commit, Python
+version and platform, so runs can be compared across commits.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import toml
+
+from datagen import parse_size, populate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CLI_COMMANDS = {
+    "show-todo": ["--show-todo"],
+    "show-history-plain": ["--show-history", "--plain", "--limit", "10"],
+    "stats": ["--stats", "month"],
+    "status": ["--status"],
+}
+
+
+def measure(func, runs, number=1, setup=None):
+    """
+    Times `number` calls of func per run and returns per-call statistics in seconds.
+    """
+    timings = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+    return {
+        "runs": runs,
+        "number": number,
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+    }
+
+
+def write_config(workdir, db_path):
+    """
+    Writes a config.toml for the scratch directory that points at db_path.
+    """
+    config = toml.load(os.path.join(ROOT, "config.toml"))
+    config.setdefault("database", {})["path"] = db_path
+    config.setdefault("logging", {})["log_file"] = os.path.join(workdir, "bench.log")
+    config.setdefault("status", {})["path"] = os.path.join(workdir, "bench.status")
+    config.setdefault("daemon", {})["socket"] = os.path.join(workdir, "bench.sock")
+    config.setdefault("retention", {})["archive_dir"] = os.path.join(workdir, "archive")
+    config["database"]["pending_path"] = os.path.join(workdir, "pending.jsonl")
+    config.setdefault("notifications", {})["backend"] = "none"
+    with open(os.path.join(workdir, "config.toml"), "w", encoding="utf-8") as stream:
+        toml.dump(config, stream)
+
+
+def prepare_database(data_dir, rows):
+    """
+    Returns a database with `rows` tasks, generating it unless data_dir already has one.
+    """
+    path = os.path.join(data_dir, f"tasks-{rows}.db")
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            if conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == rows:
+                return path
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+        os.remove(path)
+    print(f"Generating {rows} rows in '{path}'...", flush=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    populate(conn, rows, todo=min(rows // 100, 1000))
+    conn.close()
+    return path
+
+
+def render_benchmarks(runs):
+    from renderer import Renderer
+    from timer import Timer
+
+    timer = Timer("Benchmark", 1500)
+    times = [f"00:{minutes:02d}:{seconds:02d}" for minutes in range(24, -1, -1) for seconds in range(59, -1, -1)]
+    renderer = Renderer(stream=io.StringIO())
+    frames = iter(())
+
+    def next_frame():
+        nonlocal frames
+        time_str = next(frames, None)
+        if time_str is None:
+            frames = iter(times)
+            time_str = next(frames)
+        renderer.draw(time_str, False, "Benchmark")
+
+    sweep = iter(())
+
+    def next_large_time():
+        # 1500 distinct strings, more than the frame cache holds: every call renders.
+        nonlocal sweep
+        time_str = next(sweep, None)
+        if time_str is None:
+            sweep = iter(times)
+            time_str = next(sweep)
+        timer.render_large_time(time_str)
+
+    def full_frame():
+        renderer.invalidate()
+        renderer.draw("00:25:00", False, "Benchmark")
+
+    rows = [f"  TASK {index:<10}   00:{index:02d}:00  running" for index in range(10)]
+
+    def list_frame():
+        rows[2] = rows[2][:-1] + ("g" if rows[2][-1] != "g" else "x")
+        renderer.draw_list(rows)
+
+    results = {
+        "render.render_large_time": measure(lambda: timer.render_large_time("00:25:00"), runs, number=1000),
+        "render.render_large_time_sweep": measure(next_large_time, runs, number=1000),
+        "render.draw_tick": measure(next_frame, runs, number=1000),
+        "render.draw_full": measure(full_frame, runs, number=1000),
+    }
+    renderer.stream = io.StringIO()
+    renderer.invalidate()
+    results["render.draw_list"] = measure(list_frame, runs, number=1000)
+    renderer.close()
+    return results
+
+
+def storage_benchmarks(runs, rows):
+    import db
+    from tabulate import tabulate
+    from main import HISTORY_HEADERS, history_row
+    from writer import WriteQueue
+
+    def render_plain():
+        for task in db.iter_task_history():
+            "\t".join(str(value) for value in history_row(task))
+
+    def render_table():
+        tabulate([history_row(task) for task in db.iter_task_history(limit=1000)],
+                 headers=HISTORY_HEADERS, tablefmt="fancy_grid")
+
+    macro_runs = max(runs // 3, 1) if rows >= 1_000_000 else runs
+    results = {
+        "history.fetch_all": measure(db.fetch_task_history, macro_runs),
+        "history.render_plain": measure(render_plain, macro_runs),
+        "history.render_table_1000": measure(render_table, runs),
+        "history.page_50": measure(lambda: list(db.iter_task_history(limit=50, newest_first=True)), runs, number=20),
+        "history.filtered": measure(
+            lambda: list(db.iter_task_history(status="Finished", task_name="Review PR", limit=500)), runs
+        ),
+        "history.load_batch": measure(db.fetch_history_batch, macro_runs),
+        "history.count_filtered": measure(
+            lambda: db.count_task_history(status="Finished", task_name="Review PR"), runs
+        ),
+        "stats.month": measure(lambda: db.fetch_stats(group_by="month"), runs),
+        "stats.task": measure(lambda: db.fetch_stats(group_by="task"), runs),
+        "search.prefix": measure(lambda: db.search_tasks("rev*"), runs, number=10),
+        "todo.fetch": measure(db.fetch_todo_list, runs, number=10),
+    }
+
+    batch = db.fetch_history_batch()
+    results["batch.totals"] = measure(batch.totals, runs)
+    results["batch.duration_histogram"] = measure(batch.duration_histogram, runs)
+    results["batch.streaks"] = measure(batch.streaks, runs)
+    del batch
+
+    now = datetime.now()
+    first_id = db.connect_db().execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0] + 1
+    results["db.log_task"] = measure(
+        lambda: db.log_task("Benchmark", now, 25, now, 25, True), runs, number=50
+    )
+    # One group-committed batch of 50 sessions, against 50 log_task() calls above.
+    results["db.log_tasks_50"] = measure(
+        lambda: db.log_tasks([("Benchmark", now, 25, now, 25, True)] * 50), runs
+    )
+
+    def queued_writes():
+        with WriteQueue() as writes:
+            for _ in range(50):
+                writes.submit(db.log_task, "Benchmark", now, 25, now, 25, True)
+
+    # 50 log_task() calls through the single-writer queue, group-committed.
+    results["db.write_queue_50"] = measure(queued_writes, runs)
+    ids = iter(range(first_id, first_id + runs * 50))
+    results["db.delete_task_by_id"] = measure(lambda: db.delete_task_by_id(next(ids)), runs, number=50)
+    return results
+
+
+def cli_benchmarks(runs, workdir):
+    results = {}
+    for name, args in CLI_COMMANDS.items():
+        command = [sys.executable, os.path.join(ROOT, "main.py"), *args]
+
+        def run():
+            # --status exits with 1 when no timer is running.
+            subprocess.run(command, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        run()  # Warm the page cache and __pycache__
+        results[f"cli.{name}"] = measure(run, runs)
+    return results
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def print_results(results, baseline=None):
+    previous = {(entry["name"], entry["rows"]): entry for entry in baseline or []}
+    for entry in results:
+        label = entry["name"] + (f" [{entry['rows']}]" if entry["rows"] is not None else "")
+        line = f"{label:<40} {entry['median_s'] * 1000:10.3f} ms"
+        before = previous.get((entry["name"], entry["rows"]))
+        if before is not None and before["median_s"]:
+            ratio = entry["median_s"] / before["median_s"]
+            line += f"   x{ratio:5.2f} vs baseline" + ("  SLOWER" if ratio > 1.1 else "")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the TaskStrike benchmark suite.")
+    parser.add_argument("--sizes", default="10k,100k",
+                        help="Comma-separated task table sizes (default: 10k,100k; e.g. 10k,100k,1M).")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per benchmark.")
+    parser.add_argument("--only", choices=["render", "storage", "cli"], action="append",
+                        help="Run only this group (may be repeated).")
+    parser.add_argument("--data-dir", help="Keep generated databases here and reuse them on later runs.")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to a JSON file.")
+    parser.add_argument("--compare", metavar="FILE", help="Compare against results saved with --json.")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size.strip()) for size in args.sizes.split(",") if size.strip()]
+    groups = set(args.only or ["render", "storage", "cli"])
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as stream:
+            baseline = json.load(stream)["results"]
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="taskstrike-bench-")
+    data_dir = os.path.abspath(args.data_dir) if args.data_dir else workdir
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    try:
+        # config.py reads config.toml from the working directory at import time.
+        write_config(workdir, os.path.join(workdir, "unused.db"))
+        os.chdir(workdir)
+        sys.path.insert(0, ROOT)
+
+        if "render" in groups:
+            for name, stats in render_benchmarks(args.runs).items():
+                results.append(dict(name=name, rows=None, **stats))
+        for rows in sizes:
+            db_path = prepare_database(data_dir, rows)
+            write_config(workdir, db_path)
+            if "storage" in groups:
+                import db
+
+                db.close_db()
+                db.DB_PATH = db_path
+                for name, stats in storage_benchmarks(args.runs, rows).items():
+                    results.append(dict(name=name, rows=rows, **stats))
+                db.close_db()
+            if "cli" in groups:
+                for name, stats in cli_benchmarks(args.runs, workdir).items():
+                    results.append(dict(name=name, rows=rows, **stats))
+    finally:
+        os.chdir(ROOT)  # Leave the scratch directory before removing it
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results, baseline)
+    if json_path:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "sizes": sizes,
+                "runs": args.runs,
+            },
+            "results": results,
+        }
+        with open(json_path, "w", encoding="utf-8") as stream:
+            json.dump(report, stream, indent=2)
+        print(f"Results written to '{json_path}'.")
+
+
+if __name__ == "__main__":
+    main()
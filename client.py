@@ -0,0 +1,40 @@
+# client.py
+
+import json
+import socket
+
+from config import DAEMON_SOCKET, DAEMON_TIMEOUT
+
+# The daemon listens on a Unix domain socket; where Python has none (Windows),
+# there is never a daemon and every command runs in its own process.
+DAEMON_SUPPORTED = hasattr(socket, "AF_UNIX")
+
+
+class DaemonError(Exception):
+    """
+    Raised when the daemon answers a request with an error.
+    """
+
+
+def daemon_request(command, args=None, path=DAEMON_SOCKET, timeout=DAEMON_TIMEOUT):
+    """
+    Sends one request to the daemon and returns its result.
+
+    Raises FileNotFoundError or ConnectionRefusedError when no daemon is
+    listening (or the platform cannot run one), so callers can fall back to
+    running the command directly.
+    """
+    if not DAEMON_SUPPORTED:
+        raise FileNotFoundError("Unix domain sockets are not available on this platform")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps({"command": command, "args": args or {}}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("The daemon closed the connection without answering")
+    response = json.loads(line)
+    if not response["ok"]:
+        raise DaemonError(response["error"])
+    return response["result"]
@@ -17,10 +17,17 @@ config = load_config()
 
 # Access settings with defaults
 DB_PATH = config.get("database", {}).get("path", "task_manager.db")
+DB_BUSY_TIMEOUT = config.get("database", {}).get("busy_timeout", 5000)
+DB_MMAP_SIZE = config.get("database", {}).get("mmap_size", 67108864)
+DB_WRITE_RETRY_TIMEOUT = config.get("database", {}).get("write_retry_timeout", 30)
+PENDING_FILE = config.get("database", {}).get("pending_path", "data/pending_sessions.jsonl")
 DEFAULT_DURATION = config.get("settings", {}).get("default_duration", 25)
 UPDATE_INTERVAL = config.get("timer", {}).get("update_interval", 1)
+CHECKPOINT_INTERVAL = config.get("timer", {}).get("checkpoint_interval", 30)
 AUTO_START_BREAKS = config.get("timer", {}).get("auto_start_breaks", False)
+BREAK_DURATION = config.get("timer", {}).get("break_duration", 5)
 CLEAR_SCREEN = config.get("display", {}).get("clear_screen", True)
+HEADLESS_INTERVAL = config.get("display", {}).get("headless_interval", 60)
 THEME = config.get("display", {}).get("theme", "default")
 FONT = config.get("display", {}).get("font", "standard")
 MAX_WIDTH = config.get("display", {}).get("max_width", 80)
@@ -29,4 +36,15 @@ LOG_FILE = config.get("logging", {}).get("log_file", None)
 NOTIFICATIONS_ENABLED = config.get("notifications", {}).get("enable", True)
 SOUND_ENABLED = config.get("notifications", {}).get("sound", True)
 POPUP_DURATION = config.get("notifications", {}).get("popup_duration", 10)
+NOTIFICATION_BACKEND = config.get("notifications", {}).get("backend", "desktop")
+NOTIFICATION_TIMEOUT = config.get("notifications", {}).get("timeout", 5)
+DAEMON_SOCKET = config.get("daemon", {}).get("socket", "data/taskstrike.sock")
+DAEMON_TIMEOUT = config.get("daemon", {}).get("timeout", 2)
+STATUS_FILE = config.get("status", {}).get("path", "data/taskstrike.status")
+STATUS_FORMAT = config.get("status", {}).get("format", "{name} {remaining}")
+PROFILING_ENABLED = config.get("profiling", {}).get("enable", False)
+PROFILING_MODE = config.get("profiling", {}).get("mode", "histograms")
+PROFILING_OUTPUT = config.get("profiling", {}).get("output", "logs/profile.json")
+ARCHIVE_AFTER_DAYS = config.get("retention", {}).get("archive_after_days", 365)
+ARCHIVE_DIR = config.get("retention", {}).get("archive_dir", "data/archive")
 SINGLE_KEYPRESS = config.get("input", {}).get("single_keypress", True)
\ No newline at end of file
@@ -0,0 +1,205 @@
+# daemon.py
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+from dataclasses import asdict
+
+from client import DAEMON_SUPPORTED
+from config import DAEMON_SOCKET
+from db import add_task_to_todo, fetch_todo_list, initialize_db, recover_sessions
+from engine import TimerEngine
+from timer import Timer
+from notifications import APP_NAME, get_dispatcher
+
+
+class HeadlessEngine(TimerEngine):
+    """
+    TimerEngine without a terminal, used by the daemon.
+
+    Expired timers are announced with a notification and keep counting into
+    overtime until a client stops them; nothing is drawn and no keys are read,
+    so a running timer only wakes the daemon at its deadline and checkpoints.
+    """
+
+    def _attach_terminal(self):
+        pass
+
+    def _detach_terminal(self):
+        pass
+
+    async def prompt(self, timer, text, options):
+        if 'c' in options:
+            get_dispatcher().notify(APP_NAME, f"Time is up for '{timer.task_name}'.")
+            return 'c'
+        # Stopped timers normally carry the client's answer; anything else was not finished.
+        return 'n'
+
+    async def record(self, timer):
+        await super().record(timer)
+        self.timers.remove(timer)
+
+
+class Daemon:
+    """
+    Serves TaskStrike commands over a Unix domain socket.
+
+    The daemon keeps the configuration, a warm database connection and any
+    running timers in one long-lived process, so clients only pay for a
+    socket round trip. The protocol is newline-delimited JSON: each request
+    is {"command": ..., "args": {...}} and each response is either
+    {"ok": true, "result": ...} or {"ok": false, "error": ...}.
+    """
+
+    def __init__(self, path=DAEMON_SOCKET):
+        self.path = path
+        self.engine = HeadlessEngine([])
+        self._tasks = {}  # Timer -> asyncio task running it
+        self._stopped = None
+        self._clients = set()  # Handler tasks of open client connections
+        self.commands = {
+            "ping": self.ping,
+            "add-task": self.add_task,
+            "show-todo": self.show_todo,
+            "status": self.status,
+            "start": self.start,
+            "stop": self.stop,
+            "shutdown": self.shutdown,
+        }
+
+    def run(self):
+        """
+        Serves requests until a shutdown command, SIGINT or SIGTERM arrives.
+        """
+        if not DAEMON_SUPPORTED:
+            raise RuntimeError("The daemon needs Unix domain sockets, which this platform does not provide; "
+                               "run timers in a terminal instead.")
+        initialize_db()
+        for task_name, minutes in recover_sessions():
+            logging.info(f"Recovered interrupted session '{task_name}' ({minutes:.2f} min) as 'Not Finished'.")
+        self._claim_socket()
+        try:
+            asyncio.run(self._main())
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _claim_socket(self):
+        # A socket file left by a crashed daemon is removed; a live one is not.
+        if not os.path.exists(self.path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(self.path)
+                return
+        raise RuntimeError(f"A daemon is already listening on '{self.path}'")
+
+    async def _main(self):
+        await self.engine.setup()
+        self._stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stopped.set)
+        # The socket is created owner-only: with chmod() after bind() another
+        # local user could connect in between.
+        umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self._serve, path=self.path)
+        finally:
+            os.umask(umask)
+        logging.info(f"Daemon listening on '{self.path}'.")
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            for client in self._clients:
+                client.cancel()
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await server.wait_closed()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signum)
+            # Running timers are logged as not finished rather than left for recovery.
+            await self._stop_timers(list(self._tasks), finished=False)
+            await self.engine.teardown()
+            logging.info("Daemon stopped.")
+
+    async def _serve(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(json.dumps(await self._dispatch(line)).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            self._clients.discard(task)
+
+    async def _dispatch(self, line):
+        try:
+            request = json.loads(line)
+            handler = self.commands.get(request.get("command"))
+            if handler is None:
+                raise ValueError(f"Unknown command: '{request.get('command')}'")
+            return {"ok": True, "result": await handler(**request.get("args", {}))}
+        except Exception as e:
+            logging.error(f"Daemon request failed: {e}")
+            return {"ok": False, "error": str(e)}
+
+    async def ping(self):
+        return {"pid": os.getpid()}
+
+    async def add_task(self, task_name, duration):
+        await self.engine.run_db(add_task_to_todo, task_name, duration)
+        logging.info(f"Added task '{task_name}' with duration {duration} minutes.")
+
+    async def show_todo(self):
+        todo_list = await self.engine.run_db(fetch_todo_list)
+        return [dict(asdict(todo), added_date=todo.added_date.isoformat()) for todo in todo_list]
+
+    async def status(self):
+        return [
+            {
+                "task_name": timer.task_name,
+                "duration": timer.initial_duration_seconds,
+                "remaining": timer.countdown.remaining_display(),
+                "continuing": timer.continue_task,
+            }
+            for timer in self._tasks
+        ]
+
+    async def start(self, task_name, seconds):
+        if any(timer.task_name == task_name for timer in self._tasks):
+            raise ValueError(f"A timer for '{task_name}' is already running")
+        timer = Timer(task_name, seconds)
+        task = self.engine.start_timer(timer)
+        self._tasks[timer] = task
+        task.add_done_callback(lambda _: self._tasks.pop(timer, None))
+        return task_name
+
+    async def stop(self, task_name=None, finished=False):
+        timers = [timer for timer in self._tasks if task_name is None or timer.task_name == task_name]
+        if not timers:
+            raise ValueError(f"No running timer for '{task_name}'" if task_name else "No timers are running")
+        await self._stop_timers(timers, finished)
+        return [timer.task_name for timer in timers]
+
+    async def _stop_timers(self, timers, finished):
+        tasks = [self._tasks[timer] for timer in timers]
+        for timer in timers:
+            timer.user_decision = finished
+            timer.interrupt()
+        # Reply only once the sessions have been written.
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def shutdown(self):
+        self._stopped.set()
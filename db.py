@@ -1,104 +1,900 @@
 # db.py
 
+import atexit
+import collections
+import contextlib
+import functools
+import itertools
+import json
+import os
+import random
+import socket
 import sqlite3
+import time
 import sys
 import logging
+import threading
 from datetime import datetime
-from models import Task, Todo
+from models import Task, Todo, StatsRow, SearchResult
+from history_batch import HistoryBatch
+from archive import SUFFIX, Segment, merge_rows, write_segment
+from migrations import migrate
+from timer_state import boot_time, process_alive, process_start_time
+from instrumentation import connection_factory, observe, timed
 from queries import (
-    CREATE_TASKS_TABLE,
     INSERT_TASK,
     SELECT_TASK_HISTORY,
-    CREATE_TODO_TABLE,
+    SELECT_TASK_HISTORY_PAGE,
+    COUNT_TASK_HISTORY,
     INSERT_TODO_TASK,
     SELECT_TODO_LIST,
     DELETE_TODO_TASK,
     DELETE_TASK,               # Import the new DELETE_TASK query
+    SELECT_STATS,
+    SELECT_STATS_BY_TASK,
+    STATS_PERIODS,
+    INSERT_ACTIVE_SESSION,
+    CHECKPOINT_ACTIVE_SESSION,
+    DELETE_ACTIVE_SESSION,
+    DELETE_RECOVERED_TASK,
+    SELECT_ACTIVE_SESSIONS,
+    SEARCH_NAMES,
+    INSERT_TASK_NAME,
+    SELECT_TASK_NAME_ID,
+    SELECT_ARCHIVE_SEGMENTS,
+    INSERT_ARCHIVE_SEGMENT,
+    SELECT_MAX_TASK_ID,
+    SELECT_TASKS_TO_ARCHIVE,
+    CREATE_ARCHIVED_TOTALS,
+    DELETE_ARCHIVED_TASKS,
+    RESTORE_ARCHIVED_TOTALS,
 )
-from config import DB_PATH
+from config import (
+    DB_PATH,
+    DB_BUSY_TIMEOUT,
+    DB_MMAP_SIZE,
+    DB_WRITE_RETRY_TIMEOUT,
+    PENDING_FILE,
+    CHECKPOINT_INTERVAL,
+    ARCHIVE_DIR,
+)
+
+# One connection per thread, opened on first use and reused for the rest of
+# the process. sqlite3 keeps a per-connection cache of prepared statements,
+# so repeated queries skip re-parsing their SQL.
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+# Distinct task names kept in the name -> task_names id cache. The cache is
+# shared by every thread and only holds committed ids (see name_id).
+NAME_CACHE_SIZE = 1024
+_name_ids = collections.OrderedDict()  # Least recently used first
+_name_ids_lock = threading.Lock()
+
+# Archive segments opened by this process, by file name.
+_segments = {}
+
+# Seconds a process start time may appear to follow the start of its own
+# session; both clocks are read with about a second of precision.
+PID_START_SLACK = 2
+
+# Backoff between attempts of a write that found the database locked; the
+# delay doubles up to the maximum, with jitter so that waiting processes
+# do not all retry at once.
+RETRY_INITIAL_DELAY = 0.01
+RETRY_MAX_DELAY = 1.0
+
+
+def _configure(conn):
+    # auto_vacuum only takes effect on a new, empty file, so it goes before
+    # the journal mode (which writes the header). Older databases are switched
+    # by the first archive run; see _reclaim_space(). Setting it takes the
+    # write lock, so connections to existing files skip it and never wait
+    # for another process's writes.
+    if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT)}")
+
 
 def connect_db():
+    """
+    Returns this thread's database connection, opening it on first use.
+    Use transaction() to group writes; the connection itself stays open
+    until close_db().
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
     try:
-        return sqlite3.connect(DB_PATH)
+        # check_same_thread is off so close_db() can close every thread's
+        # connection at exit; each connection is otherwise used by one thread.
+        conn = sqlite3.connect(
+            DB_PATH, timeout=DB_BUSY_TIMEOUT / 1000, check_same_thread=False, factory=connection_factory()
+        )
+        _configure(conn)
     except sqlite3.Error as e:
         logging.error(f"Error connecting to database: {e}")
         print(f"Error connecting to database: {e}")
         sys.exit(1)
+    with _connections_lock:
+        _connections.append(conn)
+    _local.conn = conn
+    return conn
+
+
+def close_db():
+    """
+    Closes every connection opened by this process.
+    """
+    global _local
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.error(f"Error closing database connection: {e}")
+        _connections.clear()
+        _local = threading.local()
+        for segment in _segments.values():
+            segment.close()
+        _segments.clear()
+    with _name_ids_lock:
+        _name_ids.clear()
+
+
+atexit.register(close_db)
 
+
+def close_thread_db():
+    """
+    Closes the calling thread's connection; for threads that end before the process does.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    with _connections_lock:
+        if conn in _connections:
+            _connections.remove(conn)
+    _local.conn = None
+    conn.close()
+
+@timed
 def initialize_db():
-    with connect_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(CREATE_TASKS_TABLE)
-        cursor.execute(CREATE_TODO_TABLE)
+    migrate(connect_db())
+
+
+def to_epoch(moment):
+    """
+    Converts a local datetime to the integer epoch seconds stored in the database.
+    """
+    return int(moment.timestamp())
+
+
+def from_epoch(seconds):
+    """
+    Converts stored epoch seconds back to a local datetime (None stays None).
+    """
+    return datetime.fromtimestamp(seconds) if seconds is not None else None
+
+
+@contextlib.contextmanager
+def transaction():
+    """
+    Groups writes into one transaction on this thread's connection.
+
+    The write lock is taken when the block starts (BEGIN IMMEDIATE), so a
+    block that reads before it writes cannot fail halfway on a lock held
+    by another process. The write functions below join an open block
+    instead of committing on their own, and so do nested blocks: the
+    outermost block commits when it exits and rolls everything back if
+    it raises.
+    """
+    conn = connect_db()
+    depth = getattr(_local, "depth", 0)
+    if depth:
+        _local.depth = depth + 1
+        try:
+            yield conn
+        finally:
+            _local.depth = depth
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    _local.depth = 1
+    # Names looked up or added in this transaction (see name_id).
+    _local.names = {}
+    try:
+        yield conn
         conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        _cache_name_ids(_local.names)
+    finally:
+        _local.depth = 0
+        _local.names = None
+
+
+def in_transaction():
+    """
+    Returns True while this thread is inside a transaction() block.
+    """
+    return bool(getattr(_local, "depth", 0))
 
-def log_task(task_name, start_time, initial_duration, end_time, actual_duration, completed):
-    with connect_db() as conn:
+
+def is_busy(error):
+    """
+    Returns True for the errors SQLite raises when another connection holds the lock.
+    """
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        # Extended codes such as SQLITE_BUSY_SNAPSHOT keep the primary code in the low byte.
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+
+
+def retry_busy(func):
+    """
+    Decorator retrying a write that failed because another process held the
+    lock for longer than busy_timeout. Attempts back off exponentially for
+    up to DB_WRITE_RETRY_TIMEOUT seconds before the error is raised. Inside
+    a transaction() block the call runs once: the failed transaction has to
+    be retried as a whole by whoever opened it.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if in_transaction():
+            return func(*args, **kwargs)
+        deadline = time.monotonic() + DB_WRITE_RETRY_TIMEOUT
+        delay = RETRY_INITIAL_DELAY
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or time.monotonic() + delay > deadline:
+                    raise
+                pause = random.uniform(delay / 2, delay)
+                logging.warning(f"{func.__name__}: database is locked (attempt {attempt}); "
+                                f"retrying in {pause * 1000:.0f} ms.")
+                time.sleep(pause)
+                observe("db.busy_retry", pause)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+                attempt += 1
+
+    return wrapper
+
+
+def _cache_name_ids(names):
+    # Adds committed ids to the shared LRU cache, evicting the least recently used when full.
+    with _name_ids_lock:
+        for task_name, task_name_id in names.items():
+            _name_ids[task_name] = task_name_id
+            _name_ids.move_to_end(task_name)
+        while len(_name_ids) > NAME_CACHE_SIZE:
+            _name_ids.popitem(last=False)
+
+
+def _cached_name_id(task_name):
+    # Returns a cached id and marks it as recently used, or None.
+    with _name_ids_lock:
+        cached = _name_ids.get(task_name)
+        if cached is not None:
+            _name_ids.move_to_end(task_name)
+        return cached
+
+
+def name_id(task_name):
+    """
+    Returns the task_names id of a name, adding the name on first use.
+
+    Ids are kept in a process-wide LRU cache of NAME_CACHE_SIZE names.
+    A new name is committed in its own short transaction, or with the
+    enclosing transaction when called inside one. Ids found inside a
+    transaction are kept by this thread and only enter the shared cache
+    once the transaction commits, so other threads never read an id that
+    could still be rolled back.
+    """
+    if task_name is None:
+        return None
+    cached = _cached_name_id(task_name)
+    if cached is not None:
+        return cached
+    pending = getattr(_local, "names", None)
+    if pending and task_name in pending:
+        return pending[task_name]
+    conn = connect_db()
+    row = conn.execute(SELECT_TASK_NAME_ID, (task_name,)).fetchone()
+    if row is None:
+        with transaction():
+            conn.execute(INSERT_TASK_NAME, (task_name,))
+        row = conn.execute(SELECT_TASK_NAME_ID, (task_name,)).fetchone()
+    if in_transaction():
+        _local.names[task_name] = row[0]
+    else:
+        _cache_name_ids({task_name: row[0]})
+    return row[0]
+
+
+@timed
+@retry_busy
+def log_task(task_name, start_time, initial_duration, end_time, actual_duration, completed, session_id=None,
+             todo_id=None):
+    """
+    Logs a finished session. If session_id is given, the session's checkpoint
+    row is removed in the same transaction, as is the to-do entry todo_id
+    when the task was completed. When the checkpoint row is already gone,
+    another process recovered the session as 'Not Finished' while its timer
+    was suspended; this result replaces the recovered row.
+    """
+    task_name_id = name_id(task_name)
+    with transaction() as conn:
         cursor = conn.cursor()
         status = "Finished" if completed else "Not Finished"
+        if session_id is not None and not cursor.execute(DELETE_ACTIVE_SESSION, (session_id,)).rowcount:
+            cursor.execute(DELETE_RECOVERED_TASK, (task_name_id, to_epoch(start_time)))
         cursor.execute(
             INSERT_TASK,
             (
-                task_name,
-                start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                end_time.strftime("%Y-%m-%d %H:%M:%S"),
+                task_name_id,
+                to_epoch(start_time),
+                to_epoch(end_time),
                 initial_duration,
                 actual_duration,
                 status,
             ),
         )
-        conn.commit()
+        if todo_id is not None and completed:
+            cursor.execute(DELETE_TODO_TASK, (todo_id,))
 
+
+@timed
+@retry_busy
+def log_tasks(sessions):
+    """
+    Logs many finished sessions in one transaction. `sessions` is an
+    iterable of (task_name, start_time, initial_duration, end_time,
+    actual_duration, completed) tuples, the arguments of log_task().
+    Returns the number of sessions logged.
+    """
+    with transaction() as conn:
+        return conn.executemany(
+            INSERT_TASK,
+            [
+                (name_id(task_name), to_epoch(start_time), to_epoch(end_time), initial_duration, actual_duration,
+                 "Finished" if completed else "Not Finished")
+                for task_name, start_time, initial_duration, end_time, actual_duration, completed in sessions
+            ],
+        ).rowcount
+
+@timed
+@retry_busy
 def add_task_to_todo(task_name, duration):
-    with connect_db() as conn:
+    task_name_id = name_id(task_name)
+    with transaction() as conn:
         cursor = conn.cursor()
-        added_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute(INSERT_TODO_TASK, (task_name, duration, added_date))
-        conn.commit()
+        added_date = to_epoch(datetime.now())
+        cursor.execute(INSERT_TODO_TASK, (task_name_id, duration, added_date))
 
+@timed
+@retry_busy
+def add_tasks_to_todo(items):
+    """
+    Adds many (task_name, duration) entries to the to-do list in one
+    transaction; returns the number of entries added.
+    """
+    added_date = to_epoch(datetime.now())
+    with transaction() as conn:
+        return conn.executemany(
+            INSERT_TODO_TASK,
+            [(name_id(task_name), duration, added_date) for task_name, duration in items],
+        ).rowcount
+
+@timed
 def fetch_todo_list():
-    with connect_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(SELECT_TODO_LIST)
-        rows = cursor.fetchall()
-        todo_list = [
-            Todo(
-                task_name=row[0],
-                duration=row[1],
-                added_date=datetime.strptime(row[2], "%Y-%m-%d %H:%M:%S")
-            )
-            for row in rows
-        ]
-        return todo_list
+    cursor = connect_db().cursor()
+    cursor.execute(SELECT_TODO_LIST)
+    rows = cursor.fetchall()
+    todo_list = [
+        Todo(
+            id=row[0],
+            task_name=row[1],
+            duration=row[2],
+            added_date=from_epoch(row[3])
+        )
+        for row in rows
+    ]
+    return todo_list
 
-def delete_todo_task(task_name):
-    with connect_db() as conn:
+@timed
+@retry_busy
+def delete_todo_task(todo_id):
+    with transaction() as conn:
         cursor = conn.cursor()
-        cursor.execute(DELETE_TODO_TASK, (task_name,))
-        conn.commit()
+        cursor.execute(DELETE_TODO_TASK, (todo_id,))
+
+@timed
+@retry_busy
+def delete_todo_tasks(todo_ids):
+    """
+    Deletes many to-do entries in one transaction; returns how many existed.
+    """
+    with transaction() as conn:
+        return conn.executemany(DELETE_TODO_TASK, [(todo_id,) for todo_id in todo_ids]).rowcount
+
+def _row_to_task(row):
+    # Names repeat across sessions; interning keeps one copy of each in memory.
+    return Task.from_epochs(
+        id=row[0],
+        task_name=sys.intern(row[1]) if row[1] is not None else None,
+        start_epoch=row[2],
+        end_epoch=row[3],
+        initial_duration=row[4],
+        actual_duration=row[5],
+        status=row[6],
+    )
+
+
+def archive_segments():
+    """
+    Returns the registered archive segments, oldest first, opening new ones.
+    A registered segment that cannot be read is logged and skipped.
+    """
+    segments = []
+    for (file,) in connect_db().execute(SELECT_ARCHIVE_SEGMENTS):
+        segment = _segments.get(file)
+        if segment is None:
+            try:
+                segment = _segments[file] = Segment(os.path.join(ARCHIVE_DIR, file))
+            except (OSError, ValueError) as e:
+                logging.error(f"Error reading archive segment '{file}': {e}")
+                continue
+        segments.append(segment)
+    return segments
 
+
+def _with_archived(live_rows, since=None, until=None, status=None, task_name=None, newest_first=False):
+    # Merges raw live rows with the matching archived rows in (start_time, id) order.
+    segments = archive_segments()
+    if not segments:
+        return live_rows
+    since = to_epoch(since) if since is not None else None
+    until = to_epoch(until) if until is not None else None
+    archived = [segment.iter_rows(since, until, status, task_name, newest_first) for segment in segments]
+    return merge_rows([*archived, live_rows], newest_first)
+
+
+def iter_archived_rows():
+    """
+    Yields every archived session as a raw row, oldest first.
+    """
+    return merge_rows([segment.iter_rows() for segment in archive_segments()])
+
+
+def archived_keys(since, until):
+    """
+    Returns the (task_name, start_time) pairs archived with start times in
+    [since, until), both epoch seconds.
+    """
+    return {(row[1], row[2]) for segment in archive_segments() for row in segment.iter_rows(since, until)}
+
+
+@timed
 def fetch_task_history():
-    with connect_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(SELECT_TASK_HISTORY)
-        rows = cursor.fetchall()
-        task_history = [
-            Task(
-                id=row[0],  # Include the task ID
-                task_name=row[1],
-                start_time=datetime.strptime(row[2], "%Y-%m-%d %H:%M:%S"),
-                end_time=datetime.strptime(row[3], "%Y-%m-%d %H:%M:%S"),
-                initial_duration=row[4],
-                actual_duration=row[5],
-                status=row[6],
+    cursor = connect_db().cursor()
+    cursor.execute(SELECT_TASK_HISTORY)
+    task_history = [_row_to_task(row) for row in _with_archived(cursor)]
+    return task_history
+
+def _history_filters(since, until, status, task_name):
+    conditions = []
+    params = []
+    if since is not None:
+        conditions.append("start_time >= ?")
+        params.append(to_epoch(since))
+    if until is not None:
+        conditions.append("start_time < ?")
+        params.append(to_epoch(until))
+    if status is not None:
+        conditions.append("status = ?")
+        params.append(status)
+    if task_name is not None:
+        conditions.append("name_id = (SELECT id FROM task_names WHERE name = ?)")
+        params.append(task_name)
+    return conditions, params
+
+def _iter_live_rows(since, until, status, task_name, limit, newest_first, page_size):
+    conditions, params = _history_filters(since, until, status, task_name)
+    direction = "DESC" if newest_first else "ASC"
+    conn = connect_db()
+    remaining = limit
+    last_key = None
+    while remaining is None or remaining > 0:
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if last_key is not None:
+            page_conditions.append(f"(start_time, tasks.id) {'<' if newest_first else '>'} (?, ?)")
+            page_params.extend(last_key)
+        size = page_size if remaining is None else min(page_size, remaining)
+        query = SELECT_TASK_HISTORY_PAGE.format(
+            conditions=" AND ".join(page_conditions) or "1",
+            direction=direction,
+        )
+        rows = conn.execute(query, (*page_params, size)).fetchall()
+        yield from rows
+        if len(rows) < size:
+            return
+        last_key = (rows[-1][2], rows[-1][0])
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def iter_task_history(since=None, until=None, status=None, task_name=None,
+                      limit=None, newest_first=False, page_size=500):
+    """
+    Streams task history matching the filters, one page at a time.
+
+    Filters are applied in SQL: `since` (inclusive) and `until` (exclusive)
+    bound the start time, `status` and `task_name` match exactly. Pages are
+    fetched with keyset pagination on (start_time, id), so memory use does
+    not depend on the size of the history. Archived sessions are merged in
+    by start time.
+    """
+    rows = _with_archived(
+        _iter_live_rows(since, until, status, task_name, limit, newest_first, page_size),
+        since, until, status, task_name, newest_first,
+    )
+    for row in itertools.islice(rows, limit):
+        yield _row_to_task(row)
+
+
+@timed
+def count_task_history(since=None, until=None, status=None, task_name=None):
+    """
+    Returns the number of sessions iter_task_history() would yield for the
+    same filters, without loading them. Live sessions are counted in SQL;
+    archived ones are counted while decoding the matching segment blocks.
+    """
+    conditions, params = _history_filters(since, until, status, task_name)
+    query = COUNT_TASK_HISTORY.format(conditions=" AND ".join(conditions) or "1")
+    count = connect_db().execute(query, params).fetchone()[0]
+    since = to_epoch(since) if since is not None else None
+    until = to_epoch(until) if until is not None else None
+    for segment in archive_segments():
+        count += sum(1 for _ in segment.iter_rows(since, until, status, task_name))
+    return count
+
+
+@timed
+def fetch_history_batch(since=None, until=None, status=None, task_name=None, limit=None, use_numpy=True):
+    """
+    Loads the matching history into a columnar HistoryBatch for analytics.
+    Takes the same filters as iter_task_history (`limit` keeps the oldest
+    sessions); rows go straight from the cursor and the archive into the
+    batch's arrays without creating Task objects.
+    """
+    conditions, params = _history_filters(since, until, status, task_name)
+    query = SELECT_TASK_HISTORY_PAGE.format(conditions=" AND ".join(conditions) or "1", direction="ASC")
+    # A negative LIMIT means no limit in SQLite.
+    rows = connect_db().execute(query, (*params, -1 if limit is None else limit))
+    rows = _with_archived(rows, since, until, status, task_name)
+    return HistoryBatch.from_rows(itertools.islice(rows, limit), use_numpy)
+
+
+@timed
+def fetch_stats(group_by="day", since=None, until=None):
+    """
+    Returns session counts and focus minutes grouped by day, week, month or task.
+    Reads the daily_stats rollup, so the cost depends on the number of days
+    covered rather than the number of sessions.
+    """
+    conditions = []
+    params = []
+    if since is not None:
+        conditions.append("day >= ?")
+        params.append(since.strftime("%Y-%m-%d"))
+    if until is not None:
+        conditions.append("day < ?")
+        params.append(until.strftime("%Y-%m-%d"))
+    if group_by == "task":
+        query = SELECT_STATS_BY_TASK.format(conditions=" AND ".join(conditions) or "1")
+    else:
+        query = SELECT_STATS.format(
+            period=STATS_PERIODS[group_by],
+            conditions=" AND ".join(conditions) or "1",
+        )
+    rows = connect_db().execute(query, params).fetchall()
+    return [StatsRow(period=row[0], sessions=row[1], finished=row[2], focus_minutes=row[3]) for row in rows]
+
+
+def _fts_phrases(query):
+    # Quote every term so punctuation such as "PR-1234" is matched literally.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+@timed
+def search_tasks(query, since=None, until=None, limit=50):
+    """
+    Finds task and to-do names matching an FTS5 query (words, "phrases",
+    prefix* terms, AND/OR/NOT), best matches first, with each name's session
+    totals. A query FTS5 rejects is retried with every term quoted.
+    """
+    conditions = []
+    params = [query]
+    if since is not None:
+        conditions.append("AND daily_stats.day >= ?")
+        params.append(since.strftime("%Y-%m-%d"))
+    if until is not None:
+        conditions.append("AND daily_stats.day < ?")
+        params.append(until.strftime("%Y-%m-%d"))
+    params.append(-1 if limit is None else limit)
+    sql = SEARCH_NAMES.format(conditions=" ".join(conditions))
+    conn = connect_db()
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        params[0] = _fts_phrases(query)
+        rows = conn.execute(sql, params).fetchall()
+    return [
+        SearchResult(task_name=row[0], sessions=row[1], finished=row[2], focus_minutes=row[3],
+                     last_day=row[4], todo=row[5])
+        for row in rows
+    ]
+
+
+@timed
+@retry_busy
+def open_session(task_name, start_time, initial_duration):
+    """
+    Records a session as in progress; returns its id for checkpoint_sessions().
+    """
+    with transaction() as conn:
+        cursor = conn.execute(
+            INSERT_ACTIVE_SESSION,
+            (task_name, to_epoch(start_time), initial_duration, int(time.time()), os.getpid(), socket.gethostname()),
+        )
+        return cursor.lastrowid
+
+
+@timed
+@retry_busy
+def checkpoint_sessions(checkpoints):
+    """
+    Saves the elapsed seconds of running sessions in a single transaction.
+    `checkpoints` is an iterable of (session_id, elapsed_seconds) pairs.
+    Returns the ids whose rows are gone because another process recovered
+    the session; see log_task().
+    """
+    now = int(time.time())
+    missing = []
+    with transaction() as conn:
+        for session_id, elapsed in checkpoints:
+            if not conn.execute(CHECKPOINT_ACTIVE_SESSION, (elapsed, now, session_id)).rowcount:
+                missing.append(session_id)
+    return missing
+
+
+def _orphaned(row, host, stale_before, booted):
+    start_time, checkpoint_time, pid, session_host = row[2], row[5], row[6], row[7]
+    stale = checkpoint_time is None or checkpoint_time < stale_before
+    if session_host != host or pid is None or os.name == 'nt':
+        return stale
+    if booted is not None and checkpoint_time is not None and checkpoint_time < booted:
+        # Checkpointed before the machine restarted; the pid may belong to anything now.
+        return True
+    if not process_alive(pid):
+        return True
+    if stale:
+        # A live process that started after the session did has reused the pid.
+        started = process_start_time(pid)
+        return started is not None and started > start_time + PID_START_SLACK
+    return False
+
+
+@timed
+@retry_busy
+def recover_sessions():
+    """
+    Logs sessions left behind by a crashed or killed timer as 'Not Finished'.
+    Sessions saved by save_pending_task() are logged first, as they ended.
+
+    A session started on this host is orphaned when its process is gone,
+    when its last checkpoint predates the last boot, or when it is stale
+    and its pid now belongs to a process started after the session did.
+    Otherwise the process may just be suspended, and logs the session
+    itself when it resumes. Sessions from other hosts (and all sessions on Windows, where
+    liveness is not checked) are orphaned when they have not been
+    checkpointed for ten checkpoint intervals. The actual duration is the
+    elapsed time at the last checkpoint. Returns the recovered sessions as
+    (task_name, actual_duration_minutes) pairs.
+    """
+    for entry in _log_pending_tasks():
+        logging.warning(f"Logged session '{entry['task_name']}' that was saved while the database was unavailable.")
+    conn = connect_db()
+    rows = conn.execute(SELECT_ACTIVE_SESSIONS).fetchall()
+    if not rows:
+        return []
+    host = socket.gethostname()
+    stale_before = time.time() - 10 * CHECKPOINT_INTERVAL
+    booted = boot_time()
+    orphaned = [row for row in rows if _orphaned(row, host, stale_before, booted)]
+    if not orphaned:
+        return []
+    recovered = []
+    with transaction():
+        for session_id, task_name, start_time, initial_duration, elapsed, checkpoint_time, pid, session_host in orphaned:
+            # The rows were read before the write lock was taken; a process
+            # recovering at the same time may have logged this one already.
+            if not conn.execute(DELETE_ACTIVE_SESSION, (session_id,)).rowcount:
+                continue
+            conn.execute(
+                INSERT_TASK,
+                (name_id(task_name), start_time, start_time + int(elapsed), initial_duration, elapsed / 60, "Not Finished"),
             )
-            for row in rows
-        ]
-        return task_history
+            recovered.append((task_name, elapsed / 60))
+    for task_name, minutes in recovered:
+        logging.warning(f"Recovered interrupted session '{task_name}' ({minutes:.2f} min).")
+    return recovered
+
+
+def save_pending_task(task_name, start_time, initial_duration, end_time, actual_duration, completed,
+                      session_id=None, todo_id=None):
+    """
+    Appends a session that could not be logged, even after retrying, to
+    PENDING_FILE; the next recover_sessions() logs it. Takes the arguments
+    of log_task() and returns the file's path.
+    """
+    entry = {
+        "task_name": task_name,
+        "start_time": to_epoch(start_time),
+        "initial_duration": initial_duration,
+        "end_time": to_epoch(end_time),
+        "actual_duration": actual_duration,
+        "completed": completed,
+        "session_id": session_id,
+        "todo_id": todo_id,
+    }
+    os.makedirs(os.path.dirname(PENDING_FILE) or ".", exist_ok=True)
+    with open(PENDING_FILE, "a", encoding="utf-8") as stream:
+        stream.write(json.dumps(entry) + "\n")
+        stream.flush()
+        os.fsync(stream.fileno())
+    return PENDING_FILE
+
+
+def _log_pending_tasks():
+    # The file is renamed before it is read, so two processes starting at
+    # the same time cannot both log its sessions.
+    claimed = f"{PENDING_FILE}.{os.getpid()}"
+    try:
+        os.replace(PENDING_FILE, claimed)
+    except FileNotFoundError:
+        return []
+    entries = []
+    with open(claimed, encoding="utf-8") as stream:
+        for line in stream:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A process killed mid-write leaves a partial last line.
+                logging.error(f"Skipping unreadable pending session in '{PENDING_FILE}': {line.strip()}")
+    try:
+        with transaction():
+            for entry in entries:
+                log_task(
+                    entry["task_name"],
+                    from_epoch(entry["start_time"]),
+                    entry["initial_duration"],
+                    from_epoch(entry["end_time"]),
+                    entry["actual_duration"],
+                    entry["completed"],
+                    session_id=entry["session_id"],
+                    todo_id=entry["todo_id"],
+                )
+    except sqlite3.Error as e:
+        # Hand the sessions back for a later attempt.
+        with open(PENDING_FILE, "a", encoding="utf-8") as stream:
+            stream.writelines(json.dumps(entry) + "\n" for entry in entries)
+        os.remove(claimed)
+        if is_busy(e):
+            raise
+        logging.error(f"Could not log the sessions in '{PENDING_FILE}': {e}")
+        return []
+    os.remove(claimed)
+    return entries
+
 
 # New function to delete a task by ID
+@timed
+@retry_busy
 def delete_task_by_id(task_id):
-    with connect_db() as conn:
+    with transaction() as conn:
         cursor = conn.cursor()
         cursor.execute(DELETE_TASK, (task_id,))
-        conn.commit()
\ No newline at end of file
+
+
+@timed
+@retry_busy
+def delete_tasks_by_id(task_ids):
+    """
+    Deletes many sessions from the history in one transaction; returns how
+    many existed. Archived sessions are read-only and are not affected.
+    """
+    with transaction() as conn:
+        return conn.executemany(DELETE_TASK, [(task_id,) for task_id in task_ids]).rowcount
+
+
+@timed
+@retry_busy
+def archive_tasks(before):
+    """
+    Moves sessions started before `before` into a new archive segment.
+
+    The rows are written to the segment file first; registering the segment
+    and deleting the rows then happen in one transaction, with the sessions'
+    totals added back to daily_stats and task_names so stats and search
+    still count them. The session with the highest id always stays live:
+    SQLite numbers new rows after the largest id in the table, and archived
+    ids must not be handed out again. Returns (rows archived, segment path).
+    It commits and vacuums on its own, so it cannot run inside transaction().
+    A busy lock removes the segment and starts over (see retry_busy).
+    """
+    if in_transaction():
+        raise RuntimeError("Sessions cannot be archived inside a transaction.")
+    conn = connect_db()
+    cutoff = to_epoch(before)
+    max_id = conn.execute(SELECT_MAX_TASK_ID).fetchone()[0]
+    if max_id is None:
+        return 0, None
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    stem = os.path.join(ARCHIVE_DIR, f"tasks-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    path = stem + SUFFIX
+    # A second run in the same second must not replace a registered segment.
+    for number in itertools.count(2):
+        if not os.path.exists(path):
+            break
+        path = f"{stem}-{number}{SUFFIX}"
+    segment = write_segment(path, conn.execute(SELECT_TASKS_TO_ARCHIVE, (cutoff, max_id)))
+    if segment is None:
+        return 0, None
+    try:
+        with transaction():
+            conn.execute(CREATE_ARCHIVED_TOTALS, (cutoff, max_id))
+            deleted = conn.execute(DELETE_ARCHIVED_TASKS, (cutoff, max_id)).rowcount
+            for statement in RESTORE_ARCHIVED_TOTALS:
+                conn.execute(statement)
+            conn.execute(
+                INSERT_ARCHIVE_SEGMENT,
+                (os.path.basename(path), segment["rows"], segment["first_start"], segment["last_start"],
+                 int(time.time())),
+            )
+    except BaseException:
+        # The rows are still live; a leftover segment would count them twice.
+        os.remove(path)
+        raise
+    if deleted != segment["rows"]:
+        logging.warning(f"Archived {segment['rows']} sessions but deleted {deleted}; "
+                        f"some were deleted while the archive was written.")
+    logging.info(f"Archived {segment['rows']} sessions into '{path}' ({segment['size']} bytes).")
+    _reclaim_space(conn)
+    return segment["rows"], path
+
+
+def _reclaim_space(conn):
+    # Returns free pages to the file system and truncates the WAL.
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Databases created before incremental auto-vacuum switch over with a one-time VACUUM.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            # Each step of the pragma frees one page and execute() only steps once;
+            # executescript() steps it until the free list is empty.
+            conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    except sqlite3.OperationalError as e:
+        logging.warning(f"Could not reclaim free database pages: {e}")
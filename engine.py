@@ -0,0 +1,301 @@
+# engine.py
+
+import asyncio
+import logging
+import os
+import signal
+from collections import deque
+
+from config import CHECKPOINT_INTERVAL, STATUS_FILE
+from db import checkpoint_sessions, open_session
+from input_handler import InputDispatcher
+from renderer import BOLD, RESET, format_clock
+from scheduler import COALESCE_WINDOW
+from timer import display_interval, new_renderer
+from timer_state import TimerState
+import instrumentation
+from utils import send_notification
+from writer import WriteQueue
+from notifications import get_dispatcher
+
+
+class TimerEngine:
+    """
+    Runs many Timers concurrently as coroutines in a single asyncio event loop.
+
+    All timers share one renderer, one input dispatcher and one database
+    writer thread, which commits the writes queued by all timers together.
+    Prompts for expired timers are shown one at a time while
+    the other timers keep counting; Ctrl+C stops every timer and asks for
+    each one whether the task was finished.
+
+    Timers do not tick on their own: each one sleeps until its deadline and
+    a single display loop redraws the screen when any displayed time
+    changes, so the process wakes up once per visible change however many
+    timers run. The status file is rewritten when something happens (a
+    timer starts, expires or ends) and at checkpoints, not every tick.
+    """
+
+    def __init__(self, timers, prompt_timeout=30):
+        self.timers = list(timers)
+        self.prompt_timeout = prompt_timeout
+        self.renderer = None  # Created when the terminal is attached
+        self.input = InputDispatcher()
+        self._writer = WriteQueue()
+        self._loop = None
+        self._prompt_lock = None
+        self._prompt = None  # (text, options, future) of the prompt awaiting an answer
+        self._redraw_pending = False
+        self._display_wake = None  # Set when the display loop must recompute its next wakeup
+        self._timers_started = None  # Set when a timer is added; the checkpoint loop idles without one
+        self._messages = deque(maxlen=5)
+        self._background = []
+        self.state = TimerState(STATUS_FILE)
+
+    def run(self):
+        """
+        Runs all timers to completion.
+        """
+        asyncio.run(self._main())
+
+    async def _main(self):
+        await self.setup()
+        try:
+            await asyncio.gather(*(timer.run_async(self) for timer in self.timers))
+        finally:
+            await self.teardown()
+
+    async def setup(self):
+        """
+        Binds the engine to the running event loop and starts its background work.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._prompt_lock = asyncio.Lock()
+        self._timers_started = asyncio.Event()
+        if self.timers:
+            self._timers_started.set()
+        get_dispatcher()  # Pick the notification backend before the timers start
+        self._background.append(asyncio.ensure_future(self._checkpoint_loop()))
+        self.state.open()
+        self._attach_terminal()
+
+    async def teardown(self):
+        """
+        Stops background work and waits for pending database writes.
+        """
+        for task in self._background:
+            task.cancel()
+        self._detach_terminal()
+        self.state.close()
+        self._writer.close()
+
+    def start_timer(self, timer):
+        """
+        Adds a timer to a running engine; returns the task running it.
+        """
+        self.timers.append(timer)
+        self._timers_started.set()
+        return asyncio.ensure_future(timer.run_async(self))
+
+    def _attach_terminal(self):
+        self.renderer = new_renderer()
+        interval = display_interval(self.renderer)
+        for timer in self.timers:
+            timer.countdown.interval = interval
+        self._display_wake = asyncio.Event()
+        self._background.append(asyncio.ensure_future(self._display_loop()))
+        self.input.open()
+        if not self.input.attach(self._loop, self._on_key):
+            self._background.append(asyncio.ensure_future(self._poll_keys()))
+        try:
+            self._loop.add_signal_handler(signal.SIGINT, self.interrupt)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    def _detach_terminal(self):
+        try:
+            self._loop.remove_signal_handler(signal.SIGINT)
+        except (NotImplementedError, RuntimeError):
+            pass
+        self.input.detach(self._loop)
+        self.input.close()
+        self._draw()
+        self.renderer.close()
+
+    async def _poll_keys(self):
+        # Fallback for event loops that cannot watch stdin (Windows consoles).
+        if os.name != 'nt':
+            return
+        while True:
+            key = self.input.read_key(0)
+            if key is not None:
+                self._on_key(key)
+            await asyncio.sleep(0.05)
+
+    async def run_db(self, func, *args):
+        """
+        Runs a database call on the engine's writer thread and returns its result.
+        """
+        return await asyncio.wrap_future(self._writer.submit(func, *args))
+
+    async def open_session(self, timer):
+        """
+        Records a timer's session as in progress through the database writer.
+        """
+        try:
+            return await self.run_db(
+                open_session, timer.task_name, timer.start_time, timer.initial_duration_seconds / 60
+            )
+        except Exception as e:
+            logging.error(f"Error recording session start for '{timer.task_name}': {e}")
+            return None
+
+    def _running(self):
+        return [timer for timer in self.timers if timer.countdown.started_at is not None and not timer.finalized]
+
+    async def _checkpoint_loop(self):
+        # One batched write for all running timers per checkpoint interval.
+        # Without running timers (an idle daemon) it sleeps until one starts.
+        while True:
+            if all(timer.finalized for timer in self.timers):
+                self._timers_started.clear()
+                await self._timers_started.wait()
+            await asyncio.sleep(CHECKPOINT_INTERVAL)
+            # The status file holds a wall-clock deadline; republishing it here
+            # corrects for clock changes since the last event.
+            self._publish_state()
+            batch = []
+            for timer in self.timers:
+                if timer.session_id is not None and not timer.finalized and not timer.session_recovered:
+                    batch.append((timer.session_id, timer.countdown.elapsed()))
+            if not batch:
+                continue
+            try:
+                missing = await self.run_db(checkpoint_sessions, batch)
+            except Exception as e:
+                logging.error(f"Error checkpointing sessions: {e}")
+                continue
+            for timer in self.timers:
+                if timer.session_id in missing:
+                    timer.mark_recovered()
+
+    async def _display_loop(self):
+        # Sleeps until the next displayed time changes. Changes due within
+        # COALESCE_WINDOW of the first one are drawn in the same frame.
+        while True:
+            changes = [
+                timer.countdown.until_change() for timer in self._running() if timer.countdown.stopped_at is None
+            ]
+            delay = None
+            if changes:
+                first = min(changes)
+                delay = max(change for change in changes if change <= first + COALESCE_WINDOW)
+            self._display_wake.clear()
+            target = self._loop.time() + (delay or 0)
+            try:
+                await asyncio.wait_for(self._display_wake.wait(), delay)
+            except asyncio.TimeoutError:
+                instrumentation.observe("tick.jitter", self._loop.time() - target)
+                self._draw()
+
+    def _publish_state(self):
+        # Publish the timer closest to its deadline for --status.
+        running = self._running()
+        if running:
+            min(running, key=lambda timer: timer.countdown.remaining()).publish_state(self.state)
+        else:
+            self.state.clear()
+
+    def interrupt(self):
+        """
+        Stops every running timer; a second Ctrl+C answers the pending prompt with 'n'.
+        """
+        if all(timer.interrupted for timer in self.timers):
+            if self._prompt is not None and not self._prompt[2].done():
+                self._prompt[2].set_result('n')
+            return
+        self._messages.append("Stopping all timers.")
+        for timer in self.timers:
+            timer.interrupt()
+
+    def _on_key(self, key):
+        if self._prompt is None:
+            return
+        _, options, future = self._prompt
+        key = key.lower()
+        if key in options and not future.done():
+            future.set_result(key)
+
+    async def prompt(self, timer, text, options):
+        """
+        Asks a question on behalf of a timer and returns the answer.
+        Prompts are shown one at a time; unanswered prompts default to 'n'.
+        """
+        async with self._prompt_lock:
+            future = self._loop.create_future()
+            self._prompt = (text, options, future)
+            self.refresh()
+            try:
+                response = await asyncio.wait_for(future, self.prompt_timeout)
+            except asyncio.TimeoutError:
+                self._messages.append(f"No response received for '{timer.task_name}'. Defaulting to 'n'.")
+                response = 'n'
+            finally:
+                self._prompt = None
+                self.refresh()
+            return response
+
+    async def record(self, timer):
+        """
+        Logs a finished timer through the shared database writer and notifies the user.
+        """
+        try:
+            completed = await self.run_db(timer.log_session)
+        except Exception as e:
+            logging.error(f"Error during finalization: {e}")
+            self._messages.append(f"An error occurred during finalization of '{timer.task_name}': {e}")
+            return
+        timer.finalized = True
+        status = "Finished" if completed else "Not Finished"
+        send_notification(timer.task_name, status=status)
+        outcome = 'finished' if completed else 'stopped without completion'
+        self._messages.append(f"{timer.task_name} - Timer {outcome}.")
+        logging.info(f"Task '{timer.task_name}' {outcome}.")
+        self.refresh()
+
+    def refresh(self):
+        """
+        Schedules a redraw and a status file update after a timer's state
+        changed; several refreshes in the same loop iteration share one.
+        """
+        if not self._redraw_pending and self._loop is not None:
+            self._redraw_pending = True
+            self._loop.call_soon(self._update)
+        if self._display_wake is not None:
+            self._display_wake.set()
+
+    def _update(self):
+        self._redraw_pending = False
+        self._publish_state()
+        if self.renderer is not None:
+            self._draw()
+
+    def _draw(self):
+        width = max((len(timer.task_name) for timer in self.timers), default=0) + 2
+        rows = [f"{BOLD}TaskStrike - {len(self.timers)} timers{RESET}", ""]
+        for timer in self.timers:
+            time_str, negative = format_clock(timer.countdown.remaining_display())
+            if timer.finalized:
+                state = "done"
+            elif timer.continue_task:
+                state = "continuing"
+            else:
+                state = "running"
+            style = self.renderer.styles[negative]
+            rows.append(f"  {timer.task_name.upper():<{width}}{style}{time_str:>10}{RESET}  {state}")
+        rows.append("")
+        rows.extend(self._messages)
+        if self._prompt is not None:
+            rows.append(f"{BOLD}{self._prompt[0]}{RESET}")
+        with instrumentation.span("render.draw_list"):
+            self.renderer.draw_list(rows)
@@ -0,0 +1,222 @@
+# history_batch.py
+
+import bisect
+import sys
+import time
+from array import array
+from datetime import date
+
+STATUS_CODES = {"Finished": 1, "Not Finished": 0}
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _load_numpy():
+    # NumPy is optional: the batch works on plain arrays without it.
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _utc_offset(epoch):
+    return time.localtime(epoch).tm_gmtoff
+
+
+class HistoryBatch:
+    """
+    Task history stored column by column.
+
+    Each column is an `array` of machine values (ids and epochs as 64-bit
+    integers, durations in minutes as doubles, status as one byte per row)
+    and task names are stored once, with a small integer code per row, so
+    a session costs about 45 bytes instead of a few hundred for a Task
+    object. The helpers aggregate whole columns: with NumPy installed they
+    work on zero-copy views of the arrays, otherwise on the arrays directly.
+    Per-day helpers bisect the sorted start column, one step per day.
+    """
+
+    def __init__(self, use_numpy=True):
+        self.ids = array("q")
+        self.start = array("q")
+        self.end = array("q")
+        self.initial = array("d")
+        self.actual = array("d")
+        self.status = array("b")
+        self.name_codes = array("i")
+        self.names = []
+        self._name_index = {}
+        self.np = _load_numpy() if use_numpy else None
+
+    @classmethod
+    def from_rows(cls, rows, use_numpy=True):
+        """
+        Builds a batch from (id, task_name, start_time, end_time,
+        initial_duration, actual_duration, status) rows. Rows must come in
+        start time order; the per-day helpers rely on it.
+        """
+        batch = cls(use_numpy)
+        batch.extend(rows)
+        return batch
+
+    def extend(self, rows):
+        ids, start, end = self.ids, self.start, self.end
+        initial, actual, status, name_codes = self.initial, self.actual, self.status, self.name_codes
+        name_index = self._name_index
+        for task_id, task_name, start_time, end_time, initial_duration, actual_duration, task_status in rows:
+            code = name_index.get(task_name)
+            if code is None:
+                code = name_index[task_name] = len(self.names)
+                self.names.append(sys.intern(task_name) if task_name is not None else None)
+            ids.append(task_id)
+            start.append(start_time)
+            end.append(end_time if end_time is not None else start_time)
+            initial.append(initial_duration or 0)
+            actual.append(actual_duration or 0)
+            status.append(STATUS_CODES.get(task_status, 0))
+            name_codes.append(code)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the columns, not counting the name strings.
+        """
+        columns = (self.ids, self.start, self.end, self.initial, self.actual, self.status, self.name_codes)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    def _view(self, column):
+        return self.np.frombuffer(column, dtype=column.typecode) if len(column) else self.np.zeros(0, column.typecode)
+
+    def totals(self):
+        """
+        Returns session and finished counts with planned and focus minutes.
+        """
+        if self.np is not None:
+            return {
+                "sessions": len(self),
+                "finished": int(self._view(self.status).sum()),
+                "planned_minutes": float(self._view(self.initial).sum()),
+                "focus_minutes": float(self._view(self.actual).sum()),
+            }
+        return {
+            "sessions": len(self),
+            "finished": self.status.count(1),
+            "planned_minutes": sum(self.initial),
+            "focus_minutes": sum(self.actual),
+        }
+
+    def totals_by_name(self):
+        """
+        Returns {task_name: (sessions, focus_minutes)}.
+        """
+        if self.np is not None:
+            codes = self._view(self.name_codes)
+            sessions = self.np.bincount(codes, minlength=len(self.names))
+            minutes = self.np.bincount(codes, weights=self._view(self.actual), minlength=len(self.names))
+            return {name: (int(sessions[code]), float(minutes[code])) for code, name in enumerate(self.names)}
+        sessions = [0] * len(self.names)
+        minutes = [0.0] * len(self.names)
+        for code, actual in zip(self.name_codes, self.actual):
+            sessions[code] += 1
+            minutes[code] += actual
+        return {name: (sessions[code], minutes[code]) for code, name in enumerate(self.names)}
+
+    def duration_histogram(self, bin_minutes=5, max_minutes=120):
+        """
+        Counts sessions by actual duration in `bin_minutes` wide bins; the
+        last bin holds everything from `max_minutes` up.
+        """
+        bins = int(max_minutes // bin_minutes) + 1
+        if self.np is not None:
+            index = self.np.minimum(self._view(self.actual) // bin_minutes, bins - 1).astype("int64")
+            return [int(count) for count in self.np.bincount(index, minlength=bins)]
+        counts = [0] * bins
+        last = bins - 1
+        for actual in self.actual:
+            index = int(actual // bin_minutes)
+            counts[index if index < last else last] += 1
+        return counts
+
+    def _local_starts(self):
+        # NumPy only: start times shifted to local time. The UTC offset is
+        # taken per local day and only looked up per row on days where it
+        # changes (daylight saving transitions).
+        start = self._view(self.start)
+        offsets = self.np.empty(len(start), dtype="int64")
+        for _, lo, hi in self._local_ranges(86400):
+            first = _utc_offset(self.start[lo])
+            if first == _utc_offset(self.start[hi - 1]):
+                offsets[lo:hi] = first
+            else:
+                offsets[lo:hi] = [_utc_offset(epoch) for epoch in self.start[lo:hi]]
+        return start + offsets
+
+    def _local_ranges(self, unit):
+        # Walks the (sorted) start column one local day or
+        # hour at a time, yielding (index, lo, hi) for the rows in it, so the
+        # cost depends on the number of days rather than sessions.
+        start = self.start
+        lo = 0
+        while lo < len(start):
+            offset = _utc_offset(start[lo])
+            index = (start[lo] + offset) // unit
+            boundary = (index + 1) * unit - offset
+            # The offset may change before the boundary (daylight saving); keep
+            # the first guess if the corrected one would not move past this row.
+            shifted = (index + 1) * unit - _utc_offset(boundary)
+            if shifted > start[lo]:
+                boundary = shifted
+            hi = bisect.bisect_left(start, boundary, lo)
+            yield index, lo, hi
+            lo = hi
+
+    def local_days(self):
+        """
+        Returns each session's local start date as days since 1970-01-01.
+        """
+        if self.np is not None:
+            return self._local_starts() // 86400
+        days = array("q")
+        for day, lo, hi in self._local_ranges(86400):
+            days.extend(array("q", [day]) * (hi - lo))
+        return days
+
+    def hour_histogram(self):
+        """
+        Counts sessions by local start hour (0-23).
+        """
+        if self.np is not None:
+            return [int(count) for count in self.np.bincount(self._local_starts() // 3600 % 24, minlength=24)]
+        counts = [0] * 24
+        for hour, lo, hi in self._local_ranges(3600):
+            counts[hour % 24] += hi - lo
+        return counts
+
+    def daily_minutes(self):
+        """
+        Returns {date: focus minutes} for every local day with a session.
+        """
+        return {
+            date.fromordinal(EPOCH_ORDINAL + day): sum(self.actual[lo:hi])
+            for day, lo, hi in self._local_ranges(86400)
+        }
+
+    def streaks(self, today=None):
+        """
+        Returns (current, longest) runs of consecutive days with at least one
+        finished session. The current streak still counts if today has no
+        finished session yet but yesterday did.
+        """
+        unique = [day for day, lo, hi in self._local_ranges(86400) if 1 in self.status[lo:hi]]
+        if not unique:
+            return 0, 0
+        longest = run = 1
+        for previous, day in zip(unique, unique[1:]):
+            run = run + 1 if day == previous + 1 else 1
+            longest = max(longest, run)
+        today = (today or date.today()).toordinal() - EPOCH_ORDINAL
+        current = run if unique[-1] >= today - 1 else 0
+        return current, longest
@@ -0,0 +1,176 @@
+# input_handler.py
+
+import codecs
+import os
+import selectors
+import sys
+import time
+
+from config import SINGLE_KEYPRESS
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import termios
+    import tty
+
+
+class InputDispatcher:
+    """
+    Single source of keyboard input shared by the countdown and the prompts.
+
+    On POSIX systems stdin is watched with a selector and every wait blocks
+    until a key arrives or the timeout expires, so nothing wakes up while the
+    user is idle. With single_keypress enabled and a TTY attached, the
+    terminal is switched to cbreak mode and every key is delivered as soon as
+    it is pressed; otherwise input is delivered one line at a time.
+    """
+
+    def __init__(self, stream=None, single_keypress=SINGLE_KEYPRESS):
+        self.stream = stream or sys.stdin
+        self.single_keypress = single_keypress
+        self.fd = None
+        self.selector = None
+        self.eof = False
+        self._saved_attrs = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = []
+        self._line = ""
+
+    def open(self):
+        """
+        Prepares stdin for reading; switches the terminal to cbreak mode if requested.
+        """
+        if os.name == 'nt':
+            return
+        try:
+            self.fd = self.stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            self.eof = True
+            return
+        if self.single_keypress and os.isatty(self.fd):
+            self._saved_attrs = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+        else:
+            self.single_keypress = False
+        self.selector = selectors.DefaultSelector()
+        try:
+            self.selector.register(self.fd, selectors.EVENT_READ)
+        except OSError:
+            # epoll refuses regular files and /dev/null (nohup, `< file`, CI);
+            # select() accepts them and always reports them readable.
+            self.selector.close()
+            self.selector = selectors.SelectSelector()
+            self.selector.register(self.fd, selectors.EVENT_READ)
+
+    def close(self):
+        """
+        Restores the terminal mode and releases the selector.
+        """
+        if self._saved_attrs is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self._saved_attrs)
+            self._saved_attrs = None
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _feed(self, data):
+        text = self._decoder.decode(data)
+        if self.single_keypress:
+            self._pending.extend(text)
+            return
+        self._line += text
+        while "\n" in self._line:
+            line, self._line = self._line.split("\n", 1)
+            self._pending.append(line.strip())
+
+    def read_key(self, timeout=None):
+        """
+        Blocks until a key (or a line, in line mode) arrives.
+
+        Returns None when the timeout expires or stdin has been closed.
+        """
+        if os.name == 'nt':
+            return self._read_key_windows(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._pending:
+            if self.eof or self.selector is None:
+                return None
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not self.selector.select(remaining):
+                return None
+            data = os.read(self.fd, 1024)
+            if not data:
+                self.eof = True
+                if self._line.strip():
+                    self._pending.append(self._line.strip())
+                    self._line = ""
+                continue
+            self._feed(data)
+        return self._pending.pop(0)
+
+    def _read_key_windows(self, timeout):
+        # The Windows console cannot be waited on with selectors, so poll kbhit.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not msvcrt.kbhit():
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+        return msvcrt.getwch()
+
+    def attach(self, loop, on_key):
+        """
+        Registers stdin with an asyncio event loop; on_key is called for every key.
+        Returns False when the loop cannot watch stdin (e.g. on Windows).
+        """
+        if self.fd is None or self.eof:
+            return False
+        try:
+            loop.add_reader(self.fd, self._on_readable, loop, on_key)
+        except (NotImplementedError, OSError):
+            # OSError: epoll cannot watch regular files such as /dev/null.
+            return False
+        return True
+
+    def detach(self, loop):
+        """
+        Stops watching stdin from the event loop.
+        """
+        if self.fd is not None:
+            try:
+                loop.remove_reader(self.fd)
+            except NotImplementedError:
+                pass
+
+    def _on_readable(self, loop, on_key):
+        data = os.read(self.fd, 1024)
+        if not data:
+            self.eof = True
+            loop.remove_reader(self.fd)
+        else:
+            self._feed(data)
+        while self._pending:
+            on_key(self._pending.pop(0))
+
+    def wait(self, timeout, on_key):
+        """
+        Waits for `timeout` seconds, passing every key that arrives to on_key.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if self.eof:
+                time.sleep(remaining)
+                return
+            key = self.read_key(remaining)
+            if key is not None:
+                on_key(key)
@@ -0,0 +1,276 @@
+# instrumentation.py
+
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Bucket upper bounds in seconds: half-octave steps from 1 µs to about 67 s.
+BUCKET_BOUNDS = [1e-6 * 2 ** (step / 2) for step in range(53)]
+MODES = ("histograms", "cprofile", "tracemalloc")
+
+_enabled = False
+_histograms = {}
+_lock = threading.Lock()
+_local = threading.local()
+_output = None
+_mode = "histograms"
+_profiler = None
+
+
+class Histogram:
+    """
+    Latency histogram with logarithmic buckets.
+
+    Percentiles are estimated from the bucket bounds, so they are accurate
+    to within one half-octave; count, total, min and max are exact.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """
+        Returns the estimated value below which `fraction` of the samples fall.
+        """
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        """
+        Summarizes the histogram in milliseconds, with the non-empty buckets.
+        """
+        def ms(value):
+            return None if value is None else round(value * 1000, 4)
+
+        buckets = {}
+        for index, count in enumerate(self.counts):
+            if count:
+                label = f"<={ms(BUCKET_BOUNDS[index])}" if index < len(BUCKET_BOUNDS) else "inf"
+                buckets[label] = count
+        return {
+            "count": self.count,
+            "total_ms": ms(self.total),
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "min_ms": ms(self.min),
+            "p50_ms": ms(self.percentile(0.5)),
+            "p90_ms": ms(self.percentile(0.9)),
+            "p99_ms": ms(self.percentile(0.99)),
+            "max_ms": ms(self.max),
+            "buckets": buckets,
+        }
+
+
+def enabled():
+    """
+    Returns whether instrumentation is recording.
+    """
+    return _enabled
+
+
+def enable(output, mode="histograms"):
+    """
+    Starts recording and writes the report to `output` when the process exits.
+
+    In "cprofile" mode the whole run is also profiled with cProfile (saved
+    next to the report as .prof); in "tracemalloc" mode the top allocation
+    sites are added to the report.
+    """
+    global _enabled, _output, _mode, _profiler
+    if mode not in MODES:
+        raise ValueError(f"Invalid profiling mode: '{mode}'")
+    if _enabled:
+        return
+    _enabled = True
+    _output = output
+    _mode = mode
+    if mode == "cprofile":
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    elif mode == "tracemalloc":
+        import tracemalloc
+
+        tracemalloc.start(10)
+    atexit.register(dump)
+
+
+def observe(name, seconds):
+    """
+    Adds one sample to the named histogram; does nothing while disabled.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """
+    Returns a context manager that times its block into the named histogram.
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(func):
+    """
+    Decorator timing every call of a db.py function as "<module>.<function>".
+    Commits made during the call are timed as "<module>.<function>.commit".
+    """
+    name = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        outer = getattr(_local, "function", None)
+        _local.function = name
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observe(name, time.perf_counter() - started)
+            _local.function = outer
+
+    return wrapper
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that times commits, attributed to the db.py function
+    running them. Used as the connection factory while instrumentation is on.
+    """
+
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            self._observe_commit(started)
+
+    def __exit__(self, exc_type, exc, tb):
+        # `with conn:` commits (or rolls back) on exit; often there is nothing left to commit.
+        if not self.in_transaction:
+            return super().__exit__(exc_type, exc, tb)
+        started = time.perf_counter()
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            self._observe_commit(started)
+
+    def _observe_commit(self, started):
+        function = getattr(_local, "function", None) or "db"
+        observe(f"{function}.commit", time.perf_counter() - started)
+
+
+def connection_factory():
+    """
+    Returns the sqlite3 connection class to use for new connections.
+    """
+    return TimedConnection if _enabled else sqlite3.Connection
+
+
+def report():
+    """
+    Returns everything recorded so far as a JSON-serializable dict.
+    """
+    with _lock:
+        histograms = {name: histogram.to_dict() for name, histogram in sorted(_histograms.items())}
+    result = {"pid": os.getpid(), "mode": _mode, "histograms": histograms}
+    if _mode == "tracemalloc":
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            result["tracemalloc"] = {
+                "current_kib": round(current / 1024, 1),
+                "peak_kib": round(peak / 1024, 1),
+                "top": [
+                    {"site": str(stat.traceback[0]), "size_kib": round(stat.size / 1024, 1), "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:25]
+                ],
+            }
+    return result
+
+
+def dump():
+    """
+    Writes the report (and the cProfile stats, if any) to the output file.
+    """
+    global _profiler
+    if not _enabled or not _output:
+        return
+    try:
+        directory = os.path.dirname(_output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        result = report()
+        if _profiler is not None:
+            _profiler.disable()
+            profile_path = os.path.splitext(_output)[0] + ".prof"
+            _profiler.dump_stats(profile_path)
+            _profiler = None
+            result["cprofile"] = profile_path
+        with open(_output, "w", encoding="utf-8") as stream:
+            json.dump(result, stream, indent=2)
+        logging.info(f"Profile written to '{_output}'.")
+    except OSError as e:
+        logging.error(f"Error writing profile to '{_output}': {e}")
@@ -2,26 +2,40 @@
 
 # main.py
 
+import sys
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--status"] and sys.argv[2:3] not in (["finished"], ["not-finished"]):
+    # Status bars poll `--status [FORMAT]` every second: answer it from the
+    # timer state file before the database and logging stacks are imported.
+    from config import STATUS_FILE, STATUS_FORMAT
+    from timer_state import print_status
+
+    sys.exit(print_status(sys.argv[2:], STATUS_FILE, STATUS_FORMAT))
+
+import time
+
+STARTED = time.perf_counter()
+
 import argparse
 import logging
 import os
-import sys
-from tabulate import tabulate
-from db import (
-    initialize_db,
-    add_task_to_todo,
-    fetch_todo_list,
-    fetch_task_history,
-    delete_task_by_id,
-)
-from timer import Timer
+from datetime import datetime, timedelta
 from config import (
     DEFAULT_DURATION,
     LOG_LEVEL,
     LOG_FILE,
     DB_PATH,  # Import DB_PATH to handle pruning
+    PENDING_FILE,
+    ARCHIVE_AFTER_DAYS,
+    PROFILING_ENABLED,
+    PROFILING_MODE,
+    PROFILING_OUTPUT,
 )
-from models import Task, Todo
+import instrumentation
+
+# Heavier modules (the database and daemon client, tabulate, the timer and
+# engine stacks) are imported inside the commands that use them, so short
+# commands like --help and --show-todo stay fast.
 
 # Configure logging
 numeric_level = getattr(logging, LOG_LEVEL.upper(), None)
@@ -29,10 +43,30 @@ if not isinstance(numeric_level, int):
     raise ValueError(f'Invalid log level: {LOG_LEVEL}')
 logging.basicConfig(
     level=numeric_level,
-    filename=LOG_FILE if LOG_FILE else None,
+    # delay=True: the log file is only opened once something is logged
+    handlers=[logging.FileHandler(LOG_FILE, delay=True)] if LOG_FILE else None,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Tables and formats of --export/--import (see transfer.TABLES and transfer.FORMATS).
+TRANSFER_TABLES = ("tasks", "todo")
+TRANSFER_FORMATS = ("jsonl", "csv")
+
+_store = None
+
+
+def get_store():
+    """
+    Returns the store every command reads and writes the database through;
+    it is created, and the database stack imported, on first use.
+    """
+    global _store
+    if _store is None:
+        from store import TaskStore
+
+        _store = TaskStore()
+    return _store
+
 
 def parse_duration(duration_str):
     try:
@@ -54,12 +88,80 @@ def parse_duration(duration_str):
         raise argparse.ArgumentTypeError(f"Invalid duration format: '{duration_str}'. Use MM or MM:SS.")
 
 
+def parse_timer_spec(spec):
+    """
+    Parses a 'NAME=DURATION' timer specification used by --multi.
+    """
+    task_name, sep, duration_input = spec.rpartition('=')
+    if not sep or not task_name:
+        raise argparse.ArgumentTypeError(f"Invalid timer '{spec}'. Use NAME=MM or NAME=MM:SS.")
+    return task_name, parse_duration(duration_input)
+
+
+def run_multi(specs):
+    """
+    Runs several timers concurrently in this process.
+    """
+    from timer import Timer
+    from engine import TimerEngine
+
+    try:
+        timers = [Timer(task_name, total_seconds) for task_name, total_seconds in map(parse_timer_spec, specs)]
+    except argparse.ArgumentTypeError as e:
+        print(e)
+        logging.error(f"Failed to start timers: {e}")
+        sys.exit(1)
+    TimerEngine(timers).run()
+
+
+def open_database():
+    """
+    Prepares the database for commands that run in this process rather than in the daemon.
+    """
+    get_store().open()
+    for task_name, minutes in get_store().recover_sessions():
+        print(f"Recovered interrupted session '{task_name}' ({minutes:.2f} min) as 'Not Finished'.")
+
+
+def ask_daemon(command, args=None):
+    """
+    Sends a command to the daemon if one is running.
+    Returns (True, result), or (False, None) when there is no daemon to ask.
+    """
+    from client import DAEMON_SUPPORTED, DaemonError, daemon_request
+
+    if not DAEMON_SUPPORTED:
+        return False, None
+    try:
+        return True, daemon_request(command, args)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False, None
+    except (DaemonError, OSError, ValueError) as e:
+        print(f"The daemon could not handle '{command}': {e}")
+        logging.error(f"Daemon request '{command}' failed: {e}")
+        sys.exit(1)
+
+
+def run_daemon():
+    from daemon import Daemon
+
+    try:
+        Daemon().run()
+    except RuntimeError as e:
+        print(e)
+        logging.error(f"Failed to start the daemon: {e}")
+        sys.exit(1)
+
+
 def add_task(task_name, duration_input):
     if task_name and duration_input:
         try:
             total_seconds = parse_duration(duration_input)
             duration_minutes = total_seconds / 60
-            add_task_to_todo(task_name, duration_minutes)
+            handled, _ = ask_daemon("add-task", {"task_name": task_name, "duration": duration_minutes})
+            if not handled:
+                open_database()
+                get_store().add_todo(task_name, duration_minutes)
             print(f"Task '{task_name}' added to the to-do list.")
             logging.info(f"Added task '{task_name}' with duration {duration_minutes} minutes.")
         except argparse.ArgumentTypeError as e:
@@ -68,42 +170,225 @@ def add_task(task_name, duration_input):
         print("Please provide both a task name and duration to add a task.")
 
 
-def show_history():
-    tasks = fetch_task_history()
-    task_data = [
-        [
-            task.id,
-            task.task_name,
-            task.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            task.end_time.strftime("%Y-%m-%d %H:%M:%S") if task.end_time else "N/A",
-            f"{task.initial_duration:.2f}",
-            f"{task.actual_duration:.2f}" if task.actual_duration else "N/A",
-            task.status,
-        ]
-        for task in tasks
+HISTORY_HEADERS = [
+    "ID",
+    "Task Name",
+    "Start Time",
+    "End Time",
+    "Initial Duration (min)",
+    "Actual Duration (min)",
+    "Status",
+]
+
+STATUS_CHOICES = {"finished": "Finished", "not-finished": "Not Finished"}
+
+
+def parse_date(date_str):
+    """
+    Parses a YYYY-MM-DD or 'YYYY-MM-DD HH:MM[:SS]' local date for the history filters.
+    """
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Invalid date: '{date_str}'. Use YYYY-MM-DD or 'YYYY-MM-DD HH:MM'.")
+
+
+def parse_until(date_str):
+    """
+    Parses the --until bound; a bare date includes that whole day.
+    """
+    moment = parse_date(date_str)
+    if len(date_str.strip()) == 10:
+        moment += timedelta(days=1)
+    return moment
+
+
+def history_row(task):
+    return [
+        task.id,
+        task.task_name,
+        task.start_time.strftime("%Y-%m-%d %H:%M:%S"),
+        task.end_time.strftime("%Y-%m-%d %H:%M:%S") if task.end_time else "N/A",
+        f"{task.initial_duration:.2f}",
+        f"{task.actual_duration:.2f}" if task.actual_duration else "N/A",
+        task.status,
     ]
+
+
+def show_history(since=None, until=None, status=None, task_name=None, limit=None,
+                 newest_first=False, plain=False):
+    try:
+        tasks = (
+            get_store().tasks()
+            .since(since)
+            .until(until)
+            .status(STATUS_CHOICES.get(status))
+            .named(task_name)
+            .limit(limit)
+            .newest_first(newest_first)
+        )
+    except ValueError as e:
+        print(e)
+        logging.error(f"Invalid history query: {e}")
+        sys.exit(1)
+    if plain:
+        # Print rows as they stream in from the database; memory stays flat.
+        print("\t".join(HISTORY_HEADERS))
+        for task in tasks:
+            print("\t".join(str(value) for value in history_row(task)))
+        return
+    from tabulate import tabulate
+
+    task_data = [history_row(task) for task in tasks]
     print("\nTask History:\n")
     print(
         tabulate(
             task_data,
-            headers=[
-                "ID",
-                "Task Name",
-                "Start Time",
-                "End Time",
-                "Initial Duration (min)",
-                "Actual Duration (min)",
-                "Status",
-            ],
+            headers=HISTORY_HEADERS,
+            tablefmt="fancy_grid",
+        )
+    )
+
+
+def show_stats(group_by="day", since=None, until=None):
+    from tabulate import tabulate
+
+    rows = get_store().stats(group_by=group_by, since=since, until=until)
+    stats_data = []
+    totals = [0, 0, 0.0]
+    for row in rows:
+        stats_data.append([
+            row.period,
+            row.sessions,
+            row.finished,
+            row.sessions - row.finished,
+            f"{row.finished / row.sessions:.0%}" if row.sessions else "N/A",
+            f"{row.focus_minutes:.2f}",
+        ])
+        totals[0] += row.sessions
+        totals[1] += row.finished
+        totals[2] += row.focus_minutes
+    if stats_data:
+        sessions, finished, minutes = totals
+        stats_data.append([
+            "Total",
+            sessions,
+            finished,
+            sessions - finished,
+            f"{finished / sessions:.0%}" if sessions else "N/A",
+            f"{minutes:.2f}",
+        ])
+    print(f"\nStatistics by {group_by}:\n")
+    print(
+        tabulate(
+            stats_data,
+            headers=[group_by.capitalize(), "Sessions", "Finished", "Not Finished", "Finished %", "Focus (min)"],
+            tablefmt="fancy_grid",
+        )
+    )
+
+
+def search(query, since=None, until=None, limit=None):
+    import sqlite3
+    from tabulate import tabulate
+
+    try:
+        results = get_store().search(query, since=since, until=until, limit=limit or 50)
+    except sqlite3.OperationalError as e:
+        print(f"Invalid search '{query}': {e}")
+        logging.error(f"Search '{query}' failed: {e}")
+        sys.exit(1)
+    if not results:
+        print(f"No tasks match '{query}'.")
+        return
+    search_data = [
+        [
+            result.task_name,
+            result.sessions,
+            result.finished,
+            f"{result.focus_minutes:.2f}",
+            result.last_day or "N/A",
+            result.todo,
+        ]
+        for result in results
+    ]
+    search_data.append([
+        "Total",
+        sum(result.sessions for result in results),
+        sum(result.finished for result in results),
+        f"{sum(result.focus_minutes for result in results):.2f}",
+        "",
+        sum(result.todo for result in results),
+    ])
+    print(f"\nTasks matching '{query}':\n")
+    print(
+        tabulate(
+            search_data,
+            headers=["Task Name", "Sessions", "Finished", "Focus (min)", "Last Session", "In To-Do"],
             tablefmt="fancy_grid",
         )
     )
 
 
+def export_data(path, table, fmt):
+    from transfer import guess_format
+
+    fmt = fmt or guess_format(path)
+    try:
+        if path == "-":
+            get_store().export_table(table, sys.stdout, fmt)
+            return
+        with open(path, "w", newline="", encoding="utf-8") as stream:
+            count = get_store().export_table(table, stream, fmt)
+        print(f"Exported {count} rows from '{table}' to '{path}'.")
+    except OSError as e:
+        print(f"An error occurred while exporting: {e}")
+        logging.error(f"Error exporting '{table}' to '{path}': {e}")
+        sys.exit(1)
+
+
+# Invalid rows listed after an import; the log has all of them.
+MAX_REPORTED_ROWS = 10
+
+
+def import_data(path, table, fmt):
+    import sqlite3
+    from transfer import guess_format
+
+    fmt = fmt or guess_format(path)
+    try:
+        if path == "-":
+            read, inserted, skipped = get_store().import_table(table, sys.stdin, fmt)
+        else:
+            with open(path, newline="", encoding="utf-8") as stream:
+                read, inserted, skipped = get_store().import_table(table, stream, fmt)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"An error occurred while importing: {e}")
+        logging.error(f"Error importing '{path}' into '{table}': {e}")
+        sys.exit(1)
+    for line_number, reason in skipped[:MAX_REPORTED_ROWS]:
+        print(f"Skipped line {line_number}: {reason}.")
+    if len(skipped) > MAX_REPORTED_ROWS:
+        print(f"... and {len(skipped) - MAX_REPORTED_ROWS} more invalid rows (see the log).")
+    duplicates = read - inserted - len(skipped)
+    print(f"Imported {inserted} new rows into '{table}' ({duplicates} duplicates and {len(skipped)} invalid rows skipped).")
+
+
 def show_todo_list():
-    todo_list = fetch_todo_list()
+    from tabulate import tabulate
+    from models import Todo
+
+    handled, rows = ask_daemon("show-todo")
+    if handled:
+        todo_list = [Todo(**dict(row, added_date=datetime.fromisoformat(row["added_date"]))) for row in rows]
+    else:
+        open_database()
+        todo_list = get_store().todos()
     todo_data = [
         [
+            todo.id,
             todo.task_name,
             f"{todo.duration:.2f}",
             todo.added_date.strftime("%Y-%m-%d %H:%M:%S"),
@@ -114,16 +399,96 @@ def show_todo_list():
     print(
         tabulate(
             todo_data,
-            headers=["Task Name", "Duration (minutes)", "Added Date"],
+            headers=["ID", "Task Name", "Duration (minutes)", "Added Date"],
             tablefmt="fancy_grid",
         )
     )
 
 
+def run_todo(todo_ids):
+    from runner import TodoRunner
+
+    todo_list = get_store().todos()
+    if todo_ids:
+        by_id = {todo.id: todo for todo in todo_list}
+        missing = [str(todo_id) for todo_id in todo_ids if todo_id not in by_id]
+        if missing:
+            print(f"No to-do with ID {', '.join(missing)}.")
+            sys.exit(1)
+        todo_list = [by_id[todo_id] for todo_id in todo_ids]
+    if not todo_list:
+        print("The to-do list is empty.")
+        return
+    finished = TodoRunner(todo_list).run()
+    print(f"Finished {finished} of {len(todo_list)} task(s).")
+
+
+def show_running():
+    handled, timers = ask_daemon("status")
+    if not handled:
+        print("No daemon is running.")
+        return
+    if not timers:
+        print("No timers are running.")
+        return
+    for timer in timers:
+        remaining = timer["remaining"]
+        sign = "-" if remaining < 0 else ""
+        minutes, seconds = divmod(abs(remaining), 60)
+        state = " (continuing)" if timer["continuing"] else ""
+        print(f"{timer['task_name']}\t{sign}{minutes:02d}:{seconds:02d}{state}")
+
+
+def start_timer(task_name, duration_input, background=False):
+    try:
+        total_seconds = parse_duration(duration_input)
+    except argparse.ArgumentTypeError as e:
+        print(e)
+        logging.error(f"Failed to start timer: {e}")
+        sys.exit(1)
+    if background:
+        handled, _ = ask_daemon("start", {"task_name": task_name, "seconds": total_seconds})
+        if handled:
+            print(f"Timer for '{task_name}' started in the daemon.")
+            logging.info(f"Started task '{task_name}' in the daemon.")
+            return
+        print("No daemon is running; starting the timer here.")
+        open_database()
+    import sqlite3
+    from timer import Timer
+
+    try:
+        Timer(task_name, total_seconds).start()
+    except sqlite3.Error as e:
+        print(f"Could not start the timer: {e}")
+        logging.error(f"Failed to start timer for '{task_name}': {e}")
+        sys.exit(1)
+
+
+def stop_timer(task_name):
+    handled, timers = ask_daemon("status")
+    if not handled:
+        print("No daemon is running.")
+        return
+    names = [timer["task_name"] for timer in timers if task_name is None or timer["task_name"] == task_name]
+    if not names:
+        print(f"No running timer for '{task_name}'." if task_name else "No timers are running.")
+        return
+    confirm = input(f"Did you finish {', '.join(repr(name) for name in names)}? (y/n): ").strip().lower()
+    _, stopped = ask_daemon("stop", {"task_name": task_name, "finished": confirm == 'y'})
+    for name in stopped:
+        print(f"{name} - Timer {'finished' if confirm == 'y' else 'stopped without completion'}.")
+
+
+def stop_daemon():
+    handled, _ = ask_daemon("shutdown")
+    print("The daemon is shutting down." if handled else "No daemon is running.")
+
+
 def delete_task(task_id):
     confirm = input(f"Are you sure you want to delete task ID {task_id}? (y/n): ").strip().lower()
     if confirm == 'y':
-        delete_task_by_id(task_id)
+        get_store().delete_task(task_id)
         print(f"Task ID {task_id} has been deleted.")
         logging.info(f"Deleted task with ID {task_id}.")
     else:
@@ -131,9 +496,41 @@ def delete_task(task_id):
         logging.info(f"Deletion cancelled for task ID {task_id}.")
 
 
+def delete_todo(todo_id):
+    confirm = input(f"Are you sure you want to delete to-do ID {todo_id}? (y/n): ").strip().lower()
+    if confirm == 'y':
+        get_store().delete_todo(todo_id)
+        print(f"To-do ID {todo_id} has been deleted.")
+        logging.info(f"Deleted to-do with ID {todo_id}.")
+    else:
+        print("Deletion cancelled.")
+        logging.info(f"Deletion cancelled for to-do ID {todo_id}.")
+
+
+def archive_history(days):
+    """
+    Moves sessions started more than `days` days ago into the archive.
+    """
+    import sqlite3
+
+    before = datetime.combine(datetime.now().date() - timedelta(days=days), datetime.min.time())
+    size_before = os.path.getsize(DB_PATH)
+    try:
+        count, path = get_store().archive(before)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Error archiving sessions: {e}")
+        logging.error(f"Error archiving sessions: {e}")
+        sys.exit(1)
+    if not count:
+        print(f"No sessions started before {before:%Y-%m-%d} to archive.")
+        return
+    print(f"Archived {count} sessions started before {before:%Y-%m-%d} into '{path}'.")
+    print(f"Database size: {size_before / 1e6:.1f} MB -> {os.path.getsize(DB_PATH) / 1e6:.1f} MB.")
+
+
 def prune_db():
     """
-    Deletes the existing database file and initializes a new one.
+    Deletes the existing database file and its archive and initializes a new database.
     """
     confirm = input(f"Are you sure you want to completely erase the database and start fresh? (y/n): ").strip().lower()
     if confirm != 'y':
@@ -143,6 +540,16 @@ def prune_db():
 
     # Attempt to delete the database file
     try:
+        # Archived sessions are only reachable through the database, so they go too.
+        segments = [segment.path for segment in get_store().archive_segments()]
+        # The open connection and its WAL files must go along with the database.
+        get_store().close()
+        for segment in segments:
+            os.remove(segment)
+            logging.info(f"Deleted archive segment '{segment}'.")
+        for leftover in (f"{DB_PATH}-wal", f"{DB_PATH}-shm", PENDING_FILE):
+            if os.path.exists(leftover):
+                os.remove(leftover)
         if os.path.exists(DB_PATH):
             os.remove(DB_PATH)
             print(f"Database '{DB_PATH}' has been deleted.")
@@ -152,7 +559,7 @@ def prune_db():
             logging.warning(f"Attempted to delete non-existent database file at '{DB_PATH}'.")
 
         # Re-initialize the database
-        initialize_db()
+        get_store().open()
         print("A new database has been created.")
         logging.info("Initialized a new database.")
     except Exception as e:
@@ -160,10 +567,12 @@ def prune_db():
         logging.error(f"Error pruning database: {e}")
 
 
-def main():
-    initialize_db()
-    logging.info("Application started.")
+# Commands a running daemon can answer; they open the database only if there is none.
+DAEMON_COMMANDS = ("add_task", "show_todo", "running", "bg", "stop", "stop_daemon")
 
+
+def main():
+    imported = time.perf_counter()
     parser = argparse.ArgumentParser(
         description="TaskStrike - Pomodoro-style timer with task logging."
     )
@@ -174,10 +583,57 @@ def main():
     # Task management arguments
     group.add_argument("--add-task", "-a", action="store_true", help="Add a task to the to-do list.")
     group.add_argument("--show-history", "-s", action="store_true", help="Display the task history.")
+    group.add_argument("--stats", nargs="?", const="day", choices=["day", "week", "month", "task"],
+                       help="Show session totals grouped by day (default), week, month or task.")
+    group.add_argument("--search", metavar="QUERY",
+                       help='Find tasks and to-dos by name: words, "phrases", prefix* terms, OR/NOT.')
     group.add_argument("--show-todo", "-t", action="store_true", help="Display the to-do list.")
+    group.add_argument("--run-todo", nargs="*", type=int, metavar="ID",
+                       help="Run the to-do list (or the given IDs) back to back; finished entries are removed.")
     group.add_argument("--delete-task", "-d", type=int, help="Delete a task from the history by ID.")
+    group.add_argument("--delete-todo", type=int, help="Delete a task from the to-do list by ID.")
+    group.add_argument("--export", metavar="FILE", help="Export a table to a JSONL or CSV file ('-' for stdout).")
+    group.add_argument("--import", dest="import_file", metavar="FILE",
+                       help="Import a JSONL or CSV file into a table ('-' for stdin).")
+    group.add_argument("--multi", "-m", nargs="+", metavar="NAME=DURATION",
+                       help="Run several timers at once, e.g. --multi Build=30 Review=25:00.")
+    group.add_argument("--archive", nargs="?", type=int, const=ARCHIVE_AFTER_DAYS, metavar="DAYS",
+                       help=f"Move sessions older than DAYS (default: {ARCHIVE_AFTER_DAYS}) into compressed "
+                            f"archive segments; history and stats still include them.")
     group.add_argument("--prune-db", "-p", action="store_true",
-                       help="Completely remove the database and create a new one.")
+                       help="Completely remove the database and its archive and create a new database.")
+    group.add_argument("--daemon", action="store_true",
+                       help="Run the background daemon that serves other TaskStrike commands.")
+    group.add_argument("--stop-daemon", action="store_true", help="Shut down the running daemon.")
+    group.add_argument("--bg", action="store_true",
+                       help="Start the timer in the daemon instead of this terminal.")
+    group.add_argument("--running", action="store_true", help="List the timers running in the daemon.")
+    group.add_argument("--stop", nargs="?", const=True, metavar="NAME",
+                       help="Stop a timer running in the daemon (all of them if no name is given).")
+
+    # Filters and output options for --show-history (--since/--until also apply to --stats and --search)
+    parser.add_argument("--limit", type=int, help="Show at most this many history rows.")
+    parser.add_argument("--since", type=parse_date, help="Only show sessions started on or after this date.")
+    parser.add_argument("--until", type=parse_until, help="Only show sessions started before the end of this date.")
+    parser.add_argument("--status", choices=sorted(STATUS_CHOICES),
+                        help="Only show sessions with this status. On its own, `--status [FORMAT]` "
+                             "prints the running timer instead, e.g. --status '{name} {remaining}'.")
+    parser.add_argument("--task", help="Only show sessions of the task with this exact name.")
+    parser.add_argument("--newest-first", action="store_true", help="List the most recent sessions first.")
+    parser.add_argument("--plain", action="store_true",
+                        help="Print history rows as tab-separated lines as they are read.")
+
+    # Options for --export/--import
+    parser.add_argument("--table", choices=TRANSFER_TABLES, default="tasks",
+                        help="Table to export or import (default: tasks).")
+    parser.add_argument("--format", choices=TRANSFER_FORMATS,
+                        help="Transfer format; guessed from the file extension by default.")
+
+    # Instrumentation
+    parser.add_argument("--profile", nargs="?", const=PROFILING_OUTPUT, metavar="FILE",
+                        help=f"Record latency histograms and write them to FILE on exit (default: {PROFILING_OUTPUT}).")
+    parser.add_argument("--profile-mode", choices=instrumentation.MODES,
+                        help="Also capture a cProfile profile or tracemalloc allocation sites.")
 
     # Positional arguments for starting the timer
     parser.add_argument("task_name", nargs="?", type=str, help="Name of the task.")
@@ -186,29 +642,70 @@ def main():
     )
 
     args = parser.parse_args()
+    logging.info("Application started.")
+
+    if args.profile or args.profile_mode or PROFILING_ENABLED:
+        try:
+            instrumentation.enable(args.profile or PROFILING_OUTPUT, args.profile_mode or PROFILING_MODE)
+        except ValueError as e:
+            print(e)
+            logging.error(f"Failed to enable profiling: {e}")
+            sys.exit(1)
+        instrumentation.observe("startup.imports", imported - STARTED)
+        instrumentation.observe("startup.parse_args", time.perf_counter() - imported)
+
+    if args.daemon:
+        run_daemon()
+        return
+    if not any(getattr(args, name) for name in DAEMON_COMMANDS):
+        with instrumentation.span("startup.open_database"):
+            open_database()
 
     if args.prune_db:
         prune_db()
+    elif args.archive is not None:
+        archive_history(args.archive)
     elif args.show_history:
-        show_history()
+        show_history(
+            since=args.since,
+            until=args.until,
+            status=args.status,
+            task_name=args.task,
+            limit=args.limit,
+            newest_first=args.newest_first,
+            plain=args.plain,
+        )
+    elif args.stats:
+        show_stats(group_by=args.stats, since=args.since, until=args.until)
+    elif args.search:
+        search(args.search, since=args.since, until=args.until, limit=args.limit)
     elif args.show_todo:
         show_todo_list()
+    elif args.run_todo is not None:
+        run_todo(args.run_todo)
     elif args.delete_task is not None:
         delete_task(args.delete_task)
+    elif args.delete_todo is not None:
+        delete_todo(args.delete_todo)
+    elif args.export:
+        export_data(args.export, args.table, args.format)
+    elif args.import_file:
+        import_data(args.import_file, args.table, args.format)
+    elif args.multi:
+        run_multi(args.multi)
     elif args.add_task:
         add_task(args.task_name, args.duration)
+    elif args.running:
+        show_running()
+    elif args.stop is not None:
+        stop_timer(None if args.stop is True else args.stop)
+    elif args.stop_daemon:
+        stop_daemon()
     else:
         # Starting the timer
         task_name = args.task_name or "Unnamed Task"
         duration_input = args.duration or str(DEFAULT_DURATION)
-        try:
-            total_seconds = parse_duration(duration_input)
-            timer = Timer(task_name, total_seconds)
-            timer.start()
-        except argparse.ArgumentTypeError as e:
-            print(e)
-            logging.error(f"Failed to start timer: {e}")
-            sys.exit(1)
+        start_timer(task_name, duration_input, background=args.bg)
 
 
 if __name__ == "__main__":
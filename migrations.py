@@ -0,0 +1,62 @@
+# migrations.py
+
+import logging
+
+from queries import (
+    CREATE_TASKS_TABLE,
+    CREATE_TODO_TABLE,
+    CREATE_DAILY_STATS,
+    CREATE_ACTIVE_SESSIONS,
+    CREATE_NAME_SEARCH,
+    NORMALIZE_TASK_NAMES,
+    CREATE_ARCHIVE_SEGMENTS,
+    MIGRATE_TO_EPOCH_TIMESTAMPS,
+)
+
+# Ordered (version, statements) pairs; the database's PRAGMA user_version
+# records the last version applied. Append new migrations, never edit old ones.
+MIGRATIONS = [
+    (1, [CREATE_TASKS_TABLE, CREATE_TODO_TABLE]),
+    (2, MIGRATE_TO_EPOCH_TIMESTAMPS),
+    (3, CREATE_DAILY_STATS),
+    (4, CREATE_ACTIVE_SESSIONS),
+    (5, CREATE_NAME_SEARCH),
+    (6, NORMALIZE_TASK_NAMES),
+    (7, CREATE_ARCHIVE_SEGMENTS),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    """
+    Returns the schema version recorded in the database.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Brings the database schema up to LATEST_VERSION in place.
+
+    An up-to-date database costs a single header read. Pending migrations run
+    in one IMMEDIATE transaction, so concurrent processes apply them once and
+    a failed migration leaves the database untouched.
+    """
+    if schema_version(conn) >= LATEST_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have migrated while we waited for the lock.
+        version = schema_version(conn)
+        for target, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target}")
+            logging.info(f"Migrated database schema to version {target}.")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
@@ -3,18 +3,83 @@
 from dataclasses import dataclass
 from datetime import datetime
 
-@dataclass
+def _epoch(moment):
+    # Datetimes become the integer epoch seconds stored in the database.
+    return int(moment.timestamp()) if isinstance(moment, datetime) else moment
+
+@dataclass(init=False)
 class Task:
+    # Slots instead of a per-instance __dict__; times are kept as the stored
+    # epoch seconds and only turned into datetimes when read.
+    __slots__ = ("id", "task_name", "start_epoch", "end_epoch", "initial_duration", "actual_duration", "status")
+
     id: int                    # Added task ID
     task_name: str
-    start_time: datetime
-    end_time: datetime
+    start_epoch: int
+    end_epoch: int
     initial_duration: int
     actual_duration: int
     status: str
 
+    def __init__(self, id, task_name, start_time, end_time, initial_duration, actual_duration, status):
+        self.id = id
+        self.task_name = task_name
+        self.start_epoch = _epoch(start_time)
+        self.end_epoch = _epoch(end_time)
+        self.initial_duration = initial_duration
+        self.actual_duration = actual_duration
+        self.status = status
+
+    @classmethod
+    def from_epochs(cls, id, task_name, start_epoch, end_epoch, initial_duration, actual_duration, status):
+        """
+        Builds a Task from stored epoch seconds, as read from the database.
+        """
+        task = cls.__new__(cls)
+        task.id = id
+        task.task_name = task_name
+        task.start_epoch = start_epoch
+        task.end_epoch = end_epoch
+        task.initial_duration = initial_duration
+        task.actual_duration = actual_duration
+        task.status = status
+        return task
+
+    @property
+    def start_time(self):
+        return datetime.fromtimestamp(self.start_epoch) if self.start_epoch is not None else None
+
+    @start_time.setter
+    def start_time(self, moment):
+        self.start_epoch = _epoch(moment)
+
+    @property
+    def end_time(self):
+        return datetime.fromtimestamp(self.end_epoch) if self.end_epoch is not None else None
+
+    @end_time.setter
+    def end_time(self, moment):
+        self.end_epoch = _epoch(moment)
+
 @dataclass
 class Todo:
+    id: int
     task_name: str
     duration: int
-    added_date: datetime
\ No newline at end of file
+    added_date: datetime
+
+@dataclass
+class StatsRow:
+    period: str                # Day, week, month or task name the row aggregates
+    sessions: int
+    finished: int
+    focus_minutes: float
+
+@dataclass
+class SearchResult:
+    task_name: str
+    sessions: int
+    finished: int
+    focus_minutes: float
+    last_day: str              # Most recent day with a session (None if only on the to-do list)
+    todo: int                  # Matching entries on the to-do list
@@ -0,0 +1,244 @@
+# notifications.py
+
+import atexit
+import logging
+import platform
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import instrumentation
+
+from config import (
+    NOTIFICATIONS_ENABLED,
+    NOTIFICATION_BACKEND,
+    NOTIFICATION_TIMEOUT,
+    SOUND_ENABLED,
+    POPUP_DURATION,
+)
+
+APP_NAME = "TaskStrike"
+
+
+class NullBackend:
+    """
+    Discards notifications; used when notifications are disabled.
+    """
+
+    def send(self, title, message):
+        pass
+
+
+class DesktopBackend:
+    """
+    Native desktop notifications: osascript on macOS, notify-send on Linux and
+    win10toast on Windows. Every external command is bounded by a timeout.
+    When the notifier is not installed, notifications go to the terminal
+    (BellBackend) instead, with a single warning.
+    """
+
+    def __init__(self, timeout=NOTIFICATION_TIMEOUT, sound=SOUND_ENABLED, duration=POPUP_DURATION):
+        self.timeout = timeout
+        self.sound = sound
+        self.duration = duration
+        self.system = platform.system()
+        self._toaster = None
+        self._fallback = None
+
+    def send(self, title, message):
+        if self._fallback is not None:
+            self._fallback.send(title, message)
+            return
+        try:
+            self._send(title, message)
+        except (ImportError, FileNotFoundError) as e:
+            logging.warning(f"Desktop notifications are unavailable ({e}); printing them to the terminal instead.")
+            self._fallback = BellBackend(sound=self.sound)
+            self._fallback.send(title, message)
+
+    def _send(self, title, message):
+        if self.system == "Darwin":
+            script = f'display notification "{message}" with title "{title}"'
+            if self.sound:
+                script += ' sound name "default"'
+            subprocess.run(["osascript", "-e", script], timeout=self.timeout, check=False)
+        elif self.system == "Linux":
+            subprocess.run(
+                ["notify-send", "-t", str(int(self.duration * 1000)), title, message],
+                timeout=self.timeout,
+                check=False,
+            )
+        elif self.system == "Windows":
+            if self._toaster is None:
+                # Constructed once and reused for every notification
+                from win10toast import ToastNotifier
+                self._toaster = ToastNotifier()
+            self._toaster.show_toast(title, message, duration=self.duration, threaded=True)
+        else:
+            raise OSError(f"Desktop notifications are not supported on {self.system}")
+
+
+class BellBackend:
+    """
+    Prints the message to the terminal, ringing the bell if sound is enabled.
+    """
+
+    def __init__(self, stream=None, sound=SOUND_ENABLED):
+        self.stream = stream or sys.stderr
+        self.sound = sound
+
+    def send(self, title, message):
+        bell = "\a" if self.sound else ""
+        self.stream.write(f"{bell}{title}: {message}\n")
+        self.stream.flush()
+
+
+class FileBackend:
+    """
+    Appends one line per notification to a file; useful for tests and scripts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, title, message):
+        with open(self.path, "a", encoding="utf-8") as stream:
+            stream.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\t{title}\t{message}\n")
+
+
+class SocketBackend:
+    """
+    Sends each notification as a datagram to a Unix socket.
+    """
+
+    def __init__(self, path, timeout=NOTIFICATION_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+
+    def send(self, title, message):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.sendto(f"{title}\t{message}".encode("utf-8"), self.path)
+
+
+def create_backend(spec=NOTIFICATION_BACKEND, enabled=NOTIFICATIONS_ENABLED):
+    """
+    Builds the backend named by the [notifications] backend setting:
+    "desktop", "bell", "none", "file:<path>" or "socket:<path>".
+    """
+    if not enabled:
+        return NullBackend()
+    name, _, target = spec.partition(":")
+    if name == "desktop":
+        return DesktopBackend()
+    if name == "bell":
+        return BellBackend()
+    if name == "none":
+        return NullBackend()
+    if name == "file" and target:
+        return FileBackend(target)
+    if name == "socket" and target:
+        return SocketBackend(target)
+    raise ValueError(f"Invalid notification backend: '{spec}'")
+
+
+class NotificationDispatcher:
+    """
+    Delivers notifications from a background thread so callers never wait.
+
+    Notifications go through a bounded queue; when it is full the new one is
+    dropped. A notification identical to one sent within the last
+    `coalesce_window` seconds, or still waiting in the queue, is dropped
+    as well.
+    """
+
+    def __init__(self, backend, maxsize=16, coalesce_window=5.0):
+        self.backend = backend
+        self.coalesce_window = coalesce_window
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._pending = set()
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="taskstrike-notify", daemon=True)
+        self._thread.start()
+
+    def notify(self, title, message):
+        """
+        Queues a notification; returns False if it was coalesced or dropped.
+        """
+        key = (title, message)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._pending or now - self._recent.get(key, float("-inf")) < self.coalesce_window:
+                return False
+            try:
+                self._queue.put_nowait(key)
+            except queue.Full:
+                logging.warning(f"Notification queue full; dropped '{message}'.")
+                return False
+            self._pending.add(key)
+        return True
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            if key is None:
+                self._queue.task_done()
+                return
+            with self._lock:
+                self._pending.discard(key)
+                self._remember(key, time.monotonic())
+            try:
+                with instrumentation.span("notification.send"):
+                    self.backend.send(*key)
+            except Exception as e:
+                logging.error(f"Error sending notification: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _remember(self, key, now):
+        # Entries stay in the order they were sent, oldest first, so the ones
+        # past the coalesce window are dropped from the front; a long-running
+        # daemon keeps only the last few seconds of notifications.
+        self._recent.pop(key, None)
+        self._recent[key] = now
+        while self._recent:
+            oldest = next(iter(self._recent))
+            if now - self._recent[oldest] < self.coalesce_window:
+                break
+            del self._recent[oldest]
+
+    def close(self, timeout=2.0):
+        """
+        Gives queued notifications up to `timeout` seconds to go out, then stops the worker.
+        """
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """
+    Returns the process-wide dispatcher, creating it (and its backend) on first use.
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            try:
+                backend = create_backend()
+            except ValueError as e:
+                logging.error(f"{e}; falling back to terminal notifications.")
+                backend = BellBackend()
+            _dispatcher = NotificationDispatcher(backend)
+            atexit.register(_dispatcher.close)
+        return _dispatcher
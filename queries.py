@@ -1,5 +1,7 @@
 # queries.py
 
+# Schema version 1: the original tables, created on a fresh database and then
+# migrated forward (see migrations.py).
 CREATE_TASKS_TABLE = '''
 CREATE TABLE IF NOT EXISTS tasks (
     id INTEGER PRIMARY KEY,
@@ -12,14 +14,32 @@ CREATE TABLE IF NOT EXISTS tasks (
 )
 '''
 
+# Names are stored as task_names ids since schema version 6; db.py resolves them.
 INSERT_TASK = '''
-INSERT INTO tasks (task_name, start_time, end_time, initial_duration, actual_duration, status)
+INSERT INTO tasks (name_id, start_time, end_time, initial_duration, actual_duration, status)
 VALUES (?, ?, ?, ?, ?, ?)
 '''
 
 # Updated to include 'id'
 SELECT_TASK_HISTORY = '''
-SELECT id, task_name, start_time, end_time, initial_duration, actual_duration, status FROM tasks
+SELECT tasks.id, task_names.name, start_time, end_time, initial_duration, actual_duration, status
+FROM tasks LEFT JOIN task_names ON task_names.id = tasks.name_id
+ORDER BY start_time, tasks.id
+'''
+
+# Keyset-paginated history; db.py fills in the filter conditions and the
+# sort direction. (start_time, id) is unique, so pages never overlap.
+SELECT_TASK_HISTORY_PAGE = '''
+SELECT tasks.id, task_names.name, start_time, end_time, initial_duration, actual_duration, status
+FROM tasks LEFT JOIN task_names ON task_names.id = tasks.name_id
+WHERE {conditions}
+ORDER BY start_time {direction}, tasks.id {direction}
+LIMIT ?
+'''
+
+# Number of sessions matching the same filters as SELECT_TASK_HISTORY_PAGE.
+COUNT_TASK_HISTORY = '''
+SELECT COUNT(*) FROM tasks WHERE {conditions}
 '''
 
 # New query to delete a task by ID
@@ -38,13 +58,645 @@ CREATE TABLE IF NOT EXISTS todo (
 '''
 
 INSERT_TODO_TASK = '''
-INSERT INTO todo (task_name, duration, added_date) VALUES (?, ?, ?)
+INSERT INTO todo (name_id, duration, added_date) VALUES (?, ?, ?)
 '''
 
 SELECT_TODO_LIST = '''
-SELECT task_name, duration, added_date FROM todo
+SELECT todo.id, task_names.name, duration, added_date
+FROM todo LEFT JOIN task_names ON task_names.id = todo.name_id
+ORDER BY todo.id
 '''
 
 DELETE_TODO_TASK = '''
-DELETE FROM todo WHERE task_name = ?
-'''
\ No newline at end of file
+DELETE FROM todo WHERE id = ?
+'''
+
+# Schema version 2: integer epoch timestamps (stored text was local time) and
+# indexes for date-range, status and per-task lookups.
+MIGRATE_TO_EPOCH_TIMESTAMPS = [
+    '''
+    CREATE TABLE tasks_v2 (
+        id INTEGER PRIMARY KEY,
+        task_name TEXT,
+        start_time INTEGER,
+        end_time INTEGER,
+        initial_duration REAL,
+        actual_duration REAL,
+        status TEXT
+    )
+    ''',
+    '''
+    INSERT INTO tasks_v2 (id, task_name, start_time, end_time, initial_duration, actual_duration, status)
+    SELECT id, task_name,
+           CAST(strftime('%s', start_time, 'utc') AS INTEGER),
+           CAST(strftime('%s', end_time, 'utc') AS INTEGER),
+           initial_duration, actual_duration, status
+    FROM tasks
+    ''',
+    'DROP TABLE tasks',
+    'ALTER TABLE tasks_v2 RENAME TO tasks',
+    'CREATE INDEX idx_tasks_start_time ON tasks (start_time)',
+    'CREATE INDEX idx_tasks_status ON tasks (status, start_time)',
+    'CREATE INDEX idx_tasks_task_name ON tasks (task_name, start_time)',
+    '''
+    CREATE TABLE todo_v2 (
+        id INTEGER PRIMARY KEY,
+        task_name TEXT,
+        duration REAL,
+        added_date INTEGER
+    )
+    ''',
+    '''
+    INSERT INTO todo_v2 (id, task_name, duration, added_date)
+    SELECT id, task_name, duration, CAST(strftime('%s', added_date, 'utc') AS INTEGER)
+    FROM todo
+    ''',
+    'DROP TABLE todo',
+    'ALTER TABLE todo_v2 RENAME TO todo',
+]
+
+# Schema version 3: per-day, per-task rollup kept current by triggers on tasks,
+# so statistics never rescan the history. Days are local calendar dates.
+CREATE_DAILY_STATS = [
+    '''
+    CREATE TABLE daily_stats (
+        day TEXT NOT NULL,
+        task_name TEXT NOT NULL,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        finished INTEGER NOT NULL DEFAULT 0,
+        focus_minutes REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, task_name)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    INSERT INTO daily_stats (day, task_name, sessions, finished, focus_minutes)
+    SELECT date(start_time, 'unixepoch', 'localtime'), COALESCE(task_name, ''),
+           COUNT(*), SUM(status = 'Finished'), SUM(COALESCE(actual_duration, 0))
+    FROM tasks
+    WHERE start_time IS NOT NULL
+    GROUP BY 1, 2
+    ''',
+    '''
+    CREATE TRIGGER tasks_stats_insert AFTER INSERT ON tasks
+    WHEN NEW.start_time IS NOT NULL
+    BEGIN
+        INSERT INTO daily_stats (day, task_name, sessions, finished, focus_minutes)
+        VALUES (date(NEW.start_time, 'unixepoch', 'localtime'), COALESCE(NEW.task_name, ''),
+                1, NEW.status = 'Finished', COALESCE(NEW.actual_duration, 0))
+        ON CONFLICT (day, task_name) DO UPDATE SET
+            sessions = sessions + 1,
+            finished = finished + excluded.finished,
+            focus_minutes = focus_minutes + excluded.focus_minutes;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_stats_delete AFTER DELETE ON tasks
+    WHEN OLD.start_time IS NOT NULL
+    BEGIN
+        UPDATE daily_stats SET
+            sessions = sessions - 1,
+            finished = finished - (OLD.status = 'Finished'),
+            focus_minutes = focus_minutes - COALESCE(OLD.actual_duration, 0)
+        WHERE day = date(OLD.start_time, 'unixepoch', 'localtime')
+          AND task_name = COALESCE(OLD.task_name, '');
+        DELETE FROM daily_stats WHERE sessions <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_stats_update AFTER UPDATE ON tasks
+    BEGIN
+        UPDATE daily_stats SET
+            sessions = sessions - 1,
+            finished = finished - (OLD.status = 'Finished'),
+            focus_minutes = focus_minutes - COALESCE(OLD.actual_duration, 0)
+        WHERE OLD.start_time IS NOT NULL
+          AND day = date(OLD.start_time, 'unixepoch', 'localtime')
+          AND task_name = COALESCE(OLD.task_name, '');
+        DELETE FROM daily_stats WHERE sessions <= 0;
+        INSERT INTO daily_stats (day, task_name, sessions, finished, focus_minutes)
+        SELECT date(NEW.start_time, 'unixepoch', 'localtime'), COALESCE(NEW.task_name, ''),
+               1, NEW.status = 'Finished', COALESCE(NEW.actual_duration, 0)
+        WHERE NEW.start_time IS NOT NULL
+        ON CONFLICT (day, task_name) DO UPDATE SET
+            sessions = sessions + 1,
+            finished = finished + excluded.finished,
+            focus_minutes = focus_minutes + excluded.focus_minutes;
+    END
+    ''',
+]
+
+# Aggregates over daily_stats; db.py fills in the period expression and filters.
+STATS_PERIODS = {
+    "day": "day",
+    "week": "strftime('%Y-W%W', day)",
+    "month": "substr(day, 1, 7)",
+    "task": "name_id",
+}
+
+SELECT_STATS = '''
+SELECT {period} AS period, SUM(sessions), SUM(finished), SUM(focus_minutes)
+FROM daily_stats
+WHERE {conditions}
+GROUP BY period
+ORDER BY period
+'''
+
+# Per-task totals are grouped on the integer name_id; names are joined in afterwards.
+SELECT_STATS_BY_TASK = '''
+SELECT COALESCE(task_names.name, ''), totals.sessions, totals.finished, totals.focus_minutes
+FROM (
+    SELECT name_id, SUM(sessions) AS sessions, SUM(finished) AS finished, SUM(focus_minutes) AS focus_minutes
+    FROM daily_stats
+    WHERE {conditions}
+    GROUP BY name_id
+) AS totals
+LEFT JOIN task_names ON task_names.id = totals.name_id
+ORDER BY 1
+'''
+
+
+# Bulk transfer (transfer.py). Rows are matched on their natural key, so
+# importing the same file twice does not duplicate history.
+# The id comes first so live rows merge with archived ones (archive.merge_rows).
+EXPORT_TASKS = '''
+SELECT tasks.id, task_names.name, start_time, end_time, initial_duration, actual_duration, status
+FROM tasks LEFT JOIN task_names ON task_names.id = tasks.name_id
+ORDER BY start_time, tasks.id
+'''
+
+# Imported names must already be in task_names (INSERT_TASK_NAME).
+IMPORT_TASK = '''
+INSERT INTO tasks (name_id, start_time, end_time, initial_duration, actual_duration, status)
+SELECT (SELECT id FROM task_names WHERE name = ?1), ?2, ?3, ?4, ?5, ?6
+WHERE NOT EXISTS (
+    SELECT 1 FROM tasks WHERE name_id IS (SELECT id FROM task_names WHERE name = ?1) AND start_time = ?2
+)
+'''
+
+EXPORT_TODO = '''
+SELECT task_names.name, duration, added_date
+FROM todo LEFT JOIN task_names ON task_names.id = todo.name_id
+ORDER BY todo.id
+'''
+
+IMPORT_TODO = '''
+INSERT INTO todo (name_id, duration, added_date)
+SELECT (SELECT id FROM task_names WHERE name = ?1), ?2, ?3
+WHERE NOT EXISTS (
+    SELECT 1 FROM todo WHERE name_id IS (SELECT id FROM task_names WHERE name = ?1) AND added_date = ?3
+)
+'''
+
+
+# Schema version 4: sessions in progress, checkpointed periodically so a
+# crashed or killed timer can be recovered on the next start.
+CREATE_ACTIVE_SESSIONS = [
+    '''
+    CREATE TABLE active_sessions (
+        id INTEGER PRIMARY KEY,
+        task_name TEXT,
+        start_time INTEGER,
+        initial_duration REAL,
+        elapsed_seconds REAL NOT NULL DEFAULT 0,
+        checkpoint_time INTEGER,
+        pid INTEGER,
+        host TEXT
+    )
+    ''',
+]
+
+INSERT_ACTIVE_SESSION = '''
+INSERT INTO active_sessions (task_name, start_time, initial_duration, elapsed_seconds, checkpoint_time, pid, host)
+VALUES (?, ?, ?, 0, ?, ?, ?)
+'''
+
+CHECKPOINT_ACTIVE_SESSION = '''
+UPDATE active_sessions SET elapsed_seconds = ?, checkpoint_time = ? WHERE id = ?
+'''
+
+DELETE_ACTIVE_SESSION = '''
+DELETE FROM active_sessions WHERE id = ?
+'''
+
+# Row recover_sessions() logged for a session whose timer turned out to be
+# alive; the timer's own result replaces it.
+DELETE_RECOVERED_TASK = '''
+DELETE FROM tasks WHERE name_id = ? AND start_time = ? AND status = 'Not Finished'
+'''
+
+SELECT_ACTIVE_SESSIONS = '''
+SELECT id, task_name, start_time, initial_duration, elapsed_seconds, checkpoint_time, pid, host
+FROM active_sessions
+'''
+
+
+# Schema version 5: full-text search over task and to-do names. Names repeat
+# across thousands of sessions, so search_names keeps one row per distinct
+# name (with how many tasks and to-dos use it) and name_search indexes only
+# those. Triggers keep both in sync with tasks and todo.
+CREATE_NAME_SEARCH = [
+    '''
+    CREATE TABLE search_names (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        tasks INTEGER NOT NULL DEFAULT 0,
+        todo INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE VIRTUAL TABLE name_search USING fts5(
+        name,
+        content='search_names',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    ''',
+    '''
+    CREATE TRIGGER search_names_insert AFTER INSERT ON search_names
+    BEGIN
+        INSERT INTO name_search (rowid, name) VALUES (NEW.id, NEW.name);
+    END
+    ''',
+    '''
+    CREATE TRIGGER search_names_delete AFTER DELETE ON search_names
+    BEGIN
+        INSERT INTO name_search (name_search, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    END
+    ''',
+    '''
+    CREATE TRIGGER search_names_update AFTER UPDATE OF name ON search_names
+    BEGIN
+        INSERT INTO name_search (name_search, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        INSERT INTO name_search (rowid, name) VALUES (NEW.id, NEW.name);
+    END
+    ''',
+    '''
+    INSERT INTO search_names (name, tasks, todo)
+    SELECT name, SUM(tasks), SUM(todo) FROM (
+        SELECT task_name AS name, COUNT(*) AS tasks, 0 AS todo FROM tasks
+        WHERE task_name IS NOT NULL GROUP BY task_name
+        UNION ALL
+        SELECT task_name, 0, COUNT(*) FROM todo
+        WHERE task_name IS NOT NULL GROUP BY task_name
+    )
+    GROUP BY name
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_insert AFTER INSERT ON tasks
+    WHEN NEW.task_name IS NOT NULL
+    BEGIN
+        INSERT INTO search_names (name, tasks) VALUES (NEW.task_name, 1)
+        ON CONFLICT (name) DO UPDATE SET tasks = tasks + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_delete AFTER DELETE ON tasks
+    WHEN OLD.task_name IS NOT NULL
+    BEGIN
+        UPDATE search_names SET tasks = tasks - 1 WHERE name = OLD.task_name;
+        DELETE FROM search_names WHERE name = OLD.task_name AND tasks <= 0 AND todo <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_update AFTER UPDATE OF task_name ON tasks
+    WHEN OLD.task_name IS NOT NEW.task_name
+    BEGIN
+        UPDATE search_names SET tasks = tasks - 1 WHERE name = OLD.task_name;
+        DELETE FROM search_names WHERE name = OLD.task_name AND tasks <= 0 AND todo <= 0;
+        INSERT INTO search_names (name, tasks) SELECT NEW.task_name, 1 WHERE NEW.task_name IS NOT NULL
+        ON CONFLICT (name) DO UPDATE SET tasks = tasks + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER todo_search_insert AFTER INSERT ON todo
+    WHEN NEW.task_name IS NOT NULL
+    BEGIN
+        INSERT INTO search_names (name, todo) VALUES (NEW.task_name, 1)
+        ON CONFLICT (name) DO UPDATE SET todo = todo + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER todo_search_delete AFTER DELETE ON todo
+    WHEN OLD.task_name IS NOT NULL
+    BEGIN
+        UPDATE search_names SET todo = todo - 1 WHERE name = OLD.task_name;
+        DELETE FROM search_names WHERE name = OLD.task_name AND tasks <= 0 AND todo <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER todo_search_update AFTER UPDATE OF task_name ON todo
+    WHEN OLD.task_name IS NOT NEW.task_name
+    BEGIN
+        UPDATE search_names SET todo = todo - 1 WHERE name = OLD.task_name;
+        DELETE FROM search_names WHERE name = OLD.task_name AND tasks <= 0 AND todo <= 0;
+        INSERT INTO search_names (name, todo) SELECT NEW.task_name, 1 WHERE NEW.task_name IS NOT NULL
+        ON CONFLICT (name) DO UPDATE SET todo = todo + 1;
+    END
+    ''',
+    # Per-name totals for search results come from the daily rollup.
+    "CREATE INDEX idx_daily_stats_task_name ON daily_stats (task_name, day)",
+]
+
+# Schema version 6: task names move into the task_names dictionary, and
+# tasks, todo and daily_stats refer to them by integer id. task_names takes
+# over from search_names (same ids, with the same use counts) as the content
+# table of the name_search index. Names are never deleted, so an id stays
+# valid for as long as a process caches it.
+NORMALIZE_TASK_NAMES = [
+    '''
+    CREATE TABLE task_names (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        tasks INTEGER NOT NULL DEFAULT 0,
+        todo INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    'INSERT INTO task_names (id, name, tasks, todo) SELECT id, name, tasks, todo FROM search_names',
+    'DROP TRIGGER tasks_search_insert',
+    'DROP TRIGGER tasks_search_delete',
+    'DROP TRIGGER tasks_search_update',
+    'DROP TRIGGER todo_search_insert',
+    'DROP TRIGGER todo_search_delete',
+    'DROP TRIGGER todo_search_update',
+    'DROP TABLE search_names',
+    'DROP TABLE name_search',
+    '''
+    CREATE VIRTUAL TABLE name_search USING fts5(
+        name,
+        content='task_names',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    ''',
+    "INSERT INTO name_search (name_search) VALUES ('rebuild')",
+    '''
+    CREATE TRIGGER task_names_insert AFTER INSERT ON task_names
+    BEGIN
+        INSERT INTO name_search (rowid, name) VALUES (NEW.id, NEW.name);
+    END
+    ''',
+    '''
+    CREATE TRIGGER task_names_delete AFTER DELETE ON task_names
+    BEGIN
+        INSERT INTO name_search (name_search, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+    END
+    ''',
+    '''
+    CREATE TRIGGER task_names_update AFTER UPDATE OF name ON task_names
+    BEGIN
+        INSERT INTO name_search (name_search, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        INSERT INTO name_search (rowid, name) VALUES (NEW.id, NEW.name);
+    END
+    ''',
+    '''
+    CREATE TABLE tasks_v6 (
+        id INTEGER PRIMARY KEY,
+        name_id INTEGER REFERENCES task_names (id),
+        start_time INTEGER,
+        end_time INTEGER,
+        initial_duration REAL,
+        actual_duration REAL,
+        status TEXT
+    )
+    ''',
+    '''
+    INSERT INTO tasks_v6 (id, name_id, start_time, end_time, initial_duration, actual_duration, status)
+    SELECT tasks.id, task_names.id, start_time, end_time, initial_duration, actual_duration, status
+    FROM tasks LEFT JOIN task_names ON task_names.name = tasks.task_name
+    ''',
+    'DROP TABLE tasks',
+    'ALTER TABLE tasks_v6 RENAME TO tasks',
+    'CREATE INDEX idx_tasks_start_time ON tasks (start_time)',
+    'CREATE INDEX idx_tasks_status ON tasks (status, start_time)',
+    'CREATE INDEX idx_tasks_name_id ON tasks (name_id, start_time)',
+    '''
+    CREATE TABLE todo_v6 (
+        id INTEGER PRIMARY KEY,
+        name_id INTEGER REFERENCES task_names (id),
+        duration REAL,
+        added_date INTEGER
+    )
+    ''',
+    '''
+    INSERT INTO todo_v6 (id, name_id, duration, added_date)
+    SELECT todo.id, task_names.id, duration, added_date
+    FROM todo LEFT JOIN task_names ON task_names.name = todo.task_name
+    ''',
+    'DROP TABLE todo',
+    'ALTER TABLE todo_v6 RENAME TO todo',
+    # Sessions without a name are counted under name_id 0.
+    'DROP TABLE daily_stats',
+    '''
+    CREATE TABLE daily_stats (
+        day TEXT NOT NULL,
+        name_id INTEGER NOT NULL,
+        sessions INTEGER NOT NULL DEFAULT 0,
+        finished INTEGER NOT NULL DEFAULT 0,
+        focus_minutes REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, name_id)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    INSERT INTO daily_stats (day, name_id, sessions, finished, focus_minutes)
+    SELECT date(start_time, 'unixepoch', 'localtime'), COALESCE(name_id, 0),
+           COUNT(*), SUM(status = 'Finished'), SUM(COALESCE(actual_duration, 0))
+    FROM tasks
+    WHERE start_time IS NOT NULL
+    GROUP BY 1, 2
+    ''',
+    'CREATE INDEX idx_daily_stats_name_id ON daily_stats (name_id, day)',
+    '''
+    CREATE TRIGGER tasks_stats_insert AFTER INSERT ON tasks
+    WHEN NEW.start_time IS NOT NULL
+    BEGIN
+        INSERT INTO daily_stats (day, name_id, sessions, finished, focus_minutes)
+        VALUES (date(NEW.start_time, 'unixepoch', 'localtime'), COALESCE(NEW.name_id, 0),
+                1, NEW.status = 'Finished', COALESCE(NEW.actual_duration, 0))
+        ON CONFLICT (day, name_id) DO UPDATE SET
+            sessions = sessions + 1,
+            finished = finished + excluded.finished,
+            focus_minutes = focus_minutes + excluded.focus_minutes;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_stats_delete AFTER DELETE ON tasks
+    WHEN OLD.start_time IS NOT NULL
+    BEGIN
+        UPDATE daily_stats SET
+            sessions = sessions - 1,
+            finished = finished - (OLD.status = 'Finished'),
+            focus_minutes = focus_minutes - COALESCE(OLD.actual_duration, 0)
+        WHERE day = date(OLD.start_time, 'unixepoch', 'localtime')
+          AND name_id = COALESCE(OLD.name_id, 0);
+        DELETE FROM daily_stats
+        WHERE day = date(OLD.start_time, 'unixepoch', 'localtime')
+          AND name_id = COALESCE(OLD.name_id, 0) AND sessions <= 0;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_stats_update AFTER UPDATE ON tasks
+    BEGIN
+        UPDATE daily_stats SET
+            sessions = sessions - 1,
+            finished = finished - (OLD.status = 'Finished'),
+            focus_minutes = focus_minutes - COALESCE(OLD.actual_duration, 0)
+        WHERE OLD.start_time IS NOT NULL
+          AND day = date(OLD.start_time, 'unixepoch', 'localtime')
+          AND name_id = COALESCE(OLD.name_id, 0);
+        DELETE FROM daily_stats
+        WHERE OLD.start_time IS NOT NULL
+          AND day = date(OLD.start_time, 'unixepoch', 'localtime')
+          AND name_id = COALESCE(OLD.name_id, 0) AND sessions <= 0;
+        INSERT INTO daily_stats (day, name_id, sessions, finished, focus_minutes)
+        SELECT date(NEW.start_time, 'unixepoch', 'localtime'), COALESCE(NEW.name_id, 0),
+               1, NEW.status = 'Finished', COALESCE(NEW.actual_duration, 0)
+        WHERE NEW.start_time IS NOT NULL
+        ON CONFLICT (day, name_id) DO UPDATE SET
+            sessions = sessions + 1,
+            finished = finished + excluded.finished,
+            focus_minutes = focus_minutes + excluded.focus_minutes;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_name_insert AFTER INSERT ON tasks
+    WHEN NEW.name_id IS NOT NULL
+    BEGIN
+        UPDATE task_names SET tasks = tasks + 1 WHERE id = NEW.name_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_name_delete AFTER DELETE ON tasks
+    WHEN OLD.name_id IS NOT NULL
+    BEGIN
+        UPDATE task_names SET tasks = tasks - 1 WHERE id = OLD.name_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_name_update AFTER UPDATE OF name_id ON tasks
+    WHEN OLD.name_id IS NOT NEW.name_id
+    BEGIN
+        UPDATE task_names SET tasks = tasks - 1 WHERE id = OLD.name_id;
+        UPDATE task_names SET tasks = tasks + 1 WHERE id = NEW.name_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER todo_name_insert AFTER INSERT ON todo
+    WHEN NEW.name_id IS NOT NULL
+    BEGIN
+        UPDATE task_names SET todo = todo + 1 WHERE id = NEW.name_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER todo_name_delete AFTER DELETE ON todo
+    WHEN OLD.name_id IS NOT NULL
+    BEGIN
+        UPDATE task_names SET todo = todo - 1 WHERE id = OLD.name_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER todo_name_update AFTER UPDATE OF name_id ON todo
+    WHEN OLD.name_id IS NOT NEW.name_id
+    BEGIN
+        UPDATE task_names SET todo = todo - 1 WHERE id = OLD.name_id;
+        UPDATE task_names SET todo = todo + 1 WHERE id = NEW.name_id;
+    END
+    ''',
+]
+
+INSERT_TASK_NAME = '''
+INSERT INTO task_names (name) VALUES (?) ON CONFLICT (name) DO NOTHING
+'''
+
+SELECT_TASK_NAME_ID = '''
+SELECT id FROM task_names WHERE name = ?
+'''
+
+# Matching names in use ranked by bm25 (FTS5's rank), with their totals from
+# daily_stats; db.py fills in the day filters.
+SEARCH_NAMES = '''
+WITH matches AS (
+    SELECT task_names.id, task_names.name, task_names.todo, ranked.rank
+    FROM (SELECT rowid, rank FROM name_search WHERE name_search MATCH ?) AS ranked
+    JOIN task_names ON task_names.id = ranked.rowid
+    WHERE task_names.tasks > 0 OR task_names.todo > 0
+)
+SELECT matches.name, COALESCE(SUM(daily_stats.sessions), 0), COALESCE(SUM(daily_stats.finished), 0),
+       COALESCE(SUM(daily_stats.focus_minutes), 0), MAX(daily_stats.day), matches.todo
+FROM matches
+LEFT JOIN daily_stats ON daily_stats.name_id = matches.id {conditions}
+GROUP BY matches.id
+ORDER BY MIN(matches.rank), 2 DESC, matches.name
+LIMIT ?
+'''
+
+
+# Schema version 7: archive segments (archive.py) holding sessions moved out
+# of tasks. Readers only use registered segments, so a segment and the rows
+# it replaces change hands in one transaction.
+CREATE_ARCHIVE_SEGMENTS = [
+    '''
+    CREATE TABLE archive_segments (
+        id INTEGER PRIMARY KEY,
+        file TEXT NOT NULL UNIQUE,
+        rows INTEGER NOT NULL,
+        first_start INTEGER,
+        last_start INTEGER,
+        created INTEGER
+    )
+    ''',
+]
+
+SELECT_ARCHIVE_SEGMENTS = '''
+SELECT file FROM archive_segments ORDER BY first_start, id
+'''
+
+INSERT_ARCHIVE_SEGMENT = '''
+INSERT INTO archive_segments (file, rows, first_start, last_start, created) VALUES (?, ?, ?, ?, ?)
+'''
+
+SELECT_MAX_TASK_ID = '''
+SELECT MAX(id) FROM tasks
+'''
+
+# Sessions started before ?1, excluding ids from ?2 up (see db.archive_tasks).
+SELECT_TASKS_TO_ARCHIVE = '''
+SELECT tasks.id, task_names.name, start_time, end_time, initial_duration, actual_duration, status
+FROM tasks LEFT JOIN task_names ON task_names.id = tasks.name_id
+WHERE start_time < ?1 AND tasks.id < ?2
+ORDER BY start_time, tasks.id
+'''
+
+# The delete triggers take archived sessions out of daily_stats and the
+# task_names counts; their totals are saved first and added back afterwards.
+CREATE_ARCHIVED_TOTALS = '''
+CREATE TEMP TABLE archived_totals AS
+SELECT date(start_time, 'unixepoch', 'localtime') AS day, COALESCE(name_id, 0) AS name_id,
+       COUNT(*) AS sessions, SUM(status = 'Finished') AS finished,
+       SUM(COALESCE(actual_duration, 0)) AS focus_minutes
+FROM tasks
+WHERE start_time < ?1 AND id < ?2
+GROUP BY 1, 2
+'''
+
+DELETE_ARCHIVED_TASKS = '''
+DELETE FROM tasks WHERE start_time < ?1 AND id < ?2
+'''
+
+RESTORE_ARCHIVED_TOTALS = [
+    '''
+    INSERT INTO daily_stats (day, name_id, sessions, finished, focus_minutes)
+    SELECT day, name_id, sessions, finished, focus_minutes FROM temp.archived_totals WHERE 1
+    ON CONFLICT (day, name_id) DO UPDATE SET
+        sessions = sessions + excluded.sessions,
+        finished = finished + excluded.finished,
+        focus_minutes = focus_minutes + excluded.focus_minutes
+    ''',
+    '''
+    UPDATE task_names
+    SET tasks = tasks + (SELECT SUM(sessions) FROM temp.archived_totals WHERE archived_totals.name_id = task_names.id)
+    WHERE id IN (SELECT name_id FROM temp.archived_totals)
+    ''',
+    'DROP TABLE temp.archived_totals',
+]
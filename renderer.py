@@ -0,0 +1,408 @@
+# renderer.py
+
+import functools
+import io
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+
+from terminal_numbers import FONTS, figlet_font
+
+CSI = "\033["
+RESET = "\033[0m"
+BOLD = "\033[1m"
+BOLD_RED = "\033[1m\033[31m"
+CLEAR = "\033[2J\033[H"
+HIDE_CURSOR = "\033[?25l"
+SHOW_CURSOR = "\033[?25h"
+
+_ESCAPE_SEQUENCE = re.compile(r"\033\[[0-9;?]*[A-Za-z]")
+
+# Digit styles per [display] theme: (counting down, overtime).
+THEMES = {
+    "default": (BOLD, BOLD_RED),
+    "dark": (f"{BOLD}{CSI}36m", f"{BOLD}{CSI}91m"),
+    "light": (f"{BOLD}{CSI}34m", f"{BOLD}{CSI}31m"),
+    "mono": (BOLD, f"{BOLD}{CSI}7m"),
+}
+
+# Rendered frames memoized per atlas. A countdown shows each time string
+# once, so the cache mostly pays off for redraws and several timers.
+FRAME_CACHE_SIZE = 512
+
+
+def move_to(row, col):
+    """
+    Returns the ANSI sequence that moves the cursor to a 1-based row/column.
+    """
+    return f"{CSI}{row};{col}H"
+
+
+def format_clock(seconds):
+    """
+    Formats whole seconds as HH:MM:SS, prefixed with '-' when negative.
+    Returns the time string and whether it is negative.
+    """
+    negative = seconds < 0
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    time_str = f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return ("-" + time_str if negative else time_str), negative
+
+
+class GlyphAtlas:
+    """
+    One font's glyphs, padded to a common cell size and pre-styled.
+
+    Glyph rows are padded to the cell width and wrapped in the theme's
+    style for both color states once, when the atlas is built. A line of
+    large digits is then a single join of precomputed rows, and whole
+    frames are memoized by (time string, negative) and, centered, by width.
+    Characters the font lacks are drawn blank.
+    """
+
+    def __init__(self, glyphs, spacing, styles):
+        self.height = max(len(rows) for rows in glyphs.values())
+        glyph_width = max(len(row) for rows in glyphs.values() for row in rows)
+        self.cell_width = glyph_width + spacing
+        self.styles = styles
+        blank = " " * glyph_width
+        padded = {
+            char: [row.ljust(glyph_width) for row in rows] + [blank] * (self.height - len(rows))
+            for char, rows in glyphs.items()
+        }
+        gap = " " * spacing
+        # Rows followed by the gap to the next glyph, joined into whole lines.
+        self._rows = {char: [row + gap for row in rows] for char, rows in padded.items()}
+        self._blank_rows = [blank + gap] * self.height
+        # Styled rows without the gap, drawn cell by cell with cursor addressing.
+        self._styled = {
+            negative: {char: [f"{style}{row}{RESET}" for row in rows] for char, rows in padded.items()}
+            for negative, style in ((False, styles[0]), (True, styles[1]))
+        }
+        self._styled_blank = [blank] * self.height
+        self.lines = functools.lru_cache(maxsize=FRAME_CACHE_SIZE)(self._lines)
+        self.centered = functools.lru_cache(maxsize=FRAME_CACHE_SIZE)(self._centered)
+
+    def width(self, length):
+        """
+        Returns the columns taken by `length` characters.
+        """
+        return length * self.cell_width
+
+    def styled_rows(self, char, negative):
+        """
+        Returns a glyph's rows, each wrapped in the style for the color state.
+        """
+        return self._styled[negative].get(char) or self._styled_blank
+
+    def _lines(self, time_str, negative):
+        cells = [self._rows.get(char, self._blank_rows) for char in time_str]
+        style = self.styles[negative]
+        return tuple(f"{style}{''.join(cell[row] for cell in cells)}{RESET}" for row in range(self.height))
+
+    def _centered(self, time_str, negative, width):
+        padding = " " * max((width - self.width(len(time_str))) // 2, 0)
+        return tuple(padding + line for line in self.lines(time_str, negative))
+
+
+@functools.lru_cache(maxsize=None)
+def get_atlas(font="standard", theme="default"):
+    """
+    Returns the glyph atlas for a font and theme, building it on first use.
+
+    Fonts are the built-in ones in terminal_numbers.FONTS or, if pyfiglet
+    is installed, any pyfiglet font. Unknown fonts and themes fall back to
+    the defaults with a warning.
+    """
+    spec = FONTS.get(font) or figlet_font(font)
+    if spec is None:
+        logging.warning(f"Unknown font '{font}'; using 'standard'.")
+        spec = FONTS["standard"]
+    glyphs, spacing = spec
+    return GlyphAtlas(glyphs, spacing, _theme_styles(theme))
+
+
+@functools.lru_cache(maxsize=None)
+def _theme_styles(theme):
+    styles = THEMES.get(theme)
+    if styles is None:
+        logging.warning(f"Unknown theme '{theme}'; using 'default'.")
+        styles = THEMES["default"]
+    return styles
+
+
+def render_lines(time_str, negative=False, atlas=None):
+    """
+    Renders the time string as styled lines of large glyphs.
+    """
+    return (atlas or get_atlas()).lines(time_str, negative)
+
+
+class Renderer:
+    """
+    Draws timer frames with cursor addressing instead of clearing the screen.
+
+    Every frame is assembled in one buffer and sent with a single write. Only
+    the glyph cells whose character changed since the previous frame are
+    redrawn; a full redraw happens on the first frame, after a resize
+    (tracked through SIGWINCH) or after invalidate().
+
+    Digits come from a GlyphAtlas for the configured font and theme; each
+    cell's escape sequence is built once per layout and reused. The frame
+    is laid out within `max_width` columns, and a font too wide for them
+    is replaced by the small one.
+
+    When the stream is a file or a pipe rather than a terminal (nohup, CI,
+    `| tee`), the renderer is `plain`: it writes one line of text per
+    change and no escape codes at all.
+    """
+
+    def __init__(self, stream=None, clear_screen=True, plain=None, font="standard", theme="default",
+                 max_width=None):
+        self.stream = stream or sys.stdout
+        self.clear_screen = clear_screen
+        self.plain = not self._is_terminal() if plain is None else plain
+        self.atlas = get_atlas(font, theme)
+        self._narrow_atlas = get_atlas("small", theme)
+        self.styles = self.atlas.styles
+        self.max_width = max_width
+        self._cells = {}  # (index, char) -> escape sequence drawing that cell, for the current layout
+        self._cells_key = None
+        self._origin = None
+        self._size = None
+        self._resized = True
+        self._prev_text = None
+        self._prev_negative = None
+        self._prev_layout = None
+        self._park_row = 1
+        self._prev_rows = None
+        self._prev_handler = None
+        self._handler_installed = False
+        if not self.plain:
+            self._install_resize_handler()
+
+    def _install_resize_handler(self):
+        # Signal handlers can only be installed from the main thread.
+        if not hasattr(signal, "SIGWINCH"):
+            return
+        if threading.current_thread() is not threading.main_thread():
+            return
+        self._prev_handler = signal.getsignal(signal.SIGWINCH)
+        signal.signal(signal.SIGWINCH, self._on_resize)
+        self._handler_installed = True
+
+    def _on_resize(self, signum, frame):
+        self._resized = True
+        if callable(self._prev_handler):
+            self._prev_handler(signum, frame)
+
+    def _fileno(self):
+        try:
+            return self.stream.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return None
+
+    def _is_terminal(self):
+        # Streams without a file descriptor (io.StringIO) are treated as terminals.
+        fd = self._fileno()
+        return fd is None or os.isatty(fd)
+
+    def terminal_size(self):
+        """
+        Returns the cached (columns, lines) size, refreshing it after a resize.
+        """
+        if self._resized or self._size is None:
+            fd = self._fileno()
+            try:
+                size = os.get_terminal_size(fd if fd is not None else 1)
+                if not size.columns or not size.lines:
+                    raise OSError("terminal reports no size")
+                self._size = (size.columns, size.lines)
+            except OSError:
+                # Default terminal size if unable to get
+                self._size = (80, 24)
+            # Without SIGWINCH there is nothing to tell us about resizes.
+            self._resized = not self._handler_installed
+        return self._size
+
+    def _write(self, data):
+        fd = self._fileno()
+        if fd is None:
+            self.stream.write(data)
+            self.stream.flush()
+            return
+        # Anything still buffered by print() must reach the terminal first.
+        self.stream.flush()
+        encoding = getattr(self.stream, "encoding", None) or "utf-8"
+        view = memoryview(data.encode(encoding, errors="replace"))
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+
+    def _width(self, columns):
+        return min(columns, self.max_width) if self.max_width else columns
+
+    @staticmethod
+    def _margin(columns, width):
+        # Columns left of the frame, so a narrower frame sits in the middle of the terminal.
+        return (columns - width) // 2
+
+    def _pick_atlas(self, width, length):
+        if self.atlas.width(length) <= width:
+            return self.atlas
+        return min((self.atlas, self._narrow_atlas), key=lambda atlas: atlas.cell_width)
+
+    def _layout(self, width, margin, lines, length, atlas):
+        content_height = atlas.height + 1  # Timer lines + 1 for task name
+        space_below_timer = lines - content_height
+        padding_top = max(space_below_timer // 2, 0)
+        padding_between = max((space_below_timer - padding_top) // 2, 0)
+        top = padding_top + 2
+        left = margin + max((width - atlas.width(length)) // 2, 0) + 1
+        task_row = top + atlas.height + padding_between + 1
+        return top, left, task_row
+
+    def draw(self, time_str, negative, task_name):
+        """
+        Draws one frame of the countdown for the given time string.
+        """
+        if self.plain:
+            if time_str != self._prev_text:
+                self._write(f"{task_name}: {time_str}\n")
+            self._prev_text = time_str
+            return
+
+        columns, lines = self.terminal_size()
+        width = self._width(columns)
+        margin = self._margin(columns, width)
+        atlas = self._pick_atlas(width, len(time_str))
+        if not self.clear_screen:
+            self._write(self._scrolling_frame(time_str, negative, task_name, width, margin, lines, atlas))
+            return
+
+        layout = (columns, lines, len(time_str), task_name, atlas)
+        full = layout != self._prev_layout or negative != self._prev_negative
+        if (layout, negative) != self._cells_key:
+            # invalidate() alone redraws everything but keeps the cells.
+            self._cells.clear()
+            self._cells_key = (layout, negative)
+            self._origin = self._layout(width, margin, lines, len(time_str), atlas)
+        top, left, task_row = self._origin
+
+        parts = []
+        if full:
+            parts.append(HIDE_CURSOR + CLEAR)
+        cells = self._cells
+        for index, char in enumerate(time_str):
+            if not full and self._prev_text[index] == char:
+                continue
+            cell = cells.get((index, char))
+            if cell is None:
+                col = left + index * atlas.cell_width
+                cell = cells[index, char] = "".join(
+                    move_to(top + offset, col) + row for offset, row in enumerate(atlas.styled_rows(char, negative))
+                )
+            parts.append(cell)
+        if full:
+            task_text = f"TASK: {task_name.upper()}"
+            col = margin + max((width - len(task_text)) // 2, 0) + 1
+            parts.append(f"{move_to(task_row, col)}{BOLD}{task_text}{RESET}")
+            self._park_row = min(task_row + 2, lines)
+
+        self._prev_text = time_str
+        self._prev_negative = negative
+        self._prev_layout = layout
+        if not parts:
+            return
+        # Park the cursor below the frame so prompts print underneath it.
+        parts.append(move_to(self._park_row, 1))
+        self._write("".join(parts))
+
+    def draw_list(self, rows):
+        """
+        Draws a list of text rows from the top of the screen.
+
+        Used when several timers share the screen; only rows whose text
+        changed since the previous frame are rewritten.
+        """
+        if self.plain:
+            previous = self._prev_rows or []
+            changed = [
+                _ESCAPE_SEQUENCE.sub("", row)
+                for index, row in enumerate(rows)
+                if index >= len(previous) or previous[index] != row
+            ]
+            self._prev_rows = rows
+            if changed:
+                self._write("\n".join(changed) + "\n")
+            return
+
+        columns, lines = self.terminal_size()
+        if not self.clear_screen:
+            self._write("\n".join(rows) + "\n")
+            return
+
+        layout = (columns, lines)
+        full = layout != self._prev_layout or self._prev_rows is None
+        previous = [] if full else self._prev_rows
+        parts = [HIDE_CURSOR + CLEAR] if full else []
+        for index in range(min(max(len(rows), len(previous)), lines - 1)):
+            row = rows[index] if index < len(rows) else ""
+            if index < len(previous) and previous[index] == row:
+                continue
+            parts.append(f"{move_to(index + 1, 1)}{row}{CSI}K")
+        self._prev_rows = rows
+        self._prev_layout = layout
+        self._park_row = min(len(rows) + 1, lines)
+        if not parts:
+            return
+        parts.append(move_to(self._park_row, 1))
+        self._write("".join(parts))
+
+    def _scrolling_frame(self, time_str, negative, task_name, width, margin, lines, atlas):
+        content_height = atlas.height + 1
+        space_below_timer = lines - content_height
+        padding_top = max(space_below_timer // 2, 0)
+        padding_between = max((space_below_timer - padding_top) // 2, 0)
+        frame = ["\n" * padding_top]
+        indent = " " * margin
+        frame.extend(indent + line for line in atlas.centered(time_str, negative, width))
+        frame.append("\n" * padding_between)
+        # Centered on the visible text, like the atlas rows; the escape codes take no columns.
+        task_text = f"TASK: {task_name.upper()}"
+        padding = indent + " " * max((width - len(task_text)) // 2, 0)
+        frame.append(f"{padding}{BOLD}{task_text}{RESET}")
+        return "\n".join(frame) + "\n"
+
+    def invalidate(self):
+        """
+        Forces the next frame to be a full redraw.
+        """
+        self._prev_layout = None
+        if self.plain:
+            self._prev_text = None
+
+    def clear(self):
+        """
+        Clears the screen and restores the cursor.
+        """
+        self.invalidate()
+        if self.plain:
+            return
+        self._write(CLEAR + SHOW_CURSOR if self.clear_screen else SHOW_CURSOR)
+
+    def close(self):
+        """
+        Restores the cursor and the previous SIGWINCH handler.
+        """
+        if self.clear_screen and not self.plain:
+            # After clear() there is no frame left to step past.
+            park = move_to(self._park_row, 1) if self._prev_layout is not None else ""
+            self._write(park + SHOW_CURSOR)
+        if self._handler_installed:
+            signal.signal(signal.SIGWINCH, self._prev_handler or signal.SIG_DFL)
+            self._handler_installed = False
@@ -0,0 +1,71 @@
+# runner.py
+
+import logging
+
+from config import AUTO_START_BREAKS, BREAK_DURATION
+from notifications import APP_NAME, get_dispatcher
+from renderer import format_clock
+from scheduler import Countdown
+from timer import Timer, display_interval, new_renderer
+
+
+def run_break(seconds):
+    """
+    Shows a break countdown; nothing is logged. Ctrl+C ends the break early
+    and is passed on to the caller.
+    """
+    renderer = new_renderer()
+    countdown = Countdown(seconds, display_interval(renderer))
+    countdown.start()
+    try:
+        while countdown.remaining() > 0:
+            time_str, negative = format_clock(countdown.remaining_display())
+            renderer.draw(time_str, negative, "Break")
+            countdown.wait_next_tick()
+    finally:
+        renderer.clear()
+        renderer.close()
+    get_dispatcher().notify(APP_NAME, "Break is over.")
+
+
+class TodoRunner:
+    """
+    Works through to-do entries back to back in one process.
+
+    Each entry runs as a regular Timer; a completed entry is removed from
+    the to-do list in the same transaction that logs its session, so an
+    interrupted queue can be resumed with the same command. With breaks
+    enabled a break countdown runs between tasks. Ctrl+C stops the timer
+    as usual and ends the queue.
+    """
+
+    def __init__(self, todos, breaks=AUTO_START_BREAKS, break_seconds=BREAK_DURATION * 60):
+        self.todos = list(todos)
+        self.breaks = breaks
+        self.break_seconds = break_seconds
+
+    def run(self):
+        """
+        Runs the queue; returns the number of tasks that were finished.
+        """
+        finished = 0
+        for index, todo in enumerate(self.todos):
+            print(f"Task {index + 1} of {len(self.todos)}: {todo.task_name}")
+            timer = Timer(todo.task_name, round(todo.duration * 60), todo_id=todo.id)
+            timer.start()
+            if timer.user_decision:
+                finished += 1
+            left = len(self.todos) - index - 1
+            if timer.interrupted:
+                print(f"To-do queue stopped; {left} task(s) not started.")
+                logging.info(f"To-do queue stopped by user with {left} task(s) left.")
+                break
+            if left and self.breaks and self.break_seconds > 0:
+                try:
+                    run_break(self.break_seconds)
+                except KeyboardInterrupt:
+                    print(f"\nTo-do queue stopped; {left} task(s) not started.")
+                    logging.info(f"To-do queue stopped during a break with {left} task(s) left.")
+                    break
+        logging.info(f"To-do queue done: {finished} of {len(self.todos)} task(s) finished.")
+        return finished
@@ -0,0 +1,128 @@
+# scheduler.py
+
+import math
+import time
+
+# Seconds a redraw may be delayed to share a wakeup with another timer's.
+COALESCE_WINDOW = 0.05
+
+
+def default_clock():
+    """
+    Returns the clock used for countdowns.
+
+    CLOCK_BOOTTIME keeps counting while the machine is suspended, so a timer
+    resumed after a laptop sleep catches up instead of losing that time.
+    Elsewhere time.monotonic() is used, which is unaffected by wall-clock
+    adjustments.
+    """
+    if hasattr(time, "CLOCK_BOOTTIME"):
+        try:
+            time.clock_gettime(time.CLOCK_BOOTTIME)
+            return lambda: time.clock_gettime(time.CLOCK_BOOTTIME)
+        except OSError:
+            pass
+    return time.monotonic
+
+
+class Countdown:
+    """
+    Drift-free countdown driven by absolute deadlines.
+
+    Remaining and elapsed time are always derived from the start timestamp, so
+    the time spent rendering, prompting or suspended (SIGSTOP, laptop sleep)
+    is accounted for. The display shows the remaining time rounded up to
+    `interval` seconds, so ticks are scheduled exactly when that value
+    changes: on a grid of `interval` seconds counted back from the deadline.
+    Nothing wakes up in between, and ticks missed while the process was not
+    running are skipped rather than replayed.
+    """
+
+    def __init__(self, total_seconds, interval=1, clock=None, sleep=time.sleep):
+        if interval <= 0:
+            raise ValueError(f"Invalid update interval: {interval}")
+        self.total_seconds = total_seconds
+        self.interval = interval
+        self._clock = clock or default_clock()
+        self._sleep = sleep
+        self.started_at = None
+        self.stopped_at = None
+        self._next_tick = None
+
+    def start(self):
+        """
+        Starts the countdown from the current instant.
+        """
+        self.started_at = self._clock()
+        self.stopped_at = None
+        self._next_tick = self.started_at
+
+    def stop(self):
+        """
+        Freezes elapsed and remaining time at the current instant.
+        """
+        if self.started_at is not None and self.stopped_at is None:
+            self.stopped_at = self._clock()
+
+    def elapsed(self):
+        """
+        Returns the seconds elapsed since start() (up to stop(), if called).
+        """
+        if self.started_at is None:
+            return 0
+        end = self.stopped_at if self.stopped_at is not None else self._clock()
+        return end - self.started_at
+
+    def remaining(self):
+        """
+        Returns the remaining seconds; negative once the deadline has passed.
+        """
+        return self.total_seconds - self.elapsed()
+
+    def remaining_display(self):
+        """
+        Returns the remaining time as whole seconds, as shown on the display:
+        rounded up to whole seconds, or to whole multiples of `interval` for
+        intervals of more than a second (e.g. whole minutes).
+        """
+        step = int(self.interval) if self.interval >= 1 else 1
+        return math.ceil(self.remaining() / step) * step
+
+    def _until_change(self, now):
+        end = self.stopped_at if self.stopped_at is not None else now
+        remaining = self.total_seconds - (end - self.started_at)
+        # The next multiple of `interval` below the remaining time; the
+        # deadline (0) is always one, so expiry is never slept through.
+        return remaining - (math.ceil(remaining / self.interval) - 1) * self.interval
+
+    def until_change(self):
+        """
+        Returns the seconds until the displayed remaining time next changes.
+        """
+        return self._until_change(self._clock())
+
+    def next_delay(self, at_most=None):
+        """
+        Advances to the next tick deadline and returns the seconds until it is due.
+
+        `at_most` caps the delay so other work due earlier (a checkpoint) can
+        share the wakeup; the tick after it is computed afresh.
+        """
+        now = self._clock()
+        delay = self._until_change(now)
+        if at_most is not None:
+            delay = min(delay, max(at_most, 0))
+        self._next_tick = now + delay
+        return delay
+
+    def lateness(self):
+        """
+        Returns how many seconds past the current tick deadline it is now.
+        """
+        return self._clock() - self._next_tick
+
+    def wait_next_tick(self, at_most=None):
+        """
+        Sleeps until the next tick deadline (or for at most `at_most` seconds).
+        """
+        self._sleep(self.next_delay(at_most))
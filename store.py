@@ -0,0 +1,308 @@
+# store.py
+
+from db import (
+    initialize_db,
+    close_db,
+    transaction,
+    recover_sessions,
+    iter_task_history,
+    count_task_history,
+    fetch_history_batch,
+    fetch_todo_list,
+    fetch_stats,
+    search_tasks,
+    archive_segments,
+    archive_tasks,
+    log_task,
+    log_tasks,
+    add_task_to_todo,
+    add_tasks_to_todo,
+    delete_todo_task,
+    delete_todo_tasks,
+    delete_task_by_id,
+    delete_tasks_by_id,
+)
+from transfer import export_table, import_table
+
+# Values of the status column.
+STATUSES = ("Finished", "Not Finished")
+
+
+class TaskQuery:
+    """
+    A lazy, immutable query over the task history.
+
+    Every method returns a new query, so queries can be built step by step
+    and shared:
+
+        recent = store.tasks().since(monday).newest_first()
+        for task in recent.status("Finished").limit(10):
+            print(task.task_name, task.actual_duration)
+
+    Nothing is read until the query is iterated. Iterating streams the
+    matching sessions as Task objects page by page, archived sessions
+    included (see db.iter_task_history), and every iteration runs the
+    query again.
+    """
+
+    __slots__ = ("_filters",)
+
+    def __init__(self, since=None, until=None, status=None, task_name=None, limit=None, newest_first=False,
+                 page_size=500):
+        self._filters = {
+            "since": since,
+            "until": until,
+            "status": status,
+            "task_name": task_name,
+            "limit": limit,
+            "newest_first": newest_first,
+            "page_size": page_size,
+        }
+
+    def _replace(self, **changes):
+        return TaskQuery(**{**self._filters, **changes})
+
+    def since(self, moment):
+        """
+        Keeps sessions started at or after `moment` (a datetime; None removes the bound).
+        """
+        return self._replace(since=moment)
+
+    def until(self, moment):
+        """
+        Keeps sessions started before `moment` (a datetime; None removes the bound).
+        """
+        return self._replace(until=moment)
+
+    def status(self, status):
+        """
+        Keeps sessions with this status: "Finished" or "Not Finished" (None for both).
+        """
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"Unknown status '{status}'; use one of {', '.join(STATUSES)}.")
+        return self._replace(status=status)
+
+    def named(self, task_name):
+        """
+        Keeps sessions of the task with exactly this name (None for every task).
+        """
+        return self._replace(task_name=task_name)
+
+    def newest_first(self, newest_first=True):
+        """
+        Orders the sessions by descending start time instead of ascending.
+        """
+        return self._replace(newest_first=newest_first)
+
+    def limit(self, count):
+        """
+        Stops after `count` sessions (None for no limit).
+        """
+        if count is not None and count < 0:
+            raise ValueError(f"Invalid limit {count}; it cannot be negative.")
+        return self._replace(limit=count)
+
+    def page_size(self, rows):
+        """
+        Sets how many rows are fetched from the database at a time.
+        """
+        if rows < 1:
+            raise ValueError(f"Invalid page size {rows}; it must be at least 1.")
+        return self._replace(page_size=rows)
+
+    def __iter__(self):
+        return iter_task_history(**self._filters)
+
+    def first(self):
+        """
+        Returns the first matching session, or None.
+        """
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """
+        Returns the number of matching sessions without loading them.
+        """
+        filters = self._filters
+        count = count_task_history(filters["since"], filters["until"], filters["status"], filters["task_name"])
+        return count if filters["limit"] is None else min(count, filters["limit"])
+
+    def batch(self, use_numpy=True):
+        """
+        Loads the matching sessions into a columnar HistoryBatch, oldest
+        first. A limit keeps the oldest sessions, so it cannot be combined
+        with newest_first().
+        """
+        filters = self._filters
+        if filters["newest_first"] and filters["limit"] is not None:
+            raise ValueError("A history batch is ordered oldest first; drop newest_first() or limit().")
+        return fetch_history_batch(
+            filters["since"], filters["until"], filters["status"], filters["task_name"],
+            limit=filters["limit"], use_numpy=use_numpy,
+        )
+
+    def __repr__(self):
+        defaults = TaskQuery()._filters
+        changed = [f"{name}={value!r}" for name, value in self._filters.items() if value != defaults[name]]
+        return f"TaskQuery({', '.join(changed)})"
+
+
+class TaskStore:
+    """
+    Python interface to the task database, used by the command line and
+    available to scripts and dashboards:
+
+        from store import TaskStore
+
+        with TaskStore() as store:
+            for task in store.tasks().named("Review PR").since(datetime(2024, 1, 1)):
+                print(task.start_time, task.actual_duration)
+            with store.transaction():
+                store.add_todos([("Write docs", 25), ("Review PR", 30)])
+                store.delete_todo(3)
+
+    The store uses the database configured in config.toml. Each thread
+    talks to it through its own connection (see db.connect_db), so a store
+    can be shared between threads. Writes commit on their own unless they
+    run inside transaction().
+    """
+
+    def open(self):
+        """
+        Creates or migrates the database; returns the store.
+        """
+        initialize_db()
+        return self
+
+    def close(self):
+        """
+        Closes every database connection opened by this process.
+        """
+        close_db()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def transaction(self):
+        """
+        Returns a context manager that runs the writes inside it in one
+        transaction: committed when the block exits, rolled back if it raises.
+        """
+        return transaction()
+
+    # Reads
+
+    def tasks(self):
+        """
+        Returns a TaskQuery over the whole history, oldest first.
+        """
+        return TaskQuery()
+
+    def todos(self):
+        """
+        Returns the to-do list as Todo objects, oldest first.
+        """
+        return fetch_todo_list()
+
+    def stats(self, group_by="day", since=None, until=None):
+        """
+        Returns StatsRow totals grouped by "day", "week", "month" or "task".
+        """
+        return fetch_stats(group_by=group_by, since=since, until=until)
+
+    def search(self, query, since=None, until=None, limit=50):
+        """
+        Returns SearchResult rows for task and to-do names matching an FTS5 query.
+        """
+        return search_tasks(query, since=since, until=until, limit=limit)
+
+    def archive_segments(self):
+        """
+        Returns the archive segments holding archived sessions.
+        """
+        return archive_segments()
+
+    # Writes
+
+    def log_task(self, task_name, start_time, initial_duration, end_time, actual_duration, completed):
+        """
+        Logs one finished session.
+        """
+        log_task(task_name, start_time, initial_duration, end_time, actual_duration, completed)
+
+    def log_tasks(self, sessions):
+        """
+        Logs (task_name, start_time, initial_duration, end_time,
+        actual_duration, completed) sessions in one transaction; returns how
+        many were logged.
+        """
+        return log_tasks(sessions)
+
+    def add_todo(self, task_name, duration):
+        """
+        Adds a task with a duration in minutes to the to-do list.
+        """
+        add_task_to_todo(task_name, duration)
+
+    def add_todos(self, items):
+        """
+        Adds (task_name, duration) entries in one transaction; returns how many were added.
+        """
+        return add_tasks_to_todo(items)
+
+    def delete_task(self, task_id):
+        """
+        Deletes a session from the history.
+        """
+        delete_task_by_id(task_id)
+
+    def delete_tasks(self, task_ids):
+        """
+        Deletes sessions in one transaction; returns how many existed.
+        """
+        return delete_tasks_by_id(task_ids)
+
+    def delete_todo(self, todo_id):
+        """
+        Deletes an entry from the to-do list.
+        """
+        delete_todo_task(todo_id)
+
+    def delete_todos(self, todo_ids):
+        """
+        Deletes to-do entries in one transaction; returns how many existed.
+        """
+        return delete_todo_tasks(todo_ids)
+
+    def recover_sessions(self):
+        """
+        Logs sessions of crashed timers as 'Not Finished'; returns
+        (task_name, actual_duration_minutes) pairs.
+        """
+        return recover_sessions()
+
+    def export_table(self, table, stream, fmt="jsonl"):
+        """
+        Writes every row of "tasks" (archived sessions included) or "todo"
+        to a text stream as JSONL or CSV; returns the number of rows.
+        """
+        return export_table(table, stream, fmt)
+
+    def import_table(self, table, stream, fmt="jsonl"):
+        """
+        Loads JSONL or CSV rows from a text stream into "tasks" or "todo",
+        skipping rows that already exist; returns (rows read, rows inserted,
+        skipped rows) where skipped rows are (line number, reason) pairs.
+        Inside transaction() the rows commit with the enclosing block.
+        """
+        return import_table(table, stream, fmt)
+
+    def archive(self, before):
+        """
+        Moves sessions started before `before` into a new archive segment;
+        returns (sessions archived, segment path). Runs its own transactions.
+        """
+        return archive_tasks(before)
@@ -88,4 +88,51 @@ LARGE_DIGITS = {
         "     ",
         "     "
     ]
-}
\ No newline at end of file
+}
+
+# The same glyphs drawn with '#' for terminals and fonts without block characters.
+ASCII_DIGITS = {char: [row.replace("█", "#") for row in rows] for char, rows in LARGE_DIGITS.items()}
+
+# Seven-segment style digits, three rows high, for narrow terminals.
+SMALL_DIGITS = {
+    '0': [" _ ", "| |", "|_|"],
+    '1': ["   ", "  |", "  |"],
+    '2': [" _ ", " _|", "|_ "],
+    '3': [" _ ", " _|", " _|"],
+    '4': ["   ", "|_|", "  |"],
+    '5': [" _ ", "|_ ", " _|"],
+    '6': [" _ ", "|_ ", "|_|"],
+    '7': [" _ ", "  |", "  |"],
+    '8': [" _ ", "|_|", "|_|"],
+    '9': [" _ ", "|_|", " _|"],
+    ':': ["   ", " . ", " . "],
+    '-': ["   ", " _ ", "   "],
+}
+
+# Fonts selectable with [display] font: (glyphs, blank columns between glyphs).
+FONTS = {
+    "standard": (LARGE_DIGITS, 2),
+    "ascii": (ASCII_DIGITS, 2),
+    "small": (SMALL_DIGITS, 1),
+}
+
+FIGLET_CHARACTERS = "0123456789:-"
+
+
+def figlet_font(name):
+    """
+    Builds a font from a pyfiglet font of this name.
+
+    pyfiglet is optional; returns None when it is not installed or does
+    not know the font.
+    """
+    try:
+        import pyfiglet
+    except ImportError:
+        return None
+    try:
+        figlet = pyfiglet.Figlet(font=name, width=1000)
+    except pyfiglet.FontNotFound:
+        return None
+    glyphs = {char: figlet.renderText(char).rstrip("\n").split("\n") for char in FIGLET_CHARACTERS}
+    return glyphs, 1
@@ -0,0 +1,25 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """
+    Points db.py at an empty database, archive and pending file in a
+    temporary directory; returns the db module.
+    """
+    db.close_db()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "tasks.db"))
+    monkeypatch.setattr(db, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(db, "PENDING_FILE", str(tmp_path / "pending.jsonl"))
+    yield db
+    db.close_db()
@@ -0,0 +1,106 @@
+# tests/test_archive.py
+
+import io
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from archive import Segment, write_segment
+from transfer import export_table
+
+START = datetime(2023, 1, 1, 9, 0)
+
+
+def _log_sessions(db, count):
+    # Sessions every 7 hours with a few names, both statuses and odd durations.
+    for index in range(count):
+        start = START + timedelta(hours=7 * index)
+        minutes = 25 + index % 4 + 0.5
+        db.log_task(f"Task {index % 5}", start, 25, start + timedelta(minutes=minutes), minutes, index % 3 != 0)
+
+
+def _export(table="tasks", fmt="jsonl"):
+    stream = io.StringIO()
+    export_table(table, stream, fmt)
+    return stream.getvalue()
+
+
+def test_segment_round_trip(tmp_path):
+    rows = [
+        (index, f"Task {index % 3}", 1_700_000_000 + 60 * index, 1_700_000_000 + 60 * index + 30,
+         25.0, None if index == 7 else 0.5, "Finished" if index % 2 else "Not Finished")
+        for index in range(1, 5001)
+    ]
+    path = str(tmp_path / "segment.tsa")
+    info = write_segment(path, iter(rows))
+    assert info["rows"] == len(rows)
+    assert (info["first_start"], info["last_start"]) == (rows[0][2], rows[-1][2])
+    assert not os.path.exists(path + ".tmp")
+
+    segment = Segment(path)
+    try:
+        assert list(segment.iter_rows()) == rows
+        assert list(segment.iter_rows(newest_first=True)) == rows[::-1]
+        since, until = rows[1000][2], rows[3000][2]
+        assert list(segment.iter_rows(since, until)) == rows[1000:3000]
+        assert list(segment.iter_rows(status="Finished", task_name="Task 1")) == [
+            row for row in rows if row[6] == "Finished" and row[1] == "Task 1"
+        ]
+    finally:
+        segment.close()
+
+
+def test_empty_segment_is_not_written(tmp_path):
+    path = str(tmp_path / "empty.tsa")
+    assert write_segment(path, iter([])) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_archive_keeps_history_export_and_stats(database):
+    database.initialize_db()
+    _log_sessions(database, 300)
+    history = [(task.task_name, task.start_epoch, task.end_epoch, task.actual_duration, task.status)
+               for task in database.iter_task_history()]
+    exported = _export()
+    stats = {group_by: database.fetch_stats(group_by=group_by) for group_by in ("day", "month", "task")}
+
+    count, path = database.archive_tasks(START + timedelta(days=50))
+    assert count > 0
+    assert os.path.exists(path)
+    assert database.connect_db().execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 300 - count
+
+    assert [(task.task_name, task.start_epoch, task.end_epoch, task.actual_duration, task.status)
+            for task in database.iter_task_history()] == history
+    assert database.count_task_history() == 300
+    assert _export() == exported
+    for group_by, rows in stats.items():
+        assert database.fetch_stats(group_by=group_by) == rows
+
+
+def test_export_merges_archived_and_live_rows_by_start_time(database):
+    database.initialize_db()
+    _log_sessions(database, 20)
+    database.archive_tasks(START + timedelta(days=3))
+    # An older session logged after the archive stays live but sorts first.
+    early = START - timedelta(days=1)
+    database.log_task("Early", early, 25, early + timedelta(minutes=25), 25, True)
+
+    rows = [json.loads(line) for line in _export().splitlines()]
+    assert len(rows) == 21
+    assert rows[0]["task_name"] == "Early"
+    starts = [row["start_time"] for row in rows]
+    assert starts == sorted(starts)
+
+
+def test_failed_archive_removes_its_segment(database, monkeypatch):
+    database.initialize_db()
+    _log_sessions(database, 20)
+    monkeypatch.setattr(database, "INSERT_ARCHIVE_SEGMENT", "INSERT INTO missing_table VALUES (1)")
+    with pytest.raises(sqlite3.OperationalError):
+        database.archive_tasks(START + timedelta(days=3))
+    assert os.listdir(database.ARCHIVE_DIR) == []
+    assert database.connect_db().execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 20
+    assert len(_export().splitlines()) == 20
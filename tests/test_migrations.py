@@ -0,0 +1,117 @@
+# tests/test_migrations.py
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from migrations import LATEST_VERSION, schema_version
+
+# The schema and row format written by the first release, before versioned
+# migrations: local times as text and names repeated on every row.
+BASELINE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY,
+        task_name TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        initial_duration INTEGER,
+        actual_duration INTEGER,
+        status TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS todo (
+        id INTEGER PRIMARY KEY,
+        task_name TEXT,
+        duration INTEGER,
+        added_date TEXT
+    )
+    ''',
+]
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SESSIONS = [
+    ("Write report", datetime(2023, 3, 1, 9, 0), 25, 25, "Finished"),
+    ("Review PR-1234", datetime(2023, 3, 1, 10, 0), 25, 12, "Not Finished"),
+    ("Write report", datetime(2023, 3, 2, 23, 50), 30, 31, "Finished"),
+    ("Review PR-1234", datetime(2023, 7, 15, 14, 5), 50, 50, "Finished"),
+]
+
+TODOS = [
+    ("Plan sprint", 45, datetime(2023, 3, 3, 8, 30)),
+    ("Write report", 25, datetime(2023, 3, 4, 17, 0)),
+]
+
+
+def _create_baseline(path):
+    conn = sqlite3.connect(path)
+    for statement in BASELINE_SCHEMA:
+        conn.execute(statement)
+    conn.executemany(
+        "INSERT INTO tasks (task_name, start_time, end_time, initial_duration, actual_duration, status) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (name, start.strftime(TIME_FORMAT), (start + timedelta(minutes=actual)).strftime(TIME_FORMAT),
+             initial, actual, status)
+            for name, start, initial, actual, status in SESSIONS
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO todo (task_name, duration, added_date) VALUES (?, ?, ?)",
+        [(name, duration, added.strftime(TIME_FORMAT)) for name, duration, added in TODOS],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_baseline_database_migrates_to_latest(database):
+    _create_baseline(database.DB_PATH)
+    assert schema_version(database.connect_db()) == 0
+
+    database.initialize_db()
+    conn = database.connect_db()
+    assert LATEST_VERSION == 7
+    assert schema_version(conn) == LATEST_VERSION
+
+    history = [
+        (task.task_name, task.start_time, task.end_time, task.initial_duration, task.actual_duration, task.status)
+        for task in database.iter_task_history()
+    ]
+    assert history == [
+        (name, start, start + timedelta(minutes=actual), initial, actual, status)
+        for name, start, initial, actual, status in SESSIONS
+    ]
+    assert [(todo.task_name, todo.duration, todo.added_date) for todo in database.fetch_todo_list()] == TODOS
+
+    # Names are stored once and the rollups were built from the old rows.
+    assert conn.execute("SELECT COUNT(*) FROM task_names").fetchone()[0] == 3
+    by_task = {row.period: (row.sessions, row.finished, row.focus_minutes)
+               for row in database.fetch_stats(group_by="task")}
+    assert by_task == {"Write report": (2, 2, 56), "Review PR-1234": (2, 1, 62)}
+    assert [row.period for row in database.fetch_stats(group_by="month")] == ["2023-03", "2023-07"]
+    assert [result.task_name for result in database.search_tasks("PR-1234")] == ["Review PR-1234"]
+    assert [result.todo for result in database.search_tasks("plan")] == [1]
+    assert database.archive_segments() == []
+    assert conn.execute("SELECT COUNT(*) FROM active_sessions").fetchone()[0] == 0
+
+
+def test_migrated_database_accepts_new_writes(database):
+    _create_baseline(database.DB_PATH)
+    database.initialize_db()
+    start = datetime(2023, 8, 1, 9, 0)
+    database.log_task("Write report", start, 25, start + timedelta(minutes=25), 25, True)
+    database.add_task_to_todo("Write report", 25)
+
+    assert database.count_task_history(task_name="Write report") == 3
+    assert database.connect_db().execute("SELECT COUNT(*) FROM task_names").fetchone()[0] == 3
+    # Running the migrations again is a no-op.
+    database.initialize_db()
+    assert schema_version(database.connect_db()) == LATEST_VERSION
+    assert database.count_task_history() == 5
+
+
+def test_new_database_starts_at_latest_version(database):
+    database.initialize_db()
+    assert schema_version(database.connect_db()) == LATEST_VERSION
+    assert list(database.iter_task_history()) == []
@@ -0,0 +1,144 @@
+# tests/test_recovery.py
+
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+START = datetime(2024, 5, 6, 9, 0)
+
+
+def _age_checkpoint(db, session_id, pid=None, host=None):
+    # Makes a session look abandoned: last checkpointed an hour ago,
+    # optionally by another process or on another host.
+    conn = db.connect_db()
+    with db.transaction():
+        conn.execute(
+            "UPDATE active_sessions SET elapsed_seconds = 600, checkpoint_time = ?, "
+            "pid = COALESCE(?, pid), host = COALESCE(?, host) WHERE id = ?",
+            (int(time.time()) - 3600, pid, host, session_id),
+        )
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _active_ids(db):
+    return [row[0] for row in db.connect_db().execute("SELECT id FROM active_sessions")]
+
+
+def _sessions(db):
+    return [(task.task_name, task.status) for task in db.iter_task_history()]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="process liveness is not checked on Windows")
+def test_live_local_session_is_not_recovered(database):
+    database.initialize_db()
+    session_id = database.open_session("Suspended", datetime.now(), 25)
+    # This process is alive, however old its last checkpoint is.
+    _age_checkpoint(database, session_id)
+
+    assert database.recover_sessions() == []
+    assert _active_ids(database) == [session_id]
+    assert _sessions(database) == []
+    assert database.checkpoint_sessions([(session_id, 700)]) == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="process liveness is not checked on Windows")
+def test_dead_local_session_is_recovered(database):
+    database.initialize_db()
+    session_id = database.open_session("Crashed", START, 25)
+    _age_checkpoint(database, session_id, pid=_dead_pid())
+
+    assert database.recover_sessions() == [("Crashed", 10.0)]
+    assert _active_ids(database) == []
+    assert _sessions(database) == [("Crashed", "Not Finished")]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="process liveness is not checked on Windows")
+def test_session_checkpointed_before_boot_is_recovered(database, monkeypatch):
+    database.initialize_db()
+    session_id = database.open_session("Before reboot", datetime.now(), 25)
+    _age_checkpoint(database, session_id)
+    # The machine restarted since the checkpoint; the pid is alive but unrelated.
+    monkeypatch.setattr(database, "boot_time", lambda: int(time.time()) - 60)
+
+    assert database.recover_sessions() == [("Before reboot", 10.0)]
+    assert _active_ids(database) == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="process liveness is not checked on Windows")
+def test_stale_session_with_reused_pid_is_recovered(database):
+    database.initialize_db()
+    # This process started long after the session, so its pid was reused.
+    session_id = database.open_session("Reused pid", START, 25)
+    _age_checkpoint(database, session_id)
+
+    assert database.recover_sessions() == [("Reused pid", 10.0)]
+    assert _sessions(database) == [("Reused pid", "Not Finished")]
+
+
+def test_stale_session_from_another_host_is_recovered(database):
+    database.initialize_db()
+    session_id = database.open_session("Elsewhere", START, 25)
+    _age_checkpoint(database, session_id, host="another-host")
+
+    assert database.recover_sessions() == [("Elsewhere", 10.0)]
+    assert _sessions(database) == [("Elsewhere", "Not Finished")]
+
+
+def test_concurrent_recovery_logs_a_session_once(database, monkeypatch):
+    database.initialize_db()
+    session_id = database.open_session("Raced", START, 25)
+    _age_checkpoint(database, session_id, host="another-host")
+
+    # Both processes read the orphaned row before either takes the write lock.
+    barrier = threading.Barrier(2, timeout=10)
+    orphaned = database._orphaned
+
+    def orphaned_after_both_read(*args):
+        result = orphaned(*args)
+        barrier.wait()
+        return result
+
+    monkeypatch.setattr(database, "_orphaned", orphaned_after_both_read)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(database.recover_sessions())) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [[], [("Raced", 10.0)]]
+    assert _sessions(database) == [("Raced", "Not Finished")]
+    assert _active_ids(database) == []
+
+
+def test_recovered_session_is_logged_once(database):
+    database.initialize_db()
+    session_id = database.open_session("Resumed", START, 25)
+    _age_checkpoint(database, session_id, host="another-host")
+    database.recover_sessions()
+
+    # The timer resumes: its checkpoint finds the row gone, and its own log
+    # replaces the recovered entry instead of adding a second one.
+    assert database.checkpoint_sessions([(session_id, 1500)]) == [session_id]
+    database.log_task("Resumed", START, 25, START + timedelta(minutes=25), 25, True, session_id=session_id)
+    assert _sessions(database) == [("Resumed", "Finished")]
+
+
+def test_pending_sessions_are_logged_before_recovery(database):
+    database.initialize_db()
+    database.save_pending_task("Saved while locked", START, 25, START + timedelta(minutes=25), 25, True)
+
+    assert database.recover_sessions() == []
+    assert _sessions(database) == [("Saved while locked", "Finished")]
+    # The claimed file is gone, so a second start does not log it again.
+    database.recover_sessions()
+    assert _sessions(database) == [("Saved while locked", "Finished")]
@@ -3,52 +3,97 @@
 # timer.py
 
 import time
-import os
 import logging
-from datetime import datetime, timedelta
+import sqlite3
+from datetime import datetime
 from utils import send_notification
-from db import log_task
+from notifications import get_dispatcher
+from db import in_transaction, log_task, open_session, checkpoint_sessions, save_pending_task
 from config import (
     UPDATE_INTERVAL,  # Typically set to 1 for a 1-second update interval
+    CHECKPOINT_INTERVAL,  # Seconds between saves of the running session
     CLEAR_SCREEN,     # Boolean to determine whether to clear the screen on each update
+    HEADLESS_INTERVAL,  # Update interval when the output is not a terminal
+    FONT,             # Font of the large digits
+    THEME,            # Colors of the large digits
+    MAX_WIDTH,        # Columns the countdown display may use
+    STATUS_FILE,      # Memory-mapped file read by --status
 )
-from terminal_numbers import LARGE_DIGITS  # Ensure LARGE_DIGITS is a dict mapping characters to large digit representations
-import sys
-import select
-import threading
+from renderer import Renderer, format_clock, get_atlas, render_lines
+from scheduler import Countdown
+from input_handler import InputDispatcher
+from timer_state import TimerState
+import instrumentation
+
+
+def new_renderer():
+    """
+    Returns a Renderer for the countdown display configured from config.toml.
+    """
+    return Renderer(clear_screen=CLEAR_SCREEN, font=FONT, theme=THEME, max_width=MAX_WIDTH)
+
+
+def display_interval(renderer):
+    """
+    Returns the update interval for a renderer: UPDATE_INTERVAL on a
+    terminal, HEADLESS_INTERVAL (whole minutes by default) when the output
+    is a file or a pipe and nobody watches it tick.
+    """
+    if renderer.plain and HEADLESS_INTERVAL > UPDATE_INTERVAL:
+        return HEADLESS_INTERVAL
+    return UPDATE_INTERVAL
+
 
 class Timer:
-    def __init__(self, task_name, total_seconds):
+    def __init__(self, task_name, total_seconds, todo_id=None):
         """
         Initializes the Timer with the task name and total duration in seconds.
+        A completed timer started from the to-do list removes entry todo_id.
         """
         self.task_name = task_name
+        self.todo_id = todo_id
         self.total_seconds = total_seconds
         self.initial_duration_seconds = total_seconds
         self.actual_seconds = 0
         self.user_decision = None
-        self.decision_lock = threading.Lock()
         self.prompt_timeout = 30  # Seconds to wait for user input during prompts
         self.end_time = None
         self.continue_task = False  # Flag to indicate if user chose to continue
         self.final_prompt = False  # Flag for the final prompt after negative time
+        self.finalized = False  # Guards against logging the same session twice
+        self.renderer = None
+        self.input = InputDispatcher()
+        self.listening = True  # Whether keys pressed during the countdown are still handled
+        self.countdown = Countdown(total_seconds, UPDATE_INTERVAL, sleep=self._wait)
+        self.interrupted = False  # Set on Ctrl+C or by the engine when the user stops all timers
+        self.session_id = None  # Row in active_sessions while the timer runs
+        self.session_recovered = False  # Set when another process logged the session while this one was suspended
+        self._next_checkpoint = CHECKPOINT_INTERVAL
+        self._wake = None
 
     def render_large_time(self, time_str, negative=False):
         """
         Renders the remaining time in a large, stylized format.
         """
-        lines = [""] * 5  # Each digit representation has 5 lines
-        for char in time_str:
-            digit_lines = LARGE_DIGITS.get(char, ["     "] * 5)
-            for i in range(5):
-                lines[i] += digit_lines[i] + "  "  # Add space between digits
-        # Apply bold styling and color if negative
-        if negative:
-            # Apply red color for negative time
-            lines = [f"\033[1m\033[31m{line}\033[0m" for line in lines]
-        else:
-            lines = [f"\033[1m{line}\033[0m" for line in lines]
-        return lines
+        return render_lines(time_str, negative, get_atlas(FONT, THEME))
+
+    def _ask(self, options):
+        """
+        Waits up to prompt_timeout seconds for one of the given keys.
+        Other keys are ignored; returns 'n' if nothing valid arrives in time.
+        """
+        deadline = time.monotonic() + self.prompt_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            key = self.input.read_key(remaining) if remaining > 0 else None
+            if key is None:
+                print("\nNo response received. Defaulting to 'n'.")
+                return 'n'
+            key = key.lower()
+            if key in options:
+                if self.input.single_keypress:
+                    print(key)  # cbreak mode does not echo the key
+                return key
 
     def prompt_user_initial(self):
         """
@@ -57,45 +102,16 @@ class Timer:
         """
         print(f"\nTime is up for '{self.task_name}'.")
         print("Did you finish the task? (y/n/c): ", end='', flush=True)
-        start_time = time.time()
-        response = ''
-        while time.time() - start_time < self.prompt_timeout:
-            if os.name == 'nt':
-                # For Windows
-                import msvcrt
-                if msvcrt.kbhit():
-                    key = msvcrt.getwch().lower()
-                    if key in ['y', 'n', 'c']:
-                        response = key
-                        break
-            else:
-                # For Unix/Linux
-                dr, dw, de = select.select([sys.stdin], [], [], 0)
-                if dr:
-                    response = sys.stdin.readline().strip().lower()
-                    if response in ['y', 'n', 'c']:
-                        break
-            time.sleep(0.1)
-        else:
-            # Timeout reached
-            print("\nNo response received. Defaulting to 'n'.")
-            response = 'n'
-
-        if response == '':
-            response = 'n'
-        if response not in ['y', 'n', 'c']:
-            print("Invalid input. Defaulting to 'n'.")
-            response = 'n'
-
-        with self.decision_lock:
-            if response == 'y':
-                self.user_decision = True
-            elif response == 'n':
-                self.user_decision = False
-            elif response == 'c':
-                self.continue_task = True
-                print("Continuing the task. Press Ctrl+C to stop the timer when done.")
-                logging.info(f"User chose to continue the task '{self.task_name}'.")
+        response = self._ask(['y', 'n', 'c'])
+
+        if response == 'y':
+            self.user_decision = True
+        elif response == 'n':
+            self.user_decision = False
+        elif response == 'c':
+            self.continue_task = True
+            print("Continuing the task. Press Ctrl+C to stop the timer when done.")
+            logging.info(f"User chose to continue the task '{self.task_name}'.")
 
     def prompt_user_final(self):
         """
@@ -105,82 +121,35 @@ class Timer:
         """
         print(f"\nAdditional time has passed for '{self.task_name}'.")
         print("Did you finish the task? (y/n): ", end='', flush=True)
-        start_time = time.time()
-        response = ''
-        while time.time() - start_time < self.prompt_timeout:
-            if os.name == 'nt':
-                # For Windows
-                import msvcrt
-                if msvcrt.kbhit():
-                    key = msvcrt.getwch().lower()
-                    if key in ['y', 'n']:
-                        response = key
-                        break
-            else:
-                # For Unix/Linux
-                dr, dw, de = select.select([sys.stdin], [], [], 0)
-                if dr:
-                    response = sys.stdin.readline().strip().lower()
-                    if response in ['y', 'n']:
-                        break
-            time.sleep(0.1)
-        else:
-            # Timeout reached
-            print("\nNo response received. Defaulting to 'n'.")
-            response = 'n'
-
-        if response == '':
-            response = 'n'
-        if response not in ['y', 'n']:
-            print("Invalid input. Defaulting to 'n'.")
-            response = 'n'
+        response = self._ask(['y', 'n'])
+        self.user_decision = (response == 'y')
 
-        with self.decision_lock:
-            self.user_decision = (response == 'y')
+    def handle_key(self, key):
+        """
+        Handles 'y', 'n', or 'c' pressed while the timer is counting down.
+        Sets the user_decision or continue_task accordingly; only the first
+        valid key is taken into account.
+        """
+        if not self.listening:
+            return
+        key = key.lower()
+        if key == 'y':
+            self.user_decision = True
+        elif key == 'n':
+            self.user_decision = False
+        elif key == 'c':
+            self.continue_task = True
+            print("\nContinuing the task. Press Ctrl+C to stop the timer when done.")
+            logging.info(f"User chose to continue the task '{self.task_name}'.")
+        else:
+            return
+        self.listening = False
 
-    def listen_for_input(self):
+    def _wait(self, seconds):
         """
-        Function to listen for 'y', 'n', or 'c' input during the timer.
-        Sets the user_decision or continue_task accordingly.
+        Sleeps until the next tick while dispatching keypresses as they arrive.
         """
-        while True:
-            if os.name == 'nt':
-                # For Windows
-                import msvcrt
-                if msvcrt.kbhit():
-                    key = msvcrt.getwch().lower()
-                    if key in ['y', 'n', 'c']:
-                        with self.decision_lock:
-                            if key == 'y':
-                                self.user_decision = True
-                                break
-                            elif key == 'n':
-                                self.user_decision = False
-                                break
-                            elif key == 'c':
-                                self.continue_task = True
-                                print("\nContinuing the task. Press Ctrl+C to stop the timer when done.")
-                                logging.info(f"User chose to continue the task '{self.task_name}'.")
-                                break
-            else:
-                # For Unix/Linux
-                dr, dw, de = select.select([sys.stdin], [], [], 0)
-                if dr:
-                    response = sys.stdin.readline().strip().lower()
-                    if response in ['y', 'n', 'c']:
-                        with self.decision_lock:
-                            if response == 'y':
-                                self.user_decision = True
-                                break
-                            elif response == 'n':
-                                self.user_decision = False
-                                break
-                            elif response == 'c':
-                                self.continue_task = True
-                                print("\nContinuing the task. Press Ctrl+C to stop the timer when done.")
-                                logging.info(f"User chose to continue the task '{self.task_name}'.")
-                                break
-            time.sleep(0.1)
+        self.input.wait(seconds, self.handle_key)
 
     def start(self):
         """
@@ -188,55 +157,38 @@ class Timer:
         """
         self.start_time = datetime.now()
         logging.info(f"Task '{self.task_name}' started at {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        # Start the input listener thread
-        input_thread = threading.Thread(target=self.listen_for_input)
-        input_thread.daemon = True
-        input_thread.start()
+        get_dispatcher()  # Pick the notification backend before the countdown starts
+        # Database and state file first: if they fail, the terminal is still in its normal mode.
+        self.session_id = open_session(self.task_name, self.start_time, self.initial_duration_seconds / 60)
+        state = TimerState(STATUS_FILE)
+        state.open()
+        self.input.open()
+        self.renderer = new_renderer()
+        self.countdown.interval = display_interval(self.renderer)
+        self.countdown.start()
 
         try:
             while True:
-                remaining_seconds = int(self.total_seconds)
-                if remaining_seconds >= 0:
-                    remaining_time = str(timedelta(seconds=remaining_seconds))
-                    negative = False
-                else:
-                    remaining_time = str(timedelta(seconds=-remaining_seconds))
-                    negative = True
-                # Ensure format is HH:MM:SS
-                if len(remaining_time) < 8:
-                    remaining_time = "0" + remaining_time
-                if negative:
-                    remaining_time = "-" + remaining_time
-                large_time_lines = self.render_large_time(remaining_time, negative)
-                if CLEAR_SCREEN:
-                    os.system('clear' if os.name == 'posix' else 'cls')
-                try:
-                    columns, lines_terminal = os.get_terminal_size()
-                except OSError:
-                    # Default terminal size if unable to get
-                    columns, lines_terminal = 80, 24
-                # Calculate padding to center the large time
-                content_height = len(large_time_lines) + 1  # Timer lines + 1 for task name
-                space_below_timer = lines_terminal - content_height
-                padding_top = max((lines_terminal - content_height) // 2, 0)
-                print('\n' * padding_top)
-                for line in large_time_lines:
-                    print(line.center(columns))
-                padding_between = max((space_below_timer - padding_top) // 2, 0)
-                print('\n' * padding_between)
-                task_text = f"TASK: {self.task_name.upper()}"
-                task_text = f"\033[1m{task_text}\033[0m"  # Make it bold
-                print(task_text.center(columns))
+                self._sync_countdown()
+                if self.checkpoint_due():
+                    self._checkpoint()
+                self.publish_state(state)
+                remaining_time, negative = format_clock(self.countdown.remaining_display())
+                with instrumentation.span("render.draw"):
+                    self.renderer.draw(remaining_time, negative, self.task_name)
 
                 # Check if time is up and prompt hasn't been initiated yet
                 if self.total_seconds <= 0 and not self.final_prompt and not self.continue_task:
                     # Time is up, initiate prompt
                     self.prompt_user_initial()
+                    self.renderer.invalidate()
+                    if not self.continue_task:
+                        # A 'y'/'n' answer ends the session
+                        break
 
-                # Continue the timer
-                time.sleep(UPDATE_INTERVAL)
-                self.total_seconds -= UPDATE_INTERVAL
-                self.actual_seconds += UPDATE_INTERVAL
+                # Sleep until the display changes; a checkpoint due earlier shares the wakeup
+                self.countdown.wait_next_tick(self.until_checkpoint())
+                instrumentation.observe("tick.jitter", self.countdown.lateness())
 
                 # If the user chose to continue, keep the timer running without prompting
                 if self.continue_task:
@@ -244,6 +196,9 @@ class Timer:
 
         except KeyboardInterrupt:
             # Handle Ctrl+C
+            self.interrupted = True
+            self.countdown.stop()
+            self._sync_countdown()
             print("\nTimer interrupted by user.")
             logging.info(f"Task '{self.task_name}' interrupted by user at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             self.end_time = datetime.now()
@@ -261,6 +216,11 @@ class Timer:
                     # Finalize if time is not negative
                     self._finalize()
         finally:
+            self.countdown.stop()
+            self._sync_countdown()
+            state.close()
+            self.renderer.close()
+            self.input.close()
             if not self.continue_task:
                 self.end_time = datetime.now()
                 try:
@@ -269,31 +229,146 @@ class Timer:
                     logging.error(f"Error during finalization: {e}")
                     print(f"An error occurred during finalization: {e}")
 
-    def _finalize(self):
+    def checkpoint_due(self):
         """
-        Finalizes the task by logging it to the database and sending a notification based on user input.
+        Returns True when the running session should be saved again.
         """
-        # Safely retrieve the user's decision
-        with self.decision_lock:
-            completed = self.user_decision if self.user_decision is not None else False
+        if self.session_id is None or self.session_recovered or self.actual_seconds < self._next_checkpoint:
+            return False
+        # Skip checkpoints missed while suspended rather than catching up one by one.
+        while self._next_checkpoint <= self.actual_seconds:
+            self._next_checkpoint += CHECKPOINT_INTERVAL
+        return True
 
-        status = "Finished" if completed else "Not Finished"
+    def until_checkpoint(self):
+        """
+        Returns the seconds until the next checkpoint is due, or None without a session.
+        """
+        if self.session_id is None or self.session_recovered:
+            return None
+        return self._next_checkpoint - self.countdown.elapsed()
 
-        total_minutes = self.actual_seconds / 60
-        log_task(
+    def publish_state(self, state):
+        """
+        Writes the remaining time to the state file read by --status.
+        """
+        return state.publish(
+            self.task_name, self.countdown.remaining(), self.initial_duration_seconds, self.continue_task
+        )
+
+    def _checkpoint(self):
+        try:
+            if checkpoint_sessions([(self.session_id, self.actual_seconds)]):
+                self.mark_recovered()
+        except sqlite3.Error as e:
+            logging.error(f"Error checkpointing task '{self.task_name}': {e}")
+
+    def mark_recovered(self):
+        """
+        Stops checkpointing a session another process has already recovered;
+        the final log replaces the recovered entry (see db.log_task).
+        """
+        self.session_recovered = True
+        logging.warning(f"Session '{self.task_name}' was recovered by another process while this timer was "
+                        f"suspended; its result will replace the recovered entry.")
+
+    def _sync_countdown(self):
+        """
+        Refreshes remaining and elapsed seconds from the countdown's timestamps.
+        """
+        self.total_seconds = self.countdown.remaining()
+        self.actual_seconds = self.countdown.elapsed()
+
+    async def run_async(self, engine):
+        """
+        Runs the countdown as a coroutine inside a TimerEngine.
+        Rendering, prompts and the database write are delegated to the engine,
+        so many timers can share one event loop.
+        """
+        import asyncio
+
+        self.start_time = datetime.now()
+        logging.info(f"Task '{self.task_name}' started at {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+        self._wake = asyncio.Event()
+        self.countdown.start()
+        self.session_id = await engine.open_session(self)
+
+        while not self.interrupted:
+            self._sync_countdown()
+            engine.refresh()
+            if self.total_seconds <= 0 and not self.continue_task:
+                response = await engine.prompt(
+                    self, f"Time is up for '{self.task_name}'. Did you finish the task? (y/n/c): ", ['y', 'n', 'c']
+                )
+                if response == 'c':
+                    self.continue_task = True
+                    logging.info(f"User chose to continue the task '{self.task_name}'.")
+                    continue
+                self.user_decision = (response == 'y')
+                break
+            # The engine redraws the display; the timer itself only wakes up at
+            # its deadline, or not at all while continuing into overtime.
+            deadline = None if self.continue_task else max(self.total_seconds, 0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), deadline)
+            except asyncio.TimeoutError:
+                pass
+
+        self.countdown.stop()
+        self._sync_countdown()
+        self.end_time = datetime.now()
+        if self.interrupted and self.user_decision is None:
+            logging.info(f"Task '{self.task_name}' interrupted by user at {self.end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+            response = await engine.prompt(
+                self, f"Timer stopped for '{self.task_name}'. Did you finish the task? (y/n): ", ['y', 'n']
+            )
+            self.user_decision = (response == 'y')
+        await engine.record(self)
+
+    def interrupt(self):
+        """
+        Stops a timer running under run_async() at its next opportunity.
+        """
+        self.interrupted = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def log_session(self):
+        """
+        Writes the session to the database; returns whether the task was completed.
+        """
+        completed = self.user_decision if self.user_decision is not None else False
+        session = (
             self.task_name,
             self.start_time,
             self.initial_duration_seconds / 60,
             self.end_time,
-            total_minutes,
-            completed
+            self.actual_seconds / 60,
+            completed,
         )
-        send_notification(self.task_name, status=status)
-        if CLEAR_SCREEN:
-            os.system('clear' if os.name == 'posix' else 'cls')
         try:
-            columns, _ = os.get_terminal_size()
-        except OSError:
-            columns = 80
+            log_task(*session, session_id=self.session_id, todo_id=self.todo_id)
+        except sqlite3.OperationalError as e:
+            if in_transaction():
+                # Part of a group commit, which retries its calls one by one.
+                raise
+            # Still locked after every retry (or the disk failed): keep the
+            # session for the next start rather than lose it.
+            path = save_pending_task(*session, session_id=self.session_id, todo_id=self.todo_id)
+            logging.error(f"Could not log task '{self.task_name}': {e}. Saved it to '{path}' for the next start.")
+        return completed
+
+    def _finalize(self):
+        """
+        Finalizes the task by logging it to the database and sending a notification based on user input.
+        """
+        if self.finalized:
+            return
+        self.finalized = True
+        completed = self.log_session()
+        status = "Finished" if completed else "Not Finished"
+        send_notification(self.task_name, status=status)
+        if self.renderer is not None:
+            self.renderer.clear()
         print(f"{self.task_name} - Timer {'finished' if completed else 'stopped without completion'}.")
         logging.info(f"Task '{self.task_name}' {'finished' if completed else 'stopped without completion'}.")
\ No newline at end of file
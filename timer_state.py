@@ -0,0 +1,266 @@
+# timer_state.py
+
+import math
+import mmap
+import os
+import struct
+import time
+
+# Fixed layout, little-endian: magic, version, flags, sequence, deadline,
+# duration, last update (both epoch seconds), owner pid, name length, name.
+HEADER = struct.Struct("<4sHHIdddIH")
+MAGIC = b"TSST"
+VERSION = 1
+NAME_SIZE = 128
+STATE_SIZE = HEADER.size + NAME_SIZE
+SEQ_OFFSET = 8
+
+FLAG_RUNNING = 1
+FLAG_CONTINUING = 2
+
+
+class TimerState:
+    """
+    Publishes the active timer into a small memory-mapped file.
+
+    The record has a fixed size and is rewritten in place, so readers such
+    as `main.py --status` only map the file and decode a few bytes. Writes
+    are bracketed by a sequence number (odd while a write is in progress)
+    that readers use to detect and retry torn reads. Only one timer is
+    published at a time: a writer does not take over a record owned by
+    another live process.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self._seq = 0
+        self._map = None
+
+    def open(self):
+        """
+        Maps the state file, creating it if needed. Returns False if it cannot be mapped.
+        """
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # Never shrink the file: a reader may have it mapped.
+                if os.fstat(fd).st_size < STATE_SIZE:
+                    os.ftruncate(fd, STATE_SIZE)
+                self._map = mmap.mmap(fd, STATE_SIZE)
+            finally:
+                os.close(fd)
+        except (OSError, ValueError):
+            self._map = None
+            return False
+        record = _unpack(self._map)
+        # Continue the existing sequence; an odd value was left by an interrupted write.
+        self._seq = record[3] + (record[3] & 1) if record else 0
+        return True
+
+    def _owned_elsewhere(self):
+        record = _unpack(self._map)
+        if record is None:
+            return False
+        _, _, flags, _, _, _, _, pid, _ = record
+        return bool(flags & FLAG_RUNNING) and pid != self.pid and process_alive(pid)
+
+    def publish(self, task_name, remaining, duration, continuing=False):
+        """
+        Publishes a running timer with `remaining` seconds left of `duration`.
+        """
+        if self._map is None or self._owned_elsewhere():
+            return False
+        now = time.time()
+        flags = FLAG_RUNNING | (FLAG_CONTINUING if continuing else 0)
+        self._write(flags, now + remaining, duration, now, task_name)
+        return True
+
+    def clear(self):
+        """
+        Marks the record as idle if this process owns it.
+        """
+        if self._map is None or self._owned_elsewhere():
+            return
+        self._write(0, 0.0, 0.0, time.time(), "")
+
+    def _write(self, flags, deadline, duration, updated, task_name):
+        name = task_name.encode("utf-8")[:NAME_SIZE]
+        self._seq += 1  # Odd: write in progress
+        struct.pack_into("<I", self._map, SEQ_OFFSET, self._seq)
+        HEADER.pack_into(
+            self._map, 0, MAGIC, VERSION, flags, self._seq, deadline, duration, updated, self.pid, len(name)
+        )
+        self._map[HEADER.size:HEADER.size + len(name)] = name
+        self._seq += 1
+        struct.pack_into("<I", self._map, SEQ_OFFSET, self._seq)
+
+    def close(self):
+        """
+        Clears the record and unmaps the file.
+        """
+        if self._map is not None:
+            self.clear()
+            self._map.close()
+            self._map = None
+
+
+def _unpack(buffer):
+    record = HEADER.unpack_from(buffer, 0)
+    if record[0] != MAGIC or record[1] != VERSION:
+        return None
+    return record
+
+
+def process_alive(pid):
+    """
+    Returns whether a process with this pid is running.
+    """
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows; assume it is alive.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def boot_time():
+    """
+    Returns when the system booted, in epoch seconds, or None where that is unknown.
+    """
+    try:
+        with open("/proc/stat", encoding="ascii") as stream:
+            for line in stream:
+                if line.startswith("btime "):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def process_start_time(pid):
+    """
+    Returns when a process started, in epoch seconds, or None if it cannot be told.
+    Read from /proc where there is one, otherwise from the elapsed time `ps` reports.
+    """
+    booted = boot_time()
+    if booted is not None:
+        try:
+            with open(f"/proc/{pid}/stat", encoding="ascii", errors="replace") as stream:
+                data = stream.read()
+            # Fields after the parenthesized command name, which may contain spaces;
+            # the start time (field 22) is in clock ticks since boot.
+            fields = data[data.rindex(")") + 2:].split()
+            return booted + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            return None
+    if os.name == 'nt':
+        return None
+    import subprocess
+
+    try:
+        result = subprocess.run(["ps", "-o", "etime=", "-p", str(pid)], capture_output=True, text=True, timeout=2)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # [[days-]hours:]minutes:seconds
+    elapsed = result.stdout.strip()
+    if result.returncode != 0 or not elapsed:
+        return None
+    days, _, clock = elapsed.rpartition("-")
+    try:
+        seconds = 0
+        for part in clock.split(":"):
+            seconds = seconds * 60 + int(part)
+        seconds += int(days or 0) * 86400
+    except ValueError:
+        return None
+    return time.time() - seconds
+
+
+def read_state(path, retries=100):
+    """
+    Reads the published timer without locking.
+
+    Returns a dict with task_name, deadline, duration, continuing and pid,
+    or None when no timer is running or its process has died.
+    """
+    try:
+        with open(path, "rb") as stream:
+            with mmap.mmap(stream.fileno(), STATE_SIZE, access=mmap.ACCESS_READ) as buffer:
+                for _ in range(retries):
+                    record = _unpack(buffer)
+                    if record is None:
+                        return None
+                    seq = record[3]
+                    name = buffer[HEADER.size:HEADER.size + min(record[8], NAME_SIZE)]
+                    if seq % 2 == 0 and struct.unpack_from("<I", buffer, SEQ_OFFSET)[0] == seq:
+                        break
+                else:
+                    return None
+    except (OSError, ValueError):
+        # Missing, too short or unreadable: nothing is published.
+        return None
+    _, _, flags, _, deadline, duration, _, pid, _ = record
+    if not flags & FLAG_RUNNING or not process_alive(pid):
+        return None
+    return {
+        "task_name": name.decode("utf-8", errors="ignore"),
+        "deadline": deadline,
+        "duration": duration,
+        "continuing": bool(flags & FLAG_CONTINUING),
+        "pid": pid,
+    }
+
+
+def _clock(seconds):
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    text = f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+    return "-" + text if seconds < 0 else text
+
+
+def format_state(state, fmt, now=None):
+    """
+    Formats a state returned by read_state() with str.format placeholders:
+    {name}, {remaining}, {seconds}, {elapsed}, {duration}, {percent}, {state} and {pid}.
+    """
+    now = time.time() if now is None else now
+    seconds = math.ceil(state["deadline"] - now)  # Rounded up, like the countdown display
+    duration = int(state["duration"])
+    elapsed = duration - seconds
+    if seconds < 0:
+        phase = "continuing" if state["continuing"] else "overtime"
+    else:
+        phase = "running"
+    return fmt.format(
+        name=state["task_name"],
+        remaining=_clock(seconds),
+        seconds=seconds,
+        elapsed=_clock(elapsed),
+        duration=_clock(duration),
+        percent=min(elapsed * 100 // duration, 999) if duration else 100,
+        state=phase,
+        pid=state["pid"],
+    )
+
+
+def print_status(args, path, default_format):
+    """
+    Handles `main.py --status [FORMAT]`. Prints nothing and returns 1 when no timer is running.
+    """
+    state = read_state(path)
+    if state is None:
+        return 1
+    try:
+        print(format_state(state, args[0] if args else default_format))
+    except (KeyError, IndexError, ValueError) as e:
+        print(f"Invalid status format: {e}")
+        return 2
+    return 0
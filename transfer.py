@@ -0,0 +1,192 @@
+# transfer.py
+
+import csv
+import itertools
+import json
+import logging
+from datetime import datetime
+
+from archive import merge_rows
+from db import archived_keys, connect_db, iter_archived_rows, retry_busy, transaction
+from queries import EXPORT_TASKS, IMPORT_TASK, EXPORT_TODO, IMPORT_TODO, INSERT_TASK_NAME
+
+# Exported columns per table. Times are epoch seconds, exactly as stored in
+# the database. On import, times may also be ISO 8601 strings; each row is
+# checked and converted before it is inserted (see _check_row).
+TASK_FIELDS = ["task_name", "start_time", "end_time", "initial_duration", "actual_duration", "status"]
+
+TODO_FIELDS = ["task_name", "duration", "added_date"]
+
+TABLES = {
+    "tasks": (TASK_FIELDS, EXPORT_TASKS, IMPORT_TASK),
+    "todo": (TODO_FIELDS, EXPORT_TODO, IMPORT_TODO),
+}
+
+FORMATS = ("jsonl", "csv")
+
+# Fields every imported row must have.
+REQUIRED_FIELDS = {"task_name", "start_time", "end_time", "added_date"}
+
+TIME_FIELDS = {"start_time", "end_time", "added_date"}
+
+NUMBER_FIELDS = {"initial_duration", "actual_duration", "duration"}
+
+
+def guess_format(path, default="jsonl"):
+    """
+    Picks the transfer format from a file extension.
+    """
+    for fmt in FORMATS:
+        if path.lower().endswith(f".{fmt}"):
+            return fmt
+    return default
+
+
+def export_table(table, stream, fmt="jsonl"):
+    """
+    Writes every row of a table to a text stream; returns the number of rows.
+    Rows are read straight off the cursor, so memory use stays flat.
+    Archived sessions are merged with the live tasks by start time.
+    """
+    names, export_query, _ = TABLES[table]
+    cursor = connect_db().execute(export_query)
+    if table == "tasks":
+        # Both sources carry the id first for the merge; the export leaves ids out.
+        cursor = (row[1:] for row in merge_rows([iter_archived_rows(), cursor]))
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(names)
+        for row in cursor:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in cursor:
+            stream.write(json.dumps(dict(zip(names, row))))
+            stream.write("\n")
+            count += 1
+    logging.info(f"Exported {count} rows from '{table}'.")
+    return count
+
+
+def _read_rows(stream, fmt, names):
+    # Yields (line number, row); a line that cannot be parsed yields its error instead of a row.
+    if fmt == "csv":
+        reader = csv.reader(stream)
+        header = next(reader, [])
+        positions = [header.index(name) if name in header else None for name in names]
+        for record in reader:
+            if not record:
+                continue
+            yield reader.line_num, tuple(
+                record[index] if index is not None and index < len(record) and record[index] != "" else None
+                for index in positions
+            )
+    else:
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f"invalid JSON ({e})")
+                continue
+            if not isinstance(record, dict):
+                yield line_number, ValueError("expected a JSON object")
+                continue
+            yield line_number, tuple(map(record.get, names))
+
+
+def _to_epoch(value):
+    # Epoch seconds as a number or numeric text, or an ISO 8601 date and time.
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(float(value))
+    except ValueError:
+        return int(datetime.fromisoformat(value.strip()).timestamp())
+
+
+def _check_row(names, row):
+    # Returns the row with times as epoch seconds and durations as numbers;
+    # raises ValueError naming the first field that is missing or invalid.
+    checked = []
+    for name, value in zip(names, row):
+        if value is None:
+            if name in REQUIRED_FIELDS:
+                raise ValueError(f"{name} is missing")
+        elif name in TIME_FIELDS:
+            try:
+                value = _to_epoch(value)
+            except (TypeError, ValueError, OverflowError, OSError):
+                raise ValueError(f"{name} {value!r} is neither epoch seconds nor an ISO 8601 time") from None
+        elif name in NUMBER_FIELDS:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} {value!r} is not a number") from None
+        elif name == "task_name":
+            value = str(value)
+        checked.append(value)
+    return tuple(checked)
+
+
+def _skip_archived(chunk):
+    # Drops task rows whose (task name, start time) is already archived.
+    starts = [row[1] for row in chunk]
+    if not starts:
+        return chunk
+    archived = archived_keys(min(starts), max(starts) + 1)
+    if not archived:
+        return chunk
+    return [row for row in chunk if (row[0], row[1]) not in archived]
+
+
+@retry_busy
+def _insert_chunk(import_query, chunk):
+    # Retried on its own: the stream cannot be read a second time.
+    with transaction() as conn:
+        # The task name is the first field of both tables.
+        conn.executemany(INSERT_TASK_NAME, {(row[0],) for row in chunk})
+        return conn.executemany(import_query, chunk).rowcount
+
+
+def import_table(table, stream, fmt="jsonl", chunk_size=10000):
+    """
+    Loads rows from a text stream into a table; returns (rows read, rows
+    inserted, skipped rows), where skipped rows are (line number, reason)
+    pairs for the invalid rows.
+
+    Rows are inserted with executemany in chunked transactions, and rows
+    whose natural key (task name plus start or added time) already exists
+    are skipped, including tasks already in the archive. New task names are
+    added to task_names with each chunk. Inside a db.transaction() block
+    the chunks join the caller's transaction instead of committing;
+    otherwise a chunk that meets a busy lock is retried on its own.
+    """
+    names, _, import_query = TABLES[table]
+    rows = _read_rows(stream, fmt, names)
+    read = inserted = 0
+    skipped = []
+    while True:
+        batch = list(itertools.islice(rows, chunk_size))
+        if not batch:
+            break
+        read += len(batch)
+        chunk = []
+        for line_number, row in batch:
+            try:
+                if isinstance(row, ValueError):
+                    raise row
+                chunk.append(_check_row(names, row))
+            except ValueError as e:
+                logging.warning(f"Skipping line {line_number} of the '{table}' import: {e}.")
+                skipped.append((line_number, str(e)))
+        if table == "tasks":
+            chunk = _skip_archived(chunk)
+        if chunk:
+            inserted += _insert_chunk(import_query, chunk)
+    logging.info(f"Imported {inserted} of {read} rows into '{table}' ({len(skipped)} invalid rows skipped).")
+    return read, inserted, skipped
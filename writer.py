@@ -0,0 +1,119 @@
+# writer.py
+
+import atexit
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from db import close_thread_db, retry_busy, transaction
+
+# Most calls committed together; a longer backlog is split over several commits.
+MAX_BATCH = 256
+
+
+@retry_busy
+def _run_group(batch):
+    # One transaction for the whole group; the write functions join it.
+    with transaction():
+        return [func(*args, **kwargs) for _, func, args, kwargs in batch]
+
+
+class WriteQueue:
+    """
+    Funnels database writes through a single thread that group-commits them.
+
+    submit() queues a call to a db.py function (or anything that calls them)
+    and returns a Future with its result. The writer thread takes every call
+    queued since its last commit and runs them in one transaction, so a
+    burst of writes costs one commit instead of one per call, and the
+    process never competes with itself for the write lock. A lock held by
+    another process is waited out with backoff (see db.retry_busy). If one
+    call of a group fails, the group is rolled back and its calls run again
+    in a transaction each, so only the failing call sees the error.
+
+    Use it as `with WriteQueue() as writes:`; leaving the block, close() or
+    the end of the process commits what is still queued.
+    """
+
+    def __init__(self, name="taskstrike-db", max_batch=MAX_BATCH):
+        self.name = name
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None  # Started by the first submit()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queues func(*args, **kwargs) for the writer thread; returns a Future.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The write queue is closed.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def close(self, wait=True):
+        """
+        Commits the queued calls and stops the writer thread.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        atexit.unregister(self.close)
+        self._queue.put(None)
+        if wait:
+            thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            stopping = item is None
+            batch = [] if stopping else [item]
+            while not stopping and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+            batch = [entry for entry in batch if entry[0].set_running_or_notify_cancel()]
+            if batch:
+                self._commit(batch)
+            if stopping:
+                close_thread_db()
+                return
+
+    def _commit(self, batch):
+        if len(batch) > 1:
+            try:
+                results = _run_group(batch)
+            except Exception as e:
+                logging.warning(f"Group commit of {len(batch)} writes failed ({e}); committing them one by one.")
+            else:
+                for (future, *_), result in zip(batch, results):
+                    future.set_result(result)
+                return
+        for future, func, args, kwargs in batch:
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)